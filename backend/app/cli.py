@@ -0,0 +1,47 @@
+"""Command-line tools for the iDRAC monitor.
+
+    python -m app.cli import servers.csv --on-conflict update
+"""
+import argparse
+import asyncio
+import json
+import sys
+from app import database
+from app.services import importer
+
+def import_command(args):
+    with open(args.file, encoding="utf-8-sig") as f:
+        text = f.read()
+    if args.file.lower().endswith(".csv"):
+        records = importer.parse_csv(text)
+    else:
+        payload = json.loads(text)
+        records = payload.get("servers") if isinstance(payload, dict) else payload
+
+    database.init_db()
+    report = asyncio.run(importer.import_servers(records, args.on_conflict))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for entry in report["rows"]:
+            if entry["status"] not in ("inserted", "updated", "skipped"):
+                print(f"row {entry['row']} ({entry['hostname'] or '?'}): {entry['status']} - {entry['message']}")
+        print(", ".join(f"{count} {status}" for status, count in report["counts"].items()))
+    return 1 if report["counts"].get("error") or report["counts"].get("conflict") else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="iDRAC monitor tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Bulk-import servers from a CSV or JSON file")
+    import_parser.add_argument("file", help="CSV with a ServerData header row, or a JSON list of ServerData records")
+    import_parser.add_argument("--on-conflict", choices=importer.CONFLICT_POLICIES, default="skip",
+                               help="What to do with hostnames that already exist (default: skip)")
+    import_parser.add_argument("--json", action="store_true", help="Print the full per-row report as JSON")
+    import_parser.set_defaults(handler=import_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import os
+
+# SQLite database shared by the API, the poller and the history stores
+DATABASE_FILE = os.getenv(
+    "DATABASE_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "routes", "servers.db")
+)
+
+# Redfish transport
+# Where each iDRAC's Redfish service lives; {ip} is the resolved address. Point it at the
+# simulator to run without hardware, e.g. http://127.0.0.1:8900/hosts/{ip} (see bench/).
+REDFISH_BASE_URL_TEMPLATE = os.getenv("REDFISH_BASE_URL_TEMPLATE", "https://{ip}")
+# Keep-alive connections held open per iDRAC. iDRAC9 serves only a handful of
+# concurrent HTTPS connections, so keep this small.
+REDFISH_MAX_CONNECTIONS_PER_HOST = int(os.getenv("REDFISH_MAX_CONNECTIONS_PER_HOST", "4"))
+# Upper bound on Redfish requests in flight across the whole fleet.
+REDFISH_MAX_CONCURRENT_REQUESTS = int(os.getenv("REDFISH_MAX_CONCURRENT_REQUESTS", "64"))
+# Upper bound on one request's timeout. Each iDRAC's actual timeout adapts to its measured
+# latency, never going below REDFISH_MIN_TIMEOUT.
+REDFISH_TIMEOUT = float(os.getenv("REDFISH_TIMEOUT", "30"))
+REDFISH_MIN_TIMEOUT = float(os.getenv("REDFISH_MIN_TIMEOUT", "5"))
+REDFISH_KEEPALIVE_EXPIRY = float(os.getenv("REDFISH_KEEPALIVE_EXPIRY", "60"))
+# Authenticate with one Redfish session (X-Auth-Token) per iDRAC instead of basic auth on
+# every request. iDRAC allows only a few concurrent sessions, so exactly one is held per host.
+REDFISH_SESSION_AUTH = os.getenv("REDFISH_SESSION_AUTH", "true").lower() == "true"
+# Seconds to fall back to basic auth after a failed session login before trying again
+REDFISH_SESSION_RETRY = float(os.getenv("REDFISH_SESSION_RETRY", "300"))
+# Consecutive failed requests (network errors, timeouts, 5xx) that open an iDRAC's circuit
+# breaker. While open, requests to it fail immediately; a probe is let through after the
+# backoff, which doubles on every failed probe up to the maximum.
+REDFISH_BREAKER_THRESHOLD = int(os.getenv("REDFISH_BREAKER_THRESHOLD", "5"))
+REDFISH_BREAKER_BACKOFF = float(os.getenv("REDFISH_BREAKER_BACKOFF", "30"))
+REDFISH_BREAKER_MAX_BACKOFF = float(os.getenv("REDFISH_BREAKER_MAX_BACKOFF", "900"))
+# Send a second copy of a GET that is slower than usual for its iDRAC and take whichever
+# answers first. Off by default: it costs extra iDRAC connections.
+REDFISH_HEDGE_GETS = os.getenv("REDFISH_HEDGE_GETS", "false").lower() == "true"
+REDFISH_HEDGE_MIN_DELAY = float(os.getenv("REDFISH_HEDGE_MIN_DELAY", "0.5"))
+# Redfish responses remembered with their ETag so the next poll can send If-None-Match
+# and reuse the body on 304 Not Modified. Kept per iDRAC, so the cache grows with the fleet
+# and one host's entries are never evicted by polling the others. A full poll touches 7-10
+# ETagged URLs per iDRAC (more without $expand and with many drives or DIMMs); the default
+# leaves room for all of them on large servers. Memory grows with the fleet: about 25 KB
+# per host against bench/mock_redfish.py, so budget ~100 KB per real iDRAC, or ~1 GB for
+# 10,000 hosts.
+REDFISH_ETAG_ENTRIES_PER_HOST = int(os.getenv("REDFISH_ETAG_ENTRIES_PER_HOST", "64"))
+
+# Background fleet poller
+POLLER_ENABLED = os.getenv("POLLER_ENABLED", "true").lower() == "true"
+# Seconds between two polls of each section of the same iDRAC. Sensors move
+# every few seconds; inventory, firmware and warranty change rarely.
+SECTION_INTERVALS = {
+    "thermals_and_power": float(os.getenv("POLL_INTERVAL_THERMALS_AND_POWER", "60")),
+    "system": float(os.getenv("POLL_INTERVAL_SYSTEM", "300")),
+    "storage": float(os.getenv("POLL_INTERVAL_STORAGE", "900")),
+    "hardware": float(os.getenv("POLL_INTERVAL_HARDWARE", "3600")),
+    "firmware": float(os.getenv("POLL_INTERVAL_FIRMWARE", "21600")),
+    "warranty": float(os.getenv("POLL_INTERVAL_WARRANTY", "86400")),
+}
+# Fraction of the interval each host's schedule is randomly shifted by, so
+# hosts added together don't stay in lockstep
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))
+# Number of iDRACs crawled at the same time
+POLL_WORKERS = int(os.getenv("POLL_WORKERS", "16"))
+# How often the poller re-reads the servers table for added or removed hosts
+POLL_HOST_REFRESH_INTERVAL = float(os.getenv("POLL_HOST_REFRESH_INTERVAL", "60"))
+
+# Sharded polling (python -m app.worker): worker processes split the fleet between them
+# through the poll_workers / poll_assignments tables. Run the API with POLLER_ENABLED=false.
+# Seconds between a worker's heartbeats, which also rebalance its share of hosts
+WORKER_HEARTBEAT_INTERVAL = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "5"))
+# A worker (and its host leases) is considered gone after this long without a heartbeat
+WORKER_LEASE_TIMEOUT = float(os.getenv("WORKER_LEASE_TIMEOUT", "20"))
+# Points per worker on the consistent-hash ring; more spreads hosts more evenly
+WORKER_VNODES = int(os.getenv("WORKER_VNODES", "64"))
+
+# iDRAC credentials: per-host entries in a JSON file (see app/utils/auth.py), with
+# IDRAC_USERNAME / IDRAC_PASSWORD for hosts the file does not match
+IDRAC_CREDENTIALS_FILE = os.getenv("IDRAC_CREDENTIALS_FILE", "")
+IDRAC_USERNAME = os.getenv("IDRAC_USERNAME", "root")
+IDRAC_PASSWORD = os.getenv("IDRAC_PASSWORD", "calvin")
+
+# In-process cache of server details, keyed by iDRAC IP and section
+# Seconds an entry is served as fresh
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+# Seconds past the TTL an entry may still be served while it is refreshed in the background
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "20000"))
+
+# Streaming endpoints
+# Events buffered per subscriber before the oldest are dropped
+STREAM_SUBSCRIBER_QUEUE_SIZE = int(os.getenv("STREAM_SUBSCRIBER_QUEUE_SIZE", "1000"))
+# Seconds between keep-alive messages on idle subscriptions
+STREAM_KEEPALIVE_INTERVAL = float(os.getenv("STREAM_KEEPALIVE_INTERVAL", "15"))
+
+# Sensor time-series store
+# Seconds between writes of in-progress chunks to SQLite
+TIMESERIES_FLUSH_INTERVAL = float(os.getenv("TIMESERIES_FLUSH_INTERVAL", "60"))
+# Days of data kept per resolution (0 = raw samples, otherwise seconds per rollup point)
+TIMESERIES_RETENTION_DAYS = {
+    0: float(os.getenv("TIMESERIES_RAW_RETENTION_DAYS", "2")),
+    60: float(os.getenv("TIMESERIES_1M_RETENTION_DAYS", "14")),
+    300: float(os.getenv("TIMESERIES_5M_RETENTION_DAYS", "90")),
+    3600: float(os.getenv("TIMESERIES_1H_RETENTION_DAYS", "400")),
+}
+
+# Self-instrumentation on /metrics
+# Per-iDRAC latency and byte series; turn off for very large fleets to bound series count
+METRICS_PER_HOST = os.getenv("METRICS_PER_HOST", "true").lower() == "true"
+
+# Redfish EventService push: iDRACs POST alerts and metric reports to /events/redfish
+EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "false").lower() == "true"
+# The receiver's URL as the iDRACs reach it, e.g. https://monitor.example.com/events/redfish
+EVENT_DESTINATION_URL = os.getenv("EVENT_DESTINATION_URL", "")
+# Shared secret appended to the destination as ?token= and required on incoming events. Must be set:
+# the receiver refuses every event while it is empty
+EVENT_TOKEN = os.getenv("EVENT_TOKEN", "")
+EVENT_FORMATS = tuple(
+    event_format.strip() for event_format in os.getenv("EVENT_FORMATS", "Event,MetricReport").split(",") if event_format.strip()
+)
+# Seconds to gather a burst of events for one host into a single refresh
+EVENT_REFRESH_DELAY = float(os.getenv("EVENT_REFRESH_DELAY", "2"))
+# Seconds between checks that every iDRAC still has its subscriptions
+EVENT_SUBSCRIBE_INTERVAL = float(os.getenv("EVENT_SUBSCRIBE_INTERVAL", "3600"))
+
+# Snapshot history: a compressed base per host plus a diff for every poll that changed something
+# Sections whose changes are kept (sensor readings are in the time-series store instead)
+HISTORY_SECTIONS = tuple(
+    section.strip() for section in os.getenv("HISTORY_SECTIONS", "system,hardware,storage,firmware,warranty").split(",")
+    if section.strip()
+)
+# Diffs written before the next full base, bounding how many are replayed per lookup
+HISTORY_REBASE_EVERY = int(os.getenv("HISTORY_REBASE_EVERY", "100"))
+HISTORY_RETENTION_DAYS = float(os.getenv("HISTORY_RETENTION_DAYS", "400"))
+
+# DNS resolver cache shared by the API, the importer and the poller
+# Seconds an answer is kept when its TTL is unknown (install dnspython to use record TTLs)
+DNS_CACHE_TTL = float(os.getenv("DNS_CACHE_TTL", "300"))
+# Record TTLs are clamped to this range
+DNS_MIN_TTL = float(os.getenv("DNS_MIN_TTL", "30"))
+DNS_MAX_TTL = float(os.getenv("DNS_MAX_TTL", "3600"))
+# Seconds a failed lookup is remembered before the name is queried again
+DNS_NEGATIVE_TTL = float(os.getenv("DNS_NEGATIVE_TTL", "60"))
+# Lookups in flight at the same time, e.g. during a bulk import
+DNS_MAX_CONCURRENT_LOOKUPS = int(os.getenv("DNS_MAX_CONCURRENT_LOOKUPS", "32"))
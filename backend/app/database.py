@@ -1,12 +1,80 @@
-import sqlite3
 import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from app.config import DATABASE_FILE
+from app.services import history
+from app.services.summary import summarize_snapshot
+from app.utils import metrics
 
-DATABASE_FILE = "servers.db"
+# One connection per thread, reused for the life of the thread. The API's threadpool, the
+# poller's to_thread calls and the history stores all go through get_connection().
+_local = threading.local()
+_connections: list[sqlite3.Connection] = []
+_connections_lock = threading.Lock()
+# Bumped by close_connections() so every thread reopens instead of reusing a closed handle
+_generation = 0
 
-def init_db():
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
+# Applied to every new connection. WAL lets readers run while the poller writes;
+# NORMAL sync is durable across application crashes in WAL mode.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+)
+
+QUERY_SECONDS = metrics.Histogram(
+    "idrac_monitor_db_query_duration_seconds", "Time spent in each database operation", ("operation",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+def get_connection() -> sqlite3.Connection:
+    """Returns this thread's connection, opening it on first use.
+
+    Connections run in autocommit mode; use transaction() to group writes. sqlite3 keeps a
+    cache of prepared statements per connection, so repeated queries skip re-parsing.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.generation != _generation:
+        conn = sqlite3.connect(DATABASE_FILE, isolation_level=None, cached_statements=256, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        _local.conn = conn
+        _local.generation = _generation
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+@contextmanager
+def transaction(immediate: bool = False):
+    """Runs the block in one transaction on this thread's connection.
+
+    immediate=True takes the write lock up front, for read-modify-write updates.
+    """
+    conn = get_connection()
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+def close_connections():
+    """Closes every pooled connection. Called on application shutdown."""
+    global _generation
+    with _connections_lock:
+        _generation += 1
+        for conn in _connections:
+            conn.close()
+        _connections.clear()
+
+def _create_servers_table(conn):
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS servers (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             DataCenterID TEXT NOT NULL,
@@ -31,79 +99,526 @@ def init_db():
             iDRAC_details JSON
         )
     """)
-    conn.commit()
-    conn.close()
 
-def add_server(data: dict):
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    columns = ", ".join(data.keys())
-    placeholders = ", ".join(["?"] * len(data))
-    try:
-        cursor.execute(f"INSERT INTO servers ({columns}) VALUES ({placeholders})", list(data.values()))
-        conn.commit()
-        conn.close()
-        return {"message": "Server added successfully."}
-    except sqlite3.IntegrityError:
-        conn.close()
-        return {"error": "Hostname already exists."}
-    except Exception as e:
-        conn.close()
-        return {"error": str(e)}
+def _add_summary_column(conn):
+    """Adds iDRAC_summary and backfills it from existing snapshots."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(servers)")]
+    if "iDRAC_summary" in columns:
+        return
+    conn.execute("ALTER TABLE servers ADD COLUMN iDRAC_summary JSON")
+    rows = conn.execute("SELECT id, iDRAC_details FROM servers WHERE iDRAC_details IS NOT NULL").fetchall()
+    conn.executemany(
+        "UPDATE servers SET iDRAC_summary = ? WHERE id = ?",
+        [(json.dumps(summarize_snapshot(json.loads(details))), server_id) for server_id, details in rows]
+    )
+
+def _create_metric_chunks_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS metric_chunks (
+            host TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            resolution INTEGER NOT NULL,
+            chunk_start INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (host, metric, resolution, chunk_start)
+        ) WITHOUT ROWID
+    """)
+
+def _create_server_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_servers_idrac_ip ON servers (iDRAC_IP)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_servers_location ON servers (DataCenterID, Cabinet, Position)")
+
+def _create_snapshot_history_table(conn):
+    # kind 0 rows hold a full zlib-compressed state, kind 1 rows a diff against the row before
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS snapshot_history (
+            host TEXT NOT NULL,
+            ts REAL NOT NULL,
+            kind INTEGER NOT NULL,
+            state_hash TEXT NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (host, ts)
+        ) WITHOUT ROWID
+    """)
+
+# Inventory fields matched by GET /servers/search
+SEARCH_COLUMNS = ("Hostname", "Label", "SerialNo", "AssetTag", "CustomTags", "Owner")
+
+def _create_server_search_index(conn):
+    """Full-text index over the searchable inventory fields, kept in step with servers by triggers."""
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+    # External content: the index stores only tokens; prefix indexes make 2- and 3-character prefixes cheap
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS servers_fts USING fts5(
+            {columns}, content='servers', content_rowid='id', prefix='2 3'
+        )
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS servers_fts_insert AFTER INSERT ON servers BEGIN
+            INSERT INTO servers_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS servers_fts_delete AFTER DELETE ON servers BEGIN
+            INSERT INTO servers_fts (servers_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    """)
+    # Only inventory edits touch the index; polls update iDRAC_details and iDRAC_summary
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS servers_fts_update AFTER UPDATE OF {columns} ON servers BEGIN
+            INSERT INTO servers_fts (servers_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO servers_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    conn.execute("INSERT INTO servers_fts (servers_fts) VALUES ('rebuild')")
+
+def _create_health_index(conn):
+    # Covers the per-datacenter and per-cabinet health rollups of GET /servers/tree
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_servers_health ON servers (DataCenterID, Cabinet, json_extract(iDRAC_summary, '$.health'))"
+    )
+
+def _create_worker_tables(conn):
+    # Sharded polling: live worker processes, and which of them holds the lease on each host
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS poll_workers (
+            worker_id TEXT PRIMARY KEY,
+            node TEXT,
+            pid INTEGER,
+            started_at REAL NOT NULL,
+            heartbeat_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS poll_assignments (
+            host TEXT PRIMARY KEY,
+            worker_id TEXT NOT NULL,
+            lease_expires REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_poll_assignments_worker ON poll_assignments (worker_id)")
+
+def _add_chunk_rolled_up_column(conn):
+    """Marks the raw sensor chunks whose samples are already in the rollups."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(metric_chunks)")]
+    if "rolled_up" in columns:
+        return
+    conn.execute("ALTER TABLE metric_chunks ADD COLUMN rolled_up INTEGER NOT NULL DEFAULT 0")
+    # Chunks written before the flag existed were rolled up when their 6-hour window ended
+    conn.execute(
+        """UPDATE metric_chunks SET rolled_up = 1
+           WHERE resolution = 0 AND chunk_start - chunk_start % 21600 + 21600 <= CAST(strftime('%s', 'now') AS INTEGER)"""
+    )
+
+# Schema migrations, applied in order. PRAGMA user_version records how many have run, so
+# append new steps to the end and never reorder or remove existing ones. Every step must
+# also be safe on databases created before migrations were tracked.
+MIGRATIONS = (
+    _create_servers_table,
+    _add_summary_column,
+    _create_metric_chunks_table,
+    _create_server_indexes,
+    _create_snapshot_history_table,
+    _create_server_search_index,
+    _create_health_index,
+    _create_worker_tables,
+    _add_chunk_rolled_up_column,
+)
+
+def init_db():
+    """Creates or upgrades the schema to the latest version."""
+    with transaction(immediate=True) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+        conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+    get_connection().execute("PRAGMA optimize")
+
+@QUERY_SECONDS.time("get_all_servers_for_sidebar")
+def get_all_servers_for_sidebar():
+    """Retrieves all servers for the sidebar dropdown."""
+    rows = get_connection().execute(
+        "SELECT DataCenterID, Cabinet, Position, Label, Hostname, iDRAC_IP FROM servers"
+    ).fetchall()
+    return [
+        {"DataCenterID": row[0], "Cabinet": row[1], "Position": row[2], "Label": row[3], "Hostname": row[4], "iDRAC_IP": row[5]}
+        for row in rows
+    ]
+
+@QUERY_SECONDS.time("get_all_servers")
+def get_all_servers():
+    """Retrieves all server hostnames and IPs from the database."""
+    rows = get_connection().execute("SELECT Hostname, iDRAC_IP FROM servers").fetchall()
+    return [{"hostname": row[0], "ip": row[1]} for row in rows]
+
+@QUERY_SECONDS.time("get_server_inventory")
+def get_server_inventory():
+    """Every server's hostname, iDRAC IP and location, in rack order."""
+    rows = get_connection().execute(
+        "SELECT Hostname, iDRAC_IP, DataCenterID, Cabinet, Position FROM servers ORDER BY DataCenterID, Cabinet, Position, Hostname"
+    ).fetchall()
+    return [
+        {"hostname": row[0], "ip": row[1], "DataCenterID": row[2], "Cabinet": row[3], "Position": row[4]}
+        for row in rows
+    ]
+
+@QUERY_SECONDS.time("get_snapshot_sections")
+def get_snapshot_sections(hostnames: list, sections) -> dict:
+    """Reads only the named sections (and section_timestamps) of many stored snapshots.
+
+    Returns {hostname: partial snapshot}; hosts never polled are left out. SQLite extracts
+    the sections, so the rest of each snapshot is never parsed in Python.
+    """
+    paths = ["$.section_timestamps", *(f"$.{section}" for section in sections)]
+    keys = ["section_timestamps", *sections]
+    conn = get_connection()
+    snapshots = {}
+    for start in range(0, len(hostnames), 500):
+        batch = hostnames[start:start + 500]
+        rows = conn.execute(
+            f"""SELECT Hostname, json_extract(iDRAC_details, {", ".join("?" * len(paths))}) FROM servers
+                WHERE iDRAC_details IS NOT NULL AND Hostname IN ({", ".join("?" * len(batch))})""",
+            paths + batch
+        ).fetchall()
+        for hostname, values in rows:
+            snapshots[hostname] = {key: value for key, value in zip(keys, json.loads(values)) if value is not None}
+    return snapshots
 
 def get_datacenters():
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT DataCenterID FROM servers")
-    datacenters = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return datacenters
+    rows = get_connection().execute("SELECT DISTINCT DataCenterID FROM servers ORDER BY DataCenterID").fetchall()
+    return [row[0] for row in rows]
 
 def get_cabinets(datacenter_id: str):
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT Cabinet FROM servers WHERE DataCenterID = ?", (datacenter_id,))
-    cabinets = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return cabinets
+    rows = get_connection().execute(
+        "SELECT DISTINCT Cabinet FROM servers WHERE DataCenterID = ? ORDER BY Cabinet", (datacenter_id,)
+    ).fetchall()
+    return [row[0] for row in rows]
 
 def get_positions(datacenter_id: str, cabinet: str):
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT Position FROM servers WHERE DataCenterID = ? AND Cabinet = ?", (datacenter_id, cabinet))
-    positions = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return positions
+    rows = get_connection().execute(
+        "SELECT DISTINCT Position FROM servers WHERE DataCenterID = ? AND Cabinet = ? ORDER BY Position",
+        (datacenter_id, cabinet)
+    ).fetchall()
+    return [row[0] for row in rows]
+
+@QUERY_SECONDS.time("get_tree_nodes")
+def get_tree_nodes(datacenter: str | None, limit: int, offset: int):
+    """One page of datacenters (or, given datacenter, of its cabinets) with server counts by health.
+
+    Returns (total nodes, [{"id", "count", "health": {"OK", "Warning", "Critical", "unknown"}}]).
+    """
+    column, where, params = ("Cabinet", "WHERE DataCenterID = ?", [datacenter]) if datacenter else ("DataCenterID", "", [])
+    conn = get_connection()
+    total = conn.execute(f"SELECT COUNT(DISTINCT {column}) FROM servers {where}", params).fetchone()[0]
+    rows = conn.execute(
+        f"""SELECT {column}, COUNT(*),
+                   SUM(json_extract(iDRAC_summary, '$.health') = 'OK'),
+                   SUM(json_extract(iDRAC_summary, '$.health') = 'Warning'),
+                   SUM(json_extract(iDRAC_summary, '$.health') = 'Critical')
+            FROM servers {where} GROUP BY {column} ORDER BY {column} LIMIT ? OFFSET ?""",
+        params + [limit, offset]
+    ).fetchall()
+    nodes = [
+        {
+            "id": row[0],
+            "count": row[1],
+            "health": {"OK": row[2] or 0, "Warning": row[3] or 0, "Critical": row[4] or 0,
+                       "unknown": row[1] - (row[2] or 0) - (row[3] or 0) - (row[4] or 0)},
+        }
+        for row in rows
+    ]
+    return total, nodes
+
+@QUERY_SECONDS.time("get_cabinet_servers")
+def get_cabinet_servers(datacenter: str, cabinet: str):
+    """The servers in one cabinet, bottom position first, with their current health and power state."""
+    rows = get_connection().execute(
+        """SELECT Hostname, iDRAC_IP, Position, Label,
+                  json_extract(iDRAC_summary, '$.health'), json_extract(iDRAC_summary, '$.power_state')
+           FROM servers WHERE DataCenterID = ? AND Cabinet = ?
+           ORDER BY CAST(Position AS INTEGER), Position, Hostname""",
+        (datacenter, cabinet)
+    ).fetchall()
+    return [
+        {"hostname": row[0], "ip": row[1], "Position": row[2], "Label": row[3], "health": row[4], "power_state": row[5]}
+        for row in rows
+    ]
+
+def _match_expression(query: str) -> str:
+    """Turns free text into an FTS5 query: every word must match the start of a token in some field."""
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in query.split())
+
+@QUERY_SECONDS.time("search_servers")
+def search_servers(query: str, limit: int, offset: int):
+    """Prefix search over SEARCH_COLUMNS, best matches first. Returns (total matches, one page of servers)."""
+    match = _match_expression(query)
+    if not match:
+        return 0, []
+    conn = get_connection()
+    total = conn.execute("SELECT COUNT(*) FROM servers_fts WHERE servers_fts MATCH ?", (match,)).fetchone()[0]
+    rows = conn.execute(
+        """SELECT s.Hostname, s.iDRAC_IP, s.DataCenterID, s.Cabinet, s.Position, s.Label,
+                  s.SerialNo, s.AssetTag, json_extract(s.iDRAC_summary, '$.health')
+           FROM servers_fts JOIN servers AS s ON s.id = servers_fts.rowid
+           WHERE servers_fts MATCH ? ORDER BY servers_fts.rank LIMIT ? OFFSET ?""",
+        (match, limit, offset)
+    ).fetchall()
+    return total, [
+        {"hostname": row[0], "ip": row[1], "DataCenterID": row[2], "Cabinet": row[3], "Position": row[4],
+         "Label": row[5], "SerialNo": row[6], "AssetTag": row[7], "health": row[8]}
+        for row in rows
+    ]
 
 def get_hostnames(datacenter_id: str, cabinet: str, position: str):
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT Hostname FROM servers WHERE DataCenterID = ? AND Cabinet = ? AND Position = ?", (datacenter_id, cabinet, position))
-    hostnames = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return hostnames
-
-def get_server_details(hostname: str):
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM servers WHERE Hostname = ?", (hostname,))
-    row = cursor.fetchone()
-    conn.close()
-    if row:
-        columns = [desc[0] for desc in cursor.description]
-        server_details = dict(zip(columns, row))
-        if server_details['iDRAC_details']:
-            server_details['iDRAC_details'] = json.loads(server_details['iDRAC_details'])
-        return server_details
-    return None
+    rows = get_connection().execute(
+        "SELECT Hostname FROM servers WHERE DataCenterID = ? AND Cabinet = ? AND Position = ?",
+        (datacenter_id, cabinet, position)
+    ).fetchall()
+    return [row[0] for row in rows]
 
-def get_all_servers_for_sidebar():
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT DataCenterID, Cabinet, Position, Label, iDRAC_IP FROM servers")
+@QUERY_SECONDS.time("server_exists")
+def server_exists(hostname: str) -> bool:
+    return get_connection().execute("SELECT 1 FROM servers WHERE Hostname = ?", (hostname,)).fetchone() is not None
+
+@QUERY_SECONDS.time("get_hostname_by_ip")
+def get_hostname_by_ip(ip: str):
+    """Looks up the hostname registered for a server IP."""
+    row = get_connection().execute("SELECT Hostname FROM servers WHERE iDRAC_IP = ?", (ip,)).fetchone()
+    return row[0] if row else None
+
+@QUERY_SECONDS.time("get_server_by_ip")
+def get_server_by_ip(ip: str):
+    """Retrieves the hostname and latest polled snapshot for a server IP."""
+    row = get_connection().execute("SELECT Hostname, iDRAC_details FROM servers WHERE iDRAC_IP = ?", (ip,)).fetchone()
+    if not row:
+        return None
+    return {"hostname": row[0], "details": json.loads(row[1]) if row[1] else None}
+
+@QUERY_SECONDS.time("add_server")
+def add_server(data: dict):
+    """Inserts one server row. Raises sqlite3.IntegrityError if the hostname already exists."""
+    data = dict(data)
+    if data.get("iDRAC_details") is not None:
+        data["iDRAC_details"] = json.dumps(data["iDRAC_details"])
+    columns = ", ".join(data.keys())
+    placeholders = ", ".join(["?"] * len(data))
+    get_connection().execute(f"INSERT INTO servers ({columns}) VALUES ({placeholders})", list(data.values()))
+
+@QUERY_SECONDS.time("save_server_details")
+def save_server_details(hostname: str, details: dict):
+    """Merges freshly polled sections into the server's iDRAC_details snapshot.
+
+    Returns the merged snapshot, its new summary and the summary it replaced. When every
+    polled section hashes the same as the stored copy, only the timestamps (and IP) are
+    updated in place, and the returned snapshot is just the polled details.
+    """
+    # Sections of one host can be polled concurrently; lock before reading so no update is lost
+    with transaction(immediate=True) as conn:
+        row = conn.execute(
+            "SELECT json_extract(iDRAC_details, '$.section_hashes'), iDRAC_summary FROM servers WHERE Hostname = ?",
+            (hostname,)
+        ).fetchone()
+        stored_hashes = json.loads(row[0]) if row and row[0] else {}
+        previous_summary = json.loads(row[1]) if row and row[1] else None
+        polled_hashes = details.get("section_hashes", {})
+        if previous_summary and polled_hashes and all(stored_hashes.get(section) == value for section, value in polled_hashes.items()):
+            # Nothing changed: skip re-serializing the whole snapshot and recomputing its summary
+            paths = [("$.timestamp", details.get("timestamp"))]
+            paths += [(f"$.section_timestamps.{section}", ts) for section, ts in details.get("section_timestamps", {}).items()]
+            conn.execute(
+                f"""UPDATE servers SET iDRAC_details = json_set(iDRAC_details, {', '.join('?, ?' for _ in paths)}),
+                       iDRAC_summary = json_set(iDRAC_summary, '$.last_polled', ?), iDRAC_IP = COALESCE(?, iDRAC_IP)
+                   WHERE Hostname = ?""",
+                [value for path in paths for value in path] + [details.get("timestamp"), details.get("idrac_ip"), hostname]
+            )
+            return details, {**previous_summary, "last_polled": details.get("timestamp")}, previous_summary
+
+        row = conn.execute("SELECT iDRAC_details FROM servers WHERE Hostname = ?", (hostname,)).fetchone()
+        previous_snapshot = json.loads(row[0]) if row and row[0] else {}
+        merged = {key: {**previous_snapshot.get(key, {}), **details.get(key, {})} for key in ("section_timestamps", "section_hashes")}
+        snapshot = {**previous_snapshot, **details, **merged}
+        summary = summarize_snapshot(snapshot)
+        if any(section in details for section in history.HISTORY_SECTIONS):
+            history.append(conn, hostname, time.time(), previous_snapshot, snapshot)
+        # The crawl used the currently resolved address; record it in case DNS moved the host
+        conn.execute(
+            "UPDATE servers SET iDRAC_details = ?, iDRAC_summary = ?, iDRAC_IP = COALESCE(?, iDRAC_IP) WHERE Hostname = ?",
+            (json.dumps(snapshot), json.dumps(summary), details.get("idrac_ip"), hostname)
+        )
+    return snapshot, summary, previous_summary
+
+@QUERY_SECONDS.time("get_snapshot_at")
+def get_snapshot_at(hostname: str, timestamp: float):
+    """Reconstructs a server's inventory sections as of a unix time. Returns (recorded at, sections)."""
+    with transaction() as conn:
+        return history.state_at(conn, hostname, timestamp)
+
+@QUERY_SECONDS.time("get_snapshot_changes")
+def get_snapshot_changes(hostname: str, start: float, end: float, sections=None):
+    """Lists inventory changes recorded for a server between two unix times."""
+    with transaction() as conn:
+        return history.changes(conn, hostname, start, end, sections)
+
+@QUERY_SECONDS.time("prune_snapshot_history")
+def prune_snapshot_history(retention_days: float):
+    """Deletes snapshot history older than the retention period."""
+    with transaction() as conn:
+        history.prune(conn, time.time() - retention_days * 86400)
+
+@QUERY_SECONDS.time("update_server_ips")
+def update_server_ips(addresses: dict):
+    """Writes freshly resolved {hostname: ip} addresses back to iDRAC_IP. Returns the number of rows changed."""
+    with transaction() as conn:
+        cursor = conn.executemany(
+            "UPDATE servers SET iDRAC_IP = ? WHERE Hostname = ? AND iDRAC_IP IS NOT ?",
+            [(ip, hostname, ip) for hostname, ip in addresses.items() if ip]
+        )
+        return cursor.rowcount
+
+@QUERY_SECONDS.time("get_server_summaries")
+def get_server_summaries(datacenter: str | None, cabinet: str | None, health: str | None, limit: int, offset: int):
+    """Retrieves one page of compact per-server status records and the total number matching the filters."""
+    conditions, params = [], []
+    if datacenter:
+        conditions.append("DataCenterID = ?")
+        params.append(datacenter)
+    if cabinet:
+        conditions.append("Cabinet = ?")
+        params.append(cabinet)
+    if health:
+        if health.lower() == "unknown":
+            conditions.append("json_extract(iDRAC_summary, '$.health') IS NULL")
+        else:
+            conditions.append("json_extract(iDRAC_summary, '$.health') = ? COLLATE NOCASE")
+            params.append(health)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    conn = get_connection()
+    total = conn.execute(f"SELECT COUNT(*) FROM servers {where}", params).fetchone()[0]
+    rows = conn.execute(
+        f"""SELECT Hostname, iDRAC_IP, DataCenterID, Cabinet, Position, iDRAC_summary FROM servers {where}
+            ORDER BY DataCenterID, Cabinet, Position, Hostname LIMIT ? OFFSET ?""",
+        params + [limit, offset]
+    ).fetchall()
     servers = [
-        {"DataCenterID": row[0], "Cabinet": row[1], "Position": row[2], "Label": row[3], "iDRAC_IP": row[4]}
-        for row in cursor.fetchall()
+        {
+            "hostname": row[0], "ip": row[1], "DataCenterID": row[2], "Cabinet": row[3], "Position": row[4],
+            **(json.loads(row[5]) if row[5] else summarize_snapshot({})),
+        }
+        for row in rows
+    ]
+    return total, servers
+
+@QUERY_SECONDS.time("import_servers")
+def import_servers(rows: list[dict], on_conflict: str = "skip"):
+    """Inserts many server rows with executemany in a single transaction.
+
+    on_conflict decides what happens to hostnames that already exist: "skip" leaves them,
+    "update" overwrites the inventory fields each row has (columns a row leaves out are kept,
+    as is polled data unless the row has its own), and "fail" writes nothing at all if any
+    exist. Returns each hostname's outcome: inserted, updated, skipped, conflict or not_imported.
+    """
+    if not rows:
+        return {}
+    hostnames = [row["Hostname"] for row in rows]
+    # Rows may carry different columns (e.g. JSON records with fields left out); one statement per set
+    groups: dict[tuple, list] = {}
+    for row in rows:
+        columns = tuple(row.keys())
+        groups.setdefault(columns, []).append(
+            [json.dumps(row[c]) if c == "iDRAC_details" and row[c] is not None else row[c] for c in columns]
+        )
+
+    with transaction(immediate=True) as conn:
+        existing = set()
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(hostnames), 500):
+            chunk = hostnames[i:i + 500]
+            existing.update(row[0] for row in conn.execute(
+                f"SELECT Hostname FROM servers WHERE Hostname IN ({', '.join(['?'] * len(chunk))})", chunk
+            ))
+        if on_conflict == "fail" and existing:
+            return {hostname: "conflict" if hostname in existing else "not_imported" for hostname in hostnames}
+
+        for columns, values in groups.items():
+            insert = f"INSERT INTO servers ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))}) ON CONFLICT(Hostname) "
+            if on_conflict == "update":
+                assignments = [
+                    f"{c} = COALESCE(excluded.{c}, {c})" if c == "iDRAC_details" else f"{c} = excluded.{c}"
+                    for c in columns if c != "Hostname"
+                ]
+                insert += "DO UPDATE SET " + ", ".join(assignments)
+            else:
+                insert += "DO NOTHING"
+            conn.executemany(insert, values)
+
+    existing_outcome = "updated" if on_conflict == "update" else "skipped"
+    return {hostname: existing_outcome if hostname in existing else "inserted" for hostname in hostnames}
+
+@QUERY_SECONDS.time("worker_heartbeat")
+def worker_heartbeat(worker_id: str, node: str, pid: int, now: float, timeout: float):
+    """Records a worker's heartbeat, forgets workers silent for longer than timeout and lists the live ones."""
+    with transaction(immediate=True) as conn:
+        conn.execute(
+            """INSERT INTO poll_workers (worker_id, node, pid, started_at, heartbeat_at) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at""",
+            (worker_id, node, pid, now, now)
+        )
+        conn.execute("DELETE FROM poll_workers WHERE heartbeat_at < ?", (now - timeout,))
+        return [row[0] for row in conn.execute("SELECT worker_id FROM poll_workers ORDER BY worker_id")]
+
+@QUERY_SECONDS.time("claim_hosts")
+def claim_hosts(worker_id: str, hosts: list, now: float, lease_expires: float) -> set:
+    """Sets the hosts a worker wants to poll and returns those it now holds the lease on.
+
+    Leases on hosts no longer wanted are released. Wanted hosts are taken over only once
+    they are free: released by their previous worker or with an expired lease, so two
+    workers never poll the same host while the fleet is being rebalanced.
+    """
+    wanted = json.dumps(hosts)
+    with transaction(immediate=True) as conn:
+        conn.execute(
+            "DELETE FROM poll_assignments WHERE worker_id = ? AND host NOT IN (SELECT value FROM json_each(?))",
+            (worker_id, wanted)
+        )
+        conn.execute(
+            """INSERT INTO poll_assignments (host, worker_id, lease_expires)
+               SELECT value, ?, ? FROM json_each(?) WHERE true
+               ON CONFLICT(host) DO UPDATE SET worker_id = excluded.worker_id, lease_expires = excluded.lease_expires
+               WHERE poll_assignments.worker_id = excluded.worker_id OR poll_assignments.lease_expires < ?""",
+            (worker_id, lease_expires, wanted, now)
+        )
+        return {row[0] for row in conn.execute("SELECT host FROM poll_assignments WHERE worker_id = ?", (worker_id,))}
+
+@QUERY_SECONDS.time("release_worker")
+def release_worker(worker_id: str):
+    """Drops a stopping worker and its leases, so the others take its hosts at their next heartbeat."""
+    with transaction(immediate=True) as conn:
+        conn.execute("DELETE FROM poll_assignments WHERE worker_id = ?", (worker_id,))
+        conn.execute("DELETE FROM poll_workers WHERE worker_id = ?", (worker_id,))
+
+@QUERY_SECONDS.time("get_poll_workers")
+def get_poll_workers(now: float):
+    """Live polling workers with their leased host counts, and the number of servers no worker holds."""
+    conn = get_connection()
+    rows = conn.execute(
+        """SELECT w.worker_id, w.node, w.pid, w.started_at, w.heartbeat_at,
+                  (SELECT COUNT(*) FROM poll_assignments AS a WHERE a.worker_id = w.worker_id AND a.lease_expires >= ?)
+           FROM poll_workers AS w ORDER BY w.worker_id""",
+        (now,)
+    ).fetchall()
+    unassigned = conn.execute(
+        """SELECT COUNT(*) FROM servers WHERE Hostname NOT IN (
+               SELECT host FROM poll_assignments WHERE lease_expires >= ?
+           )""",
+        (now,)
+    ).fetchone()[0]
+    workers = [
+        {"worker_id": row[0], "node": row[1], "pid": row[2], "started_at": row[3],
+         "heartbeat_age": round(now - row[4], 1), "hosts": row[5]}
+        for row in rows
     ]
-    conn.close()
-    return servers
+    return workers, unassigned
@@ -1,8 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import servers
+from app import database
+from app.config import POLLER_ENABLED, EVENTS_ENABLED
+from app.routes import events, exporter, metrics, servers
+from app.services.idrac_client import close_pools, close_sessions
+from app.services.events import refresher, subscriptions
+from app.services.monitor import poller
 
-app = FastAPI(title="Dell iDRAC Monitoring API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    database.init_db()
+    if POLLER_ENABLED:
+        await poller.start()
+    if EVENTS_ENABLED:
+        subscriptions.start()
+    yield
+    await subscriptions.stop()
+    await refresher.stop()
+    await poller.stop()
+    # Log out of the Redfish sessions so they don't linger against each iDRAC's session limit
+    await close_sessions()
+    # Drop the pooled keep-alive connections to every iDRAC
+    await close_pools()
+    database.close_connections()
+
+app = FastAPI(title="Dell iDRAC Monitoring API", lifespan=lifespan)
 
 # Define the origins (domains) that are allowed to make requests
 origins = [
@@ -21,6 +44,9 @@ app.add_middleware(
 
 # Include server routes
 app.include_router(servers.router)
+app.include_router(metrics.router)
+app.include_router(exporter.router)
+app.include_router(events.router)
 
 @app.get("/")
 def root():
@@ -0,0 +1,44 @@
+import asyncio
+import hmac
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from app.config import EVENTS_ENABLED, EVENT_TOKEN
+from app import database
+from app.services.events import EVENTS_RECEIVED, payload_sections, refresher
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+@router.post("/redfish")
+async def receive_redfish_event(request: Request, token: str = ""):
+    """Receiver for Redfish EventService pushes (alerts and metric reports).
+
+    The sending iDRAC is identified by the subscription Context, which holds its hostname,
+    or else by the source address. The sections the events affect are refreshed shortly after.
+    Only accepted with EVENTS_ENABLED and the shared EVENT_TOKEN.
+    """
+    if not EVENTS_ENABLED:
+        raise HTTPException(status_code=404, detail="The Redfish event receiver is disabled")
+    if not EVENT_TOKEN:
+        raise HTTPException(status_code=403, detail="EVENT_TOKEN is not configured; refusing events")
+    if not hmac.compare_digest(token, EVENT_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid event token")
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Event body is not JSON")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Event body is not a JSON object")
+
+    hostname = payload.get("Context")
+    if not hostname or not await asyncio.to_thread(database.server_exists, hostname):
+        source = request.client.host if request.client else None
+        hostname = await asyncio.to_thread(database.get_hostname_by_ip, source) if source else None
+    if not hostname:
+        raise HTTPException(status_code=404, detail="Event from an unknown iDRAC")
+
+    event_format, sections = payload_sections(payload)
+    for section in sections:
+        EVENTS_RECEIVED.inc(event_format, section)
+    if sections:
+        refresher.request(hostname, sections)
+    return Response(status_code=204)
@@ -0,0 +1,148 @@
+import asyncio
+from datetime import datetime, timezone
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from app import database
+from app.services.cache import details_cache
+from app.services.summary import HEALTH_RANK
+from app.utils import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+EXPORTED_SECTIONS = ("system", "thermals_and_power", "storage")
+
+# Lines per chunk written to the scraper
+CHUNK_LINES = 2000
+
+def _location_labels(server: dict) -> str:
+    return ",".join(
+        f'{label}="{metrics.escape_label_value(server[field] or "")}"'
+        for label, field in (("datacenter_id", "DataCenterID"), ("cabinet", "Cabinet"), ("position", "Position"), ("hostname", "hostname"))
+    )
+
+def _health_value(status) -> int | None:
+    return HEALTH_RANK.get((status or {}).get("Health"))
+
+def _system_health(sections):
+    value = HEALTH_RANK.get((sections.get("system") or {}).get("health"))
+    if value is not None:
+        yield "", value
+
+def _power_on(sections):
+    state = (sections.get("system") or {}).get("power_state")
+    if state:
+        yield "", int(state == "On")
+
+def _temperatures(sections):
+    for sensor in (sections.get("thermals_and_power") or {}).get("temperature_sensors", []):
+        if sensor.get("ReadingCelsius") is not None:
+            yield f'sensor="{metrics.escape_label_value(sensor.get("Name"))}"', sensor["ReadingCelsius"]
+
+def _fan_speeds(sections):
+    for fan in (sections.get("thermals_and_power") or {}).get("fans", []):
+        reading = fan.get("Reading", fan.get("ReadingRPM"))
+        if reading is not None:
+            yield f'fan="{metrics.escape_label_value(fan.get("Name"))}"', reading
+
+def _psu_field(field):
+    def samples(sections):
+        for psu in (sections.get("thermals_and_power") or {}).get("power_supplies", []):
+            value = _health_value(psu.get("Status")) if field == "health" else psu.get(field)
+            if value is not None:
+                yield f'psu="{metrics.escape_label_value(psu.get("Name") or psu.get("MemberId"))}"', value
+    return samples
+
+def _drive_health(sections):
+    for drive in (sections.get("storage") or {}).get("drives", []):
+        value = _health_value(drive.get("Status"))
+        if value is not None:
+            yield f'drive="{metrics.escape_label_value(drive.get("Name") or drive.get("Id"))}"', value
+
+def _collected_at(sections):
+    collected_at = sections["section_timestamps"].get("thermals_and_power")
+    if collected_at:
+        yield "", datetime.fromisoformat(collected_at).replace(tzinfo=timezone.utc).timestamp()
+
+HEALTH_HELP = "(0 OK, 1 Warning, 2 Critical)"
+
+# (name, type, help, function yielding (extra labels, value) for one host's sections)
+FAMILIES = (
+    ("idrac_system_health", "gauge", f"Overall system health {HEALTH_HELP}", _system_health),
+    ("idrac_power_on", "gauge", "1 if the server is powered on", _power_on),
+    ("idrac_temperature_celsius", "gauge", "Temperature sensor reading", _temperatures),
+    ("idrac_fan_speed_rpm", "gauge", "Fan speed reading", _fan_speeds),
+    ("idrac_psu_health", "gauge", f"Power supply health {HEALTH_HELP}", _psu_field("health")),
+    ("idrac_psu_input_watts", "gauge", "Power supply input power", _psu_field("PowerInputWatts")),
+    ("idrac_psu_output_watts", "gauge", "Power supply output power", _psu_field("LastPowerOutputWatts")),
+    ("idrac_drive_health", "gauge", f"Physical drive health {HEALTH_HELP}", _drive_health),
+    ("idrac_sensor_data_timestamp_seconds", "gauge", "When the sensor readings above were collected", _collected_at),
+)
+
+async def collect_fleet_sections():
+    """Pairs every server with the exported sections of its last snapshot.
+
+    Sections come from the details cache while younger than its TTL; the rest are read from
+    SQLite in one batched query and cached for the next scrape. The database is the source of
+    truth when another process (an app.worker) does the polling. Returns [(location labels, sections)].
+    """
+    servers = await asyncio.to_thread(database.get_server_inventory)
+    hosts, missing = [], []
+    for server in servers:
+        sections = {"section_timestamps": {}}
+        for section in EXPORTED_SECTIONS:
+            entry = details_cache.peek((server["ip"], section), max_age=details_cache.ttl) if server["ip"] else None
+            if entry is None:
+                missing.append(server)
+                break
+            sections[section] = entry["data"]
+            sections["section_timestamps"][section] = entry["collected_at"]
+        else:
+            hosts.append((_location_labels(server), sections))
+
+    if missing:
+        stored = await asyncio.to_thread(
+            database.get_snapshot_sections, [server["hostname"] for server in missing], EXPORTED_SECTIONS
+        )
+        for server in missing:
+            sections = stored.get(server["hostname"])
+            if sections is None:
+                continue
+            sections.setdefault("section_timestamps", {})
+            if server["ip"]:
+                for section in EXPORTED_SECTIONS:
+                    if section in sections:
+                        details_cache.set((server["ip"], section), {
+                            "data": sections[section], "collected_at": sections["section_timestamps"].get(section),
+                        })
+            hosts.append((_location_labels(server), sections))
+    return hosts
+
+def render_fleet(hosts, openmetrics: bool):
+    """Yields the exposition text a chunk at a time, one metric family after another."""
+    lines = []
+    for name, kind, help, samples in FAMILIES:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        for labels, sections in hosts:
+            for extra, value in samples(sections):
+                lines.append(f"{name}{{{labels},{extra}}} {metrics.format_value(value)}" if extra
+                             else f"{name}{{{labels}}} {metrics.format_value(value)}")
+            if len(lines) >= CHUNK_LINES:
+                yield "\n".join(lines) + "\n"
+                lines = []
+    if openmetrics:
+        lines.append("# EOF")
+    yield "\n".join(lines) + "\n"
+
+@router.get("/metrics/fleet")
+async def get_fleet_metrics(request: Request):
+    """Latest polled sensor and health readings of every server, for Prometheus to scrape.
+
+    Served from the stored snapshots, never by polling iDRACs, and streamed so the response
+    for a large fleet is never held in memory as a whole.
+    """
+    openmetrics = metrics.wants_openmetrics(request.headers.get("accept"))
+    hosts = await collect_fleet_sections()
+    return StreamingResponse(
+        render_fleet(hosts, openmetrics),
+        media_type=metrics.OPENMETRICS_CONTENT_TYPE if openmetrics else metrics.PROMETHEUS_CONTENT_TYPE,
+    )
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+from app.services.broadcast import status_changes
+from app.services.cache import details_cache
+from app.services.host_health import breaker_states
+from app.services.idrac_client import etag_stats
+from app.services.monitor import poller
+from app.services.resolver import resolver
+from app.utils import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+# Values the services already keep are read at scrape time rather than mirrored
+metrics.Counter(
+    "idrac_monitor_details_cache_events", "Server details cache lookups and evictions", ("event",),
+    callback=lambda: {(event,): value for event, value in details_cache.stats().items() if event not in ("size", "inflight")},
+)
+metrics.Gauge(
+    "idrac_monitor_details_cache_entries", "Sections held in the server details cache",
+    callback=lambda: {(): details_cache.stats()["size"]},
+)
+metrics.Counter(
+    "idrac_monitor_dns_events", "DNS cache lookups, hits and failures", ("event",),
+    callback=lambda: {(event,): value for event, value in resolver.stats().items() if isinstance(value, int) and "entries" not in event},
+)
+metrics.Counter(
+    "idrac_monitor_redfish_conditional_gets", "Redfish GETs answered 304 (not_modified) or with a new body (modified)", ("result",),
+    callback=lambda: {(result,): etag_stats()[result] for result in ("not_modified", "modified")},
+)
+metrics.Gauge(
+    "idrac_monitor_circuit_breakers", "iDRACs in each circuit breaker state", ("state",),
+    callback=lambda: {(state,): count for state, count in breaker_states().items()},
+)
+metrics.Gauge(
+    "idrac_monitor_poller", "Background poller hosts, scheduled sections, queued crawls and workers", ("item",),
+    callback=lambda: {(item,): value for item, value in poller.stats().items()},
+)
+metrics.Gauge(
+    "idrac_monitor_stream_subscribers", "Clients connected to /servers/events and /servers/stream",
+    callback=lambda: {(): status_changes.subscriber_count},
+)
+
+@router.get("/metrics")
+def get_metrics(request: Request):
+    """Prometheus exposition of the API's own metrics; OpenMetrics if the scraper asks for it."""
+    openmetrics = metrics.wants_openmetrics(request.headers.get("accept"))
+    return Response(
+        metrics.render(openmetrics),
+        media_type=metrics.OPENMETRICS_CONTENT_TYPE if openmetrics else metrics.PROMETHEUS_CONTENT_TYPE,
+    )
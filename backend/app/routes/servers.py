@@ -1,213 +1,407 @@
+import asyncio
+import hashlib
 import sqlite3
 import os
-import socket
 import json
 import sys
-from fastapi import APIRouter, HTTPException
-from app.services.idrac_client import IdracClient
-from pydantic import BaseModel
-
-# Corrected the path to find the database file in the parent directory
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-# The database file is in the parent directory 'app'
-DB_FILE = os.path.join(BASE_DIR, ".", "servers.db")
+import time
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from app.config import DATABASE_FILE, STREAM_KEEPALIVE_INTERVAL
+from app import database
+from app.services import monitor
+from app.services.broadcast import status_changes
+from app.services.cache import details_cache
+from app.services import importer
+from app.services.host_health import host_health_snapshot, host_reachability
+from app.services.idrac_client import SECTIONS, etag_stats
+from app.services.resolver import resolver
+from app.services.summary import worst_health
+from app.services.timeseries import timeseries
+from app.schemas import ServerData
 
 router = APIRouter(prefix="/servers", tags=["Servers"])
 
-# TODO: move to DB or .env later
-IDRAC_USERNAME = "root"
-IDRAC_PASSWORD = "calvin"
-
-class ServerData(BaseModel):
-    DataCenterID: str
-    Cabinet: str
-    Position: str
-    Label: str | None = None
-    Height: int | None = None
-    Manufacturer: str | None = None
-    Model: str | None = None
-    Hostname: str
-    SerialNo: str | None = None
-    AssetTag: str | None = None
-    Hypervisor: str | None = None
-    BackSide: str | None = None
-    HalfDepth: str | None = None
-    Status: str | None = None
-    Owner: str | None = None
-    InstallDate: str | None = None
-    PrimaryContact: str | None = None
-    CustomTags: str | None = None
-    iDRAC_details: dict | None = None
-
-def init_db():
-    """Initializes the SQLite database and creates the 'servers' table."""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS servers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                DataCenterID TEXT NOT NULL,
-                Cabinet TEXT NOT NULL,
-                Position TEXT NOT NULL,
-                Label TEXT,
-                Height INTEGER,
-                Manufacturer TEXT,
-                Model TEXT,
-                Hostname TEXT NOT NULL UNIQUE,
-                SerialNo TEXT,
-                AssetTag TEXT,
-                Hypervisor TEXT,
-                BackSide TEXT,
-                HalfDepth TEXT,
-                Status TEXT,
-                Owner TEXT,
-                InstallDate TEXT,
-                PrimaryContact TEXT,
-                CustomTags TEXT,
-                iDRAC_IP TEXT,
-                iDRAC_details JSON
-            )
-        """)
-        conn.commit()
-    except sqlite3.Error as e:
-        print(f"Database error: {e}")
-    finally:
-        if conn:
-            conn.close()
-
-def get_all_servers_for_sidebar():
-    """Retrieves all servers for the sidebar dropdown."""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        # Updated query to include Hostname
-        cursor.execute("SELECT DataCenterID, Cabinet, Position, Label, Hostname, iDRAC_IP FROM servers")
-        servers = [
-            {"DataCenterID": row[0], "Cabinet": row[1], "Position": row[2], "Label": row[3], "Hostname": row[4], "iDRAC_IP": row[5]}
-            for row in cursor.fetchall()
-        ]
-        return servers
-    except sqlite3.Error as e:
-        print(f"Database error: {e}")
-        return []
-    finally:
-        if conn:
-            conn.close()
-
-def get_all_servers():
-    """Retrieves all server hostnames and IPs from the database."""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("SELECT Hostname, iDRAC_IP FROM servers")
-        return [{"hostname": row[0], "ip": row[1]} for row in cursor.fetchall()]
-    except sqlite3.Error as e:
-        print(f"Database error: {e}")
-        return []
-    finally:
-        if conn:
-            conn.close()
-
-def nslookup_hostname(hostname: str):
-    """Performs a DNS lookup to get the IP address for a given hostname."""
-    try:
-        ip_address = socket.gethostbyname(hostname)
-        return ip_address
-    except socket.gaierror:
-        return None
-
-# Initialize the database when the application starts
-init_db()
+def etag_response(request: Request, payload: dict):
+    """Returns payload as JSON with an ETag, or an empty 304 if the client's If-None-Match already matches it."""
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+    # no-cache: browsers and proxies may store the response but must revalidate it each time
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 @router.get("/")
 def list_servers():
     """List all available server IPs from the database."""
-    return {"servers": get_all_servers()}
+    return {"servers": database.get_all_servers()}
 
 @router.get("/check-db-status")
 def check_db_status():
     """Checks the status of the servers.db database."""
-    if not os.path.exists(DB_FILE):
+    if not os.path.exists(DATABASE_FILE):
         raise HTTPException(
             status_code=500,
-            detail=f"The servers.db file was not found at the expected path: {DB_FILE}"
+            detail=f"The servers.db file was not found at the expected path: {DATABASE_FILE}"
         )
     
-    server_list = get_all_servers()
+    server_list = database.get_all_servers()
     
     return {
         "status": "success",
-        "message": f"Database '{DB_FILE}' was found and contains {len(server_list)} IP addresses.",
+        "message": f"Database '{DATABASE_FILE}' was found and contains {len(server_list)} IP addresses.",
         "servers": server_list
     }
     
 @router.get("/sidebar")
-def list_servers_for_sidebar():
+def list_servers_for_sidebar(request: Request):
     """List servers for the sidebar dropdown."""
-    servers = get_all_servers_for_sidebar()
-    return {"servers": servers}
+    servers = database.get_all_servers_for_sidebar()
+    return etag_response(request, {"servers": servers})
+
+@router.get("/tree")
+def get_server_tree(
+    request: Request,
+    datacenter: str | None = None,
+    cabinet: str | None = None,
+    limit: int = Query(200, ge=1, le=5000),
+    offset: int = Query(0, ge=0),
+):
+    """One level of the DataCenter -> Cabinet -> server tree, for lazily expanding sidebars.
+
+    Without parameters this lists datacenters; with ?datacenter= its cabinets; with both
+    ?datacenter= and ?cabinet= the servers in that cabinet. Datacenter and cabinet nodes
+    carry a server count and counts by health, so collapsed nodes can show a rollup.
+    """
+    if cabinet and not datacenter:
+        raise HTTPException(status_code=400, detail="'cabinet' requires 'datacenter'")
+    try:
+        if cabinet:
+            servers = database.get_cabinet_servers(datacenter, cabinet)
+            total, nodes = len(servers), servers[offset:offset + limit]
+            for node in nodes:
+                node["reachable"] = host_health_snapshot(node["ip"])["reachable"]
+        else:
+            total, nodes = database.get_tree_nodes(datacenter, limit, offset)
+            for node in nodes:
+                node["worst_health"] = worst_health(health for health, count in node["health"].items() if count)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    level = "server" if cabinet else "cabinet" if datacenter else "datacenter"
+    return etag_response(request, {
+        "status": "success", "level": level, "datacenter": datacenter, "cabinet": cabinet,
+        "total": total, "limit": limit, "offset": offset, "nodes": nodes,
+    })
+
+@router.get("/search")
+def search_servers(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """Prefix search over hostname, label, serial number, asset tag, custom tags and owner.
+
+    Every word in ?q= must match the start of a word in one of those fields, so
+    "r750 acme" finds r750-01.example.com owned by ACME. Best matches come first.
+    """
+    try:
+        total, servers = database.search_servers(q, limit, offset)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    return etag_response(request, {"status": "success", "query": q, "total": total, "limit": limit, "offset": offset, "servers": servers})
+
+@router.get("/summary")
+def list_server_summaries(
+    request: Request,
+    datacenter: str | None = None,
+    cabinet: str | None = None,
+    health: str | None = None,
+    limit: int = Query(500, ge=1, le=5000),
+    offset: int = Query(0, ge=0),
+):
+    """Compact health / power / temperature / PSU status for many servers in one response.
+
+    Filter with ?datacenter=, ?cabinet= and ?health= (OK, Warning, Critical or unknown);
+    page with ?limit= and ?offset=. Responses carry an ETag; send it back in If-None-Match
+    to get an empty 304 when nothing changed.
+    """
+    try:
+        total, servers = database.get_server_summaries(datacenter, cabinet, health, limit, offset)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    for server in servers:
+        server["reachability"] = host_reachability(server["ip"])
+    return etag_response(request, {"status": "success", "total": total, "limit": limit, "offset": offset, "servers": servers})
 
 @router.post("/add-server")
-def add_server(server: ServerData):
+async def add_server(server: ServerData):
     """Adds a new server to the database, performing a DNS lookup to get its IP."""
-    # Perform DNS lookup for the iDRAC IP
-    idrac_ip = nslookup_hostname(server.Hostname)
+    # Perform DNS lookup for the iDRAC IP, not reusing a failure cached before the record was fixed
+    resolver.invalidate(server.Hostname)
+    idrac_ip = await resolver.resolve(server.Hostname)
     if not idrac_ip:
         raise HTTPException(status_code=400, detail=f"Could not resolve IP for hostname: {server.Hostname}")
 
-    conn = None
+    # Prepare data for insertion, including the resolved IP
+    data = server.model_dump()
+    data['iDRAC_IP'] = idrac_ip
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # Prepare data for insertion, including the resolved IP
-        data = server.model_dump()
-        data['iDRAC_IP'] = idrac_ip
-        
-        # Convert iDRAC_details to JSON string
-        if 'iDRAC_details' in data and data['iDRAC_details'] is not None:
-            data['iDRAC_details'] = json.dumps(data['iDRAC_details'])
-
-        # Prepare and execute the insert statement
-        columns = ", ".join(data.keys())
-        placeholders = ", ".join(["?"] * len(data))
-        cursor.execute(f"INSERT INTO servers ({columns}) VALUES ({placeholders})", list(data.values()))
-        conn.commit()
+        await asyncio.to_thread(database.add_server, data)
         return {"status": "success", "message": f"Server '{server.Hostname}' added with IP '{idrac_ip}'."}
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=409, detail=f"A server with hostname '{server.Hostname}' already exists.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if conn:
-            conn.close()
 
-@router.get("/{ip}")
-def get_server_details(ip: str):
-    """Retrieves details for a specific server IP."""
-    conn = None
+@router.post("/import")
+async def import_servers(request: Request, on_conflict: str = Query("skip", pattern="^(skip|update|fail)$")):
+    """Adds many servers at once from a JSON list of ServerData records or a CSV file (Content-Type: text/csv).
+
+    Hostnames are resolved concurrently and all rows are written in one transaction.
+    ?on_conflict= decides what happens to hostnames that already exist: skip, update, or
+    fail (nothing is imported). The response reports the outcome of every row.
+    """
+    body = await request.body()
+    try:
+        if "csv" in request.headers.get("content-type", ""):
+            records = importer.parse_csv(body.decode("utf-8-sig"))
+        else:
+            payload = json.loads(body)
+            records = payload.get("servers") if isinstance(payload, dict) else payload
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse import body: {e}")
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise HTTPException(status_code=400, detail="Expected a list of server records")
+
+    try:
+        report = await importer.import_servers(records, on_conflict)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    if report["counts"].get("conflict"):
+        raise HTTPException(status_code=409, detail=report)
+    return {"status": "success", **report}
+
+def parse_sections(sections: str | None):
+    """Parses a comma-separated ?sections= value, defaulting to every section."""
+    if not sections:
+        return list(SECTIONS)
+    requested = [section.strip() for section in sections.split(",") if section.strip()]
+    unknown = [section for section in requested if section not in SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown section(s): {', '.join(unknown)}. Valid sections: {', '.join(SECTIONS)}"
+        )
+    return requested
+
+async def load_section(ip: str, hostname: str, section: str):
+    """Cache loader: reads a section from the stored snapshot, crawling it live only if it was never polled."""
+    server = await asyncio.to_thread(database.get_server_by_ip, ip)
+    details = (server or {}).get("details") or {}
+    if section in details:
+        # The whole snapshot was parsed anyway; keep its other sections too
+        monitor.cache_sections(ip, details, overwrite=False)
+        return monitor.section_entry(details, section)
+    details = await monitor.poll_host(hostname, [section])
+    return monitor.section_entry(details, section)
+
+async def refresh_section(hostname: str, section: str):
+    """Cache loader for ?refresh=true: always crawls the iDRAC."""
+    details = await monitor.poll_host(hostname, [section])
+    return monitor.section_entry(details, section)
+
+@router.get("/workers")
+def list_poll_workers():
+    """Sharded polling workers (python -m app.worker) that are alive, with how many hosts each holds."""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        cursor.execute("SELECT Hostname, iDRAC_IP FROM servers WHERE iDRAC_IP = ?", (ip,))
-        row = cursor.fetchone()
-        
-        if not row:
+        workers, unassigned = database.get_poll_workers(time.time())
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    return {"status": "success", "workers": workers, "unassigned_hosts": unassigned}
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Counters for the server details cache, the DNS resolver cache and Redfish conditional GETs."""
+    return {"status": "success", "cache": details_cache.stats(), "dns": resolver.stats(), "redfish_etags": etag_stats()}
+
+async def collect_server_details(ip: str, hostname: str, requested: list, refresh: bool = False):
+    """Assembles the requested sections of one server through the details cache."""
+    if refresh:
+        entries = await asyncio.gather(
+            *(details_cache.refresh((ip, section), lambda section=section: refresh_section(hostname, section)) for section in requested)
+        )
+    else:
+        entries = await asyncio.gather(
+            *(details_cache.get((ip, section), lambda section=section: load_section(ip, hostname, section)) for section in requested)
+        )
+
+    section_timestamps = {section: entry["collected_at"] for section, entry in zip(requested, entries)}
+    data = {
+        "idrac_ip": ip,
+        "timestamp": max((ts for ts in section_timestamps.values() if ts), default=None),
+        "section_timestamps": section_timestamps,
+    }
+    data.update({section: entry["data"] for section, entry in zip(requested, entries)})
+    return data
+
+def stream_message(event: str, payload: dict, format: str):
+    """Encodes one message as an NDJSON line or a Server-Sent Event."""
+    if format == "sse":
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps(payload) + "\n"
+
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+@router.get("/stream")
+async def stream_server_details(
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    sections: str | None = None,
+    refresh: bool = False,
+):
+    """Streams every server's details as soon as each one is ready, as NDJSON or Server-Sent Events.
+
+    One slow iDRAC no longer holds up the others; a final "end" message carries the count.
+    """
+    requested = parse_sections(sections)
+    try:
+        servers = await asyncio.to_thread(database.get_all_servers)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+    async def fetch(server):
+        try:
+            data = await collect_server_details(server["ip"], server["hostname"], requested, refresh)
+            return {"ip": server["ip"], "status": "success", "data": data, "reachability": host_health_snapshot(server["ip"])}
+        except Exception as e:
+            return {"ip": server["ip"], "status": "error", "message": str(e), "reachability": host_health_snapshot(server["ip"])}
+
+    async def generate():
+        tasks = [asyncio.create_task(fetch(server)) for server in servers]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield stream_message("server", await next_done, format)
+            yield stream_message("end", {"count": len(tasks)}, format)
+        finally:
+            # The client went away: stop fetching for it
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(generate(), media_type=STREAM_MEDIA_TYPES[format])
+
+@router.get("/events")
+async def stream_status_changes(format: str = Query("sse", pattern="^(ndjson|sse)$")):
+    """Pushes health and power-state changes as the poller sees them, as SSE or NDJSON."""
+
+    async def generate():
+        with status_changes.subscribe() as queue:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n" if format == "sse" else "\n"
+                    continue
+                yield stream_message("status", event, format)
+
+    return StreamingResponse(generate(), media_type=STREAM_MEDIA_TYPES[format])
+
+@router.get("/{ip}/metrics")
+async def get_server_metrics(
+    ip: str,
+    metric: str | None = None,
+    start: float | None = Query(None, alias="from"),
+    end: float | None = Query(None, alias="to"),
+    step: int | None = Query(None, ge=1),
+):
+    """Sensor history for a server: temperature:<sensor>, fan_rpm:<fan> or psu_input_watts:<psu>.
+
+    from/to are unix timestamps (default: the last hour) and step is seconds per point
+    (default: about 500 points). Without ?metric= the available metric names are listed.
+    """
+    try:
+        hostname = await asyncio.to_thread(database.get_hostname_by_ip, ip)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    if not hostname:
+        raise HTTPException(status_code=404, detail="Server IP not found in database")
+
+    if metric is None:
+        return {"status": "success", "metrics": await asyncio.to_thread(timeseries.metrics, hostname)}
+
+    end = end or time.time()
+    start = start or end - 3600
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be earlier than 'to'")
+    step = step or max(1, int((end - start) / 500))
+    try:
+        result = await asyncio.to_thread(timeseries.query, hostname, metric, start, end, step)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    return {"status": "success", "metric": metric, "from": start, "to": end, "step": step, **result}
+
+@router.get("/{ip}/history")
+async def get_server_history(ip: str, at: float | None = None):
+    """The server's inventory sections (system, hardware, storage, firmware, warranty) as they were at ?at= (unix time, default now)."""
+    try:
+        hostname = await asyncio.to_thread(database.get_hostname_by_ip, ip)
+        if not hostname:
             raise HTTPException(status_code=404, detail="Server IP not found in database")
-        
-        hostname = row[0]
-        
-        client = IdracClient(hostname, IDRAC_USERNAME, IDRAC_PASSWORD)
-        details = client.get_full_details()
-        return {"status": "success", "data": details}
+        recorded_at, sections = await asyncio.to_thread(database.get_snapshot_at, hostname, at or time.time())
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    if sections is None:
+        raise HTTPException(status_code=404, detail="No history recorded for this server at that time")
+    return {"status": "success", "at": at, "recorded_at": recorded_at, "data": sections}
+
+@router.get("/{ip}/changes")
+async def get_server_changes(
+    ip: str,
+    start: float | None = Query(None, alias="from"),
+    end: float | None = Query(None, alias="to"),
+    sections: str | None = None,
+):
+    """Change log of a server's inventory and firmware: every field that changed, with old and new values.
+
+    from/to are unix timestamps (default: the last 30 days); ?sections= limits it to e.g. hardware,firmware.
+    """
+    requested = parse_sections(sections) if sections else None
+    end = end or time.time()
+    start = start or end - 30 * 86400
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be earlier than 'to'")
+    try:
+        hostname = await asyncio.to_thread(database.get_hostname_by_ip, ip)
+        if not hostname:
+            raise HTTPException(status_code=404, detail="Server IP not found in database")
+        changes = await asyncio.to_thread(database.get_snapshot_changes, hostname, start, end, requested)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    return {"status": "success", "from": start, "to": end, "changes": changes}
+
+@router.get("/{ip}")
+async def get_server_details(request: Request, ip: str, refresh: bool = False, sections: str | None = None):
+    """Retrieves details for a specific server IP from the cache / latest polled snapshot.
+
+    Pass ?sections=system,thermals_and_power to limit the response to those sections, and
+    ?refresh=true to crawl them live instead (the result is also merged into the snapshot).
+    Concurrent requests for the same server and section share a single load. Supports
+    If-None-Match revalidation like /summary. "reachability" reports the iDRAC's circuit
+    breaker, so an unreachable BMC shows up without waiting for a timeout.
+    """
+    requested = parse_sections(sections)
+    try:
+        hostname = await asyncio.to_thread(database.get_hostname_by_ip, ip)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    if not hostname:
+        raise HTTPException(status_code=404, detail="Server IP not found in database")
+
+    try:
+        data = await collect_server_details(ip, hostname, requested, refresh)
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if conn:
-            conn.close()
+        raise HTTPException(status_code=500, detail={"message": str(e), "reachability": host_health_snapshot(ip)})
+    return etag_response(request, {"status": "success", "data": data, "reachability": host_reachability(ip)})
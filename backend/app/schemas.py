@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+
+class ServerData(BaseModel):
+    DataCenterID: str
+    Cabinet: str
+    Position: str
+    Label: str | None = None
+    Height: int | None = None
+    Manufacturer: str | None = None
+    Model: str | None = None
+    Hostname: str
+    SerialNo: str | None = None
+    AssetTag: str | None = None
+    Hypervisor: str | None = None
+    BackSide: str | None = None
+    HalfDepth: str | None = None
+    Status: str | None = None
+    Owner: str | None = None
+    InstallDate: str | None = None
+    PrimaryContact: str | None = None
+    CustomTags: str | None = None
+    iDRAC_details: dict | None = None
@@ -0,0 +1,37 @@
+import asyncio
+from contextlib import contextmanager
+from app.config import STREAM_SUBSCRIBER_QUEUE_SIZE
+
+class Broadcaster:
+    """Fans events out to any number of subscribers, each with its own bounded queue.
+
+    A subscriber that stops reading loses its oldest events rather than slowing the
+    publisher down.
+    """
+
+    def __init__(self, queue_size: int = STREAM_SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue] = set()
+
+    @contextmanager
+    def subscribe(self):
+        """Yields a queue that receives every event published while the context is open."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+# Health and power-state changes seen by the poller
+status_changes = Broadcaster()
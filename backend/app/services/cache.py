@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from app.config import CACHE_TTL, CACHE_STALE_TTL, CACHE_MAX_ENTRIES
+
+class DetailsCache:
+    """TTL + LRU cache with stale-while-revalidate and single-flight loading.
+
+    Concurrent misses for the same key share one in-flight load, so a burst of
+    dashboard requests costs the iDRAC one crawl instead of one per request.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, stale_ttl: float = CACHE_STALE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._inflight: dict = {}
+        # Forced reloads (refresh()) in flight, kept apart so they never join an ordinary load
+        self._refreshing: dict = {}
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "evictions": 0}
+
+    def set(self, key, value):
+        """Stores a value, evicting the least recently used entries past max_entries."""
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def peek(self, key, max_age: float | None = None):
+        """The cached value for key without loading it or counting a lookup; None if older than max_age."""
+        entry = self._entries.get(key)
+        if entry is None or (max_age is not None and time.monotonic() - entry[1] >= max_age):
+            return None
+        return entry[0]
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    async def _run(self, key, loader, inflight):
+        started = time.monotonic()
+        try:
+            value = await loader()
+            entry = self._entries.get(key)
+            # Don't let a slow load overwrite a value stored (e.g. by a refresh) after it began
+            if entry is None or entry[1] <= started:
+                self.set(key, value)
+            return value
+        finally:
+            inflight.pop(key, None)
+
+    def _start(self, key, loader, inflight=None):
+        inflight = self._inflight if inflight is None else inflight
+        future = asyncio.ensure_future(self._run(key, loader, inflight))
+        inflight[key] = future
+        return future
+
+    async def _load(self, key, loader):
+        """Runs loader once per key at a time; concurrent callers await the same result."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._start(key, loader)
+        else:
+            self._stats["coalesced"] += 1
+        # Shielded so a caller that goes away doesn't cancel the load for everyone else
+        return await asyncio.shield(future)
+
+    def _revalidate(self, key, loader):
+        """Refreshes a stale entry in the background unless a load is already running."""
+        if key in self._inflight:
+            return
+        self._stats["refreshes"] += 1
+        self._start(key, loader).add_done_callback(self._revalidated)
+
+    def _revalidated(self, future: asyncio.Future):
+        if not future.cancelled() and future.exception():
+            logging.error(f"Background cache refresh failed: {future.exception()}")
+
+    async def get(self, key, loader):
+        """Returns the cached value for key, loading it with the async callable on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self._stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._stats["stale_hits"] += 1
+                self._entries.move_to_end(key)
+                self._revalidate(key, loader)
+                return value
+        self._stats["misses"] += 1
+        return await self._load(key, loader)
+
+    async def refresh(self, key, loader):
+        """Reloads key regardless of age with `loader`, joining only a refresh already in flight.
+
+        An ordinary load in flight may just be re-reading stored data, so it is not joined.
+        """
+        future = self._refreshing.get(key)
+        if future is None:
+            future = self._start(key, loader, self._refreshing)
+        else:
+            self._stats["coalesced"] += 1
+        return await asyncio.shield(future)
+
+    def stats(self):
+        return {**self._stats, "size": len(self._entries), "inflight": len(self._inflight) + len(self._refreshing)}
+
+details_cache = DetailsCache()
@@ -0,0 +1,170 @@
+# Redfish EventService push: subscribing every iDRAC to the receiver, and turning the
+# alerts and metric reports they send into targeted refreshes of the affected sections.
+import asyncio
+import logging
+import re
+from app.config import (
+    EVENT_DESTINATION_URL,
+    EVENT_TOKEN,
+    EVENT_FORMATS,
+    EVENT_REFRESH_DELAY,
+    EVENT_SUBSCRIBE_INTERVAL,
+    POLL_WORKERS,
+)
+from app import database
+from app.services import monitor
+from app.services.idrac_client import IdracClient, SECTIONS
+from app.services.resolver import resolver
+from app.utils import metrics
+from app.utils.auth import get_credentials
+
+EVENTS_RECEIVED = metrics.Counter(
+    "idrac_monitor_redfish_events_received", "Events pushed by iDRACs, by format and the section they refreshed",
+    ("format", "section"),
+)
+
+# Section refreshed for each iDRAC message registry category, the letters of a MessageId such as "PSU0003"
+MESSAGE_SECTIONS = {
+    "PSU": "thermals_and_power", "PWR": "thermals_and_power", "TMP": "thermals_and_power",
+    "FAN": "thermals_and_power", "VLT": "thermals_and_power", "AMP": "thermals_and_power",
+    "PDR": "storage", "CTL": "storage", "ENC": "storage", "BAT": "storage", "VDR": "storage", "STOR": "storage",
+    "MEM": "hardware", "CPU": "hardware", "NIC": "hardware", "PCI": "hardware",
+    "SUP": "firmware", "RED": "firmware",
+    "SYS": "system", "BIOS": "system",
+}
+
+# Otherwise the resource the event is about decides, most specific path first
+ORIGIN_SECTIONS = (
+    ("/Power", "thermals_and_power"),
+    ("/Thermal", "thermals_and_power"),
+    ("/Storage", "storage"),
+    ("/Memory", "hardware"),
+    ("/Processors", "hardware"),
+    ("/EthernetInterfaces", "hardware"),
+    ("/FirmwareInventory", "firmware"),
+    ("/Systems/", "system"),
+)
+
+MESSAGE_ID_PATTERN = re.compile(r"([A-Z]+)\d+$")
+
+def destination_url():
+    """Where iDRACs are told to send events, including the shared token."""
+    return f"{EVENT_DESTINATION_URL}?token={EVENT_TOKEN}"
+
+def event_sections(record: dict):
+    """The sections an alert record affects. Every alert also refreshes system, whose health rolls the others up."""
+    sections = {"system"}
+    # "IDRAC.2.8.PSU0003" and plain "PSU0003" both name the PSU registry category
+    match = MESSAGE_ID_PATTERN.search((record.get("MessageId") or "").rsplit(".", 1)[-1])
+    if match and match.group(1) in MESSAGE_SECTIONS:
+        sections.add(MESSAGE_SECTIONS[match.group(1)])
+        return sections
+    origin = (record.get("OriginOfCondition") or {}).get("@odata.id", "")
+    for fragment, section in ORIGIN_SECTIONS:
+        if fragment in origin:
+            sections.add(section)
+            break
+    return sections
+
+def payload_sections(payload: dict):
+    """Maps an event payload to (format, sections to refresh). Metric reports carry sensor telemetry."""
+    if "MetricValues" in payload:
+        return "MetricReport", {"thermals_and_power"}
+    sections = set()
+    for record in payload.get("Events", []):
+        sections |= event_sections(record)
+    return "Event", sections
+
+class EventRefresher:
+    """Debounces pushed events into one crawl per host of just the sections they affect.
+
+    Events arriving within `delay` of the first one for a host are merged, so an iDRAC
+    reporting a PSU and the resulting redundancy loss in two alerts is crawled once.
+    monitor.poll_host updates the stored snapshot and the details cache and publishes any
+    health or power change to stream subscribers.
+    """
+
+    def __init__(self, delay: float = EVENT_REFRESH_DELAY):
+        self.delay = delay
+        self._pending: dict[str, set] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def request(self, hostname: str, sections):
+        pending = self._pending.get(hostname)
+        if pending is not None:
+            pending.update(sections)
+            return
+        self._pending[hostname] = set(sections)
+        task = asyncio.create_task(self._refresh(hostname))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, hostname: str):
+        await asyncio.sleep(self.delay)
+        pending = self._pending.pop(hostname)
+        sections = [section for section in SECTIONS if section in pending]
+        try:
+            await monitor.poll_host(hostname, sections)
+        except Exception as e:
+            logging.error(f"Event-triggered refresh of {', '.join(sections)} failed for {hostname}: {e}")
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._pending.clear()
+
+class EventSubscriptions:
+    """Keeps every iDRAC in the database subscribed to the receiver, rechecking periodically."""
+
+    def __init__(self, interval: float = EVENT_SUBSCRIBE_INTERVAL, concurrency: int = POLL_WORKERS):
+        self.interval = interval
+        self.concurrency = concurrency
+        self._task: asyncio.Task | None = None
+
+    async def subscribe_host(self, hostname: str):
+        ip = await resolver.resolve(hostname)
+        if not ip:
+            raise RuntimeError(f"Could not resolve IP address for hostname: {hostname}")
+        username, password = get_credentials(hostname, ip)
+        client = IdracClient(hostname, username, password, ip=ip)
+        # The Context comes back on every event, naming the host even through NAT
+        added = await client.subscribe_events(destination_url(), hostname, EVENT_FORMATS)
+        if added:
+            logging.info(f"Subscribed {hostname} to {', '.join(added)} events")
+
+    async def subscribe_all(self):
+        servers = await asyncio.to_thread(database.get_all_servers)
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def subscribe(hostname):
+            async with slots:
+                try:
+                    await self.subscribe_host(hostname)
+                except Exception as e:
+                    logging.error(f"Could not subscribe {hostname} to Redfish events: {e}")
+
+        await asyncio.gather(*(subscribe(server["hostname"]) for server in servers))
+
+    async def _run(self):
+        while True:
+            await self.subscribe_all()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if not EVENT_DESTINATION_URL:
+            logging.error("EVENTS_ENABLED is set but EVENT_DESTINATION_URL is empty; not subscribing any iDRAC")
+            return
+        if not EVENT_TOKEN:
+            logging.error("EVENTS_ENABLED is set but EVENT_TOKEN is empty; the receiver would refuse every event, not subscribing any iDRAC")
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+refresher = EventRefresher()
+subscriptions = EventSubscriptions()
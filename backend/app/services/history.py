@@ -0,0 +1,197 @@
+# Snapshot history: a compressed base snapshot per host followed by structural diffs.
+# These functions take the caller's connection so history is written in the same
+# transaction as the iDRAC_details update it records; see database.save_server_details.
+import hashlib
+import json
+import zlib
+from app.config import HISTORY_SECTIONS, HISTORY_REBASE_EVERY
+
+BASE, DIFF = 0, 1
+
+def versioned_state(snapshot: dict):
+    """The part of a snapshot whose changes are kept. Sensor readings live in the time-series store instead."""
+    return {section: snapshot[section] for section in HISTORY_SECTIONS if section in snapshot}
+
+def state_hash(state: dict) -> str:
+    return hashlib.sha1(json.dumps(state, sort_keys=True).encode()).hexdigest()
+
+def _encode(value) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode())
+
+def _decode(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+def diff(old, new, path=(), ops=None):
+    """Structural diff from old to new as a list of operations:
+
+        ["set", path, value]                      replace or add the value at path
+        ["del", path]                             remove a key
+        ["splice", path, start, count, items]     replace count list items at start with items
+
+    Lists of equal length are compared item by item; otherwise the common head and tail
+    are kept and only the middle is spliced, so adding a DIMM doesn't rewrite the others.
+    """
+    ops = [] if ops is None else ops
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append(["del", [*path, key]])
+        for key, value in new.items():
+            if key not in old:
+                ops.append(["set", [*path, key], value])
+            else:
+                diff(old[key], value, (*path, key), ops)
+    elif isinstance(old, list) and isinstance(new, list):
+        if len(old) == len(new):
+            for index, (old_item, new_item) in enumerate(zip(old, new)):
+                diff(old_item, new_item, (*path, index), ops)
+        else:
+            head = 0
+            while head < min(len(old), len(new)) and old[head] == new[head]:
+                head += 1
+            tail = 0
+            while tail < min(len(old), len(new)) - head and old[-1 - tail] == new[-1 - tail]:
+                tail += 1
+            ops.append(["splice", list(path), head, len(old) - head - tail, new[head:len(new) - tail]])
+    elif old != new or type(old) is not type(new):
+        ops.append(["set", list(path), new])
+    return ops
+
+def patch(state, ops):
+    """Applies diff() operations to state, in place where possible. Returns the new state."""
+    for op in ops:
+        path = op[1]
+        if op[0] == "splice":
+            target = state
+            for key in path:
+                target = target[key]
+            target[op[2]:op[2] + op[3]] = op[4]
+            continue
+        if not path:
+            state = op[2]
+            continue
+        parent = state
+        for key in path[:-1]:
+            parent = parent[key]
+        if op[0] == "set":
+            parent[path[-1]] = op[2]
+        else:
+            del parent[path[-1]]
+    return state
+
+def append(conn, host: str, timestamp: float, previous_snapshot: dict, snapshot: dict):
+    """Records a poll's versioned state if it differs from the last one recorded.
+
+    Writes a diff against the previous state, or a new base when the host has none, when
+    the stored chain no longer ends at the previous state (e.g. it was pruned or the
+    snapshot was replaced by an import), every HISTORY_REBASE_EVERY diffs, or once the
+    diffs since the base outweigh the base itself.
+    """
+    state = versioned_state(snapshot)
+    new_hash = state_hash(state)
+    last = conn.execute(
+        "SELECT ts, state_hash FROM snapshot_history WHERE host = ? ORDER BY ts DESC LIMIT 1", (host,)
+    ).fetchone()
+    if last and last[1] == new_hash:
+        return
+    # Keys are (host, ts); keep them strictly increasing even if the clock steps back
+    timestamp = max(timestamp, last[0] + 0.001) if last else timestamp
+
+    kind, data = BASE, _encode(state)
+    if last:
+        previous = versioned_state(previous_snapshot)
+        base = conn.execute(
+            "SELECT ts, length(data) FROM snapshot_history WHERE host = ? AND kind = ? ORDER BY ts DESC LIMIT 1", (host, BASE)
+        ).fetchone()
+        count, diff_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length(data)), 0) FROM snapshot_history WHERE host = ? AND ts > ?",
+            (host, base[0] if base else 0)
+        ).fetchone()
+        if base and last[1] == state_hash(previous) and count < HISTORY_REBASE_EVERY:
+            delta = _encode(diff(previous, state))
+            if diff_bytes + len(delta) < base[1]:
+                kind, data = DIFF, delta
+    conn.execute(
+        "INSERT INTO snapshot_history (host, ts, kind, state_hash, data) VALUES (?, ?, ?, ?, ?)",
+        (host, timestamp, kind, new_hash, data)
+    )
+
+def _replay(conn, host: str, start: float, end: float):
+    """Yields (ts, ops or None for a base, state after) for every entry up to end, starting
+    from the last base at or before start (or the first base, if history begins later)."""
+    base = conn.execute(
+        "SELECT MAX(ts) FROM snapshot_history WHERE host = ? AND kind = ? AND ts <= ?", (host, BASE, start)
+    ).fetchone()[0]
+    if base is None:
+        base = conn.execute("SELECT MIN(ts) FROM snapshot_history WHERE host = ? AND kind = ?", (host, BASE)).fetchone()[0]
+        if base is None:
+            return
+    state = None
+    for ts, kind, data in conn.execute(
+        "SELECT ts, kind, data FROM snapshot_history WHERE host = ? AND ts >= ? AND ts <= ? ORDER BY ts", (host, base, end)
+    ):
+        value = _decode(data)
+        if kind == BASE:
+            state = value
+            yield ts, None, state
+        else:
+            yield ts, value, patch(state, value)
+
+def state_at(conn, host: str, timestamp: float):
+    """Reconstructs the versioned state as of a unix time. Returns (recorded at, state), or (None, None)."""
+    recorded_at, state = None, None
+    for recorded_at, _, state in _replay(conn, host, timestamp, timestamp):
+        pass
+    return recorded_at, state
+
+def _lookup(state, path):
+    for key in path:
+        try:
+            state = state[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return state
+
+def format_path(path) -> str:
+    """["hardware", "memory_modules", 3, "CapacityMiB"] -> "hardware.memory_modules[3].CapacityMiB"."""
+    text = ""
+    for key in path:
+        text += f"[{key}]" if isinstance(key, int) else (f".{key}" if text else str(key))
+    return text
+
+def changes(conn, host: str, start: float, end: float, sections=None):
+    """Lists what changed between two unix times, oldest first: [{timestamp, changes: [{path, old, new}]}]."""
+    log = []
+    previous = None
+    for ts, ops, state in _replay(conn, host, start, end):
+        if ts > start and previous is not None:
+            if ops is None:
+                # A rebase (or a base written after the chain broke); compare it with the state before it
+                ops = diff(previous, state)
+            entries = []
+            for op in ops:
+                if sections and (not op[1] or op[1][0] not in sections):
+                    continue
+                if op[0] == "splice":
+                    _, path, start_index, count, items = op
+                    old_items = _lookup(previous, path) or []
+                    entries.append({"path": f"{format_path(path)}[{start_index}:{start_index + count}]",
+                                    "old": old_items[start_index:start_index + count], "new": items})
+                else:
+                    entries.append({"path": format_path(op[1]), "old": _lookup(previous, op[1]),
+                                    "new": op[2] if op[0] == "set" else None})
+            if entries:
+                log.append({"timestamp": ts, "changes": entries})
+        # patch() works in place, so keep an independent copy to read old values from
+        previous = json.loads(json.dumps(state))
+    return log
+
+def prune(conn, cutoff: float):
+    """Drops history before cutoff, keeping the last base at or before it so later diffs still apply."""
+    conn.execute(
+        """DELETE FROM snapshot_history WHERE ts < (
+               SELECT MAX(ts) FROM snapshot_history AS bases
+               WHERE bases.host = snapshot_history.host AND bases.kind = ? AND bases.ts <= ?
+           )""",
+        (BASE, cutoff)
+    )
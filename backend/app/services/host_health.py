@@ -0,0 +1,149 @@
+import random
+import time
+from datetime import datetime, timezone
+from app.config import (
+    REDFISH_TIMEOUT,
+    REDFISH_MIN_TIMEOUT,
+    REDFISH_BREAKER_THRESHOLD,
+    REDFISH_BREAKER_BACKOFF,
+    REDFISH_BREAKER_MAX_BACKOFF,
+    REDFISH_HEDGE_MIN_DELAY,
+)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+def _isoformat(timestamp: float | None):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp is not None else None
+
+class HostHealth:
+    """Latency statistics and a circuit breaker for one iDRAC.
+
+    Request timeouts follow a smoothed round-trip estimate (as TCP does for its
+    retransmission timer) instead of a flat REDFISH_TIMEOUT. After `threshold` consecutive
+    failures the breaker opens and requests fail immediately; once the backoff has passed a
+    single probe request is let through, which closes the breaker on success or reopens it
+    with a doubled (jittered) backoff.
+    """
+
+    def __init__(self, threshold: int = REDFISH_BREAKER_THRESHOLD, backoff: float = REDFISH_BREAKER_BACKOFF,
+                 max_backoff: float = REDFISH_BREAKER_MAX_BACKOFF):
+        self.threshold = threshold
+        self.base_backoff = backoff
+        self.max_backoff = max_backoff
+        self.state = CLOSED
+        self.srtt: float | None = None  # smoothed latency, seconds
+        self.rttvar = 0.0
+        self.consecutive_failures = 0
+        self.backoff = backoff
+        self.retry_at: float | None = None  # time.monotonic()
+        self.retry_at_wall: float | None = None  # the same moment as a unix time, for display
+        self.probe_started: float | None = None
+        self.timeout_multiplier = 1
+        self.last_error: str | None = None
+        self.last_error_at: float | None = None  # unix times
+        self.last_success_at: float | None = None
+
+    def timeout(self):
+        """Seconds to allow the next request before giving up on it."""
+        if self.srtt is None:
+            return REDFISH_TIMEOUT
+        estimate = (self.srtt + 4 * self.rttvar) * 4 * self.timeout_multiplier
+        return min(max(estimate, REDFISH_MIN_TIMEOUT), REDFISH_TIMEOUT)
+
+    def hedge_delay(self):
+        """Seconds to wait for a response before sending a duplicate request, or None without latency data."""
+        if self.srtt is None:
+            return None
+        return max(self.srtt + 3 * self.rttvar, REDFISH_HEDGE_MIN_DELAY)
+
+    def allow(self):
+        """True if a request may be sent now. Open breakers let one probe through once their backoff passes."""
+        now = time.monotonic()
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now >= self.retry_at:
+            self.state = HALF_OPEN
+            self.probe_started = None
+        if self.state == HALF_OPEN:
+            # A probe that never reported back (e.g. cancelled) is given up on after a full timeout
+            if self.probe_started is None or now - self.probe_started > REDFISH_TIMEOUT:
+                self.probe_started = now
+                return True
+        return False
+
+    def record_success(self, latency: float):
+        if self.srtt is None:
+            self.srtt, self.rttvar = latency, latency / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - latency)
+            self.srtt = 0.875 * self.srtt + 0.125 * latency
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.backoff = self.base_backoff
+        self.retry_at = None
+        self.probe_started = None
+        self.timeout_multiplier = 1
+        self.last_success_at = time.time()
+
+    def record_failure(self, error: str, timed_out: bool = False):
+        now = time.monotonic()
+        self.consecutive_failures += 1
+        self.last_error = error
+        self.last_error_at = time.time()
+        if timed_out:
+            # The estimate may just be too tight for this host; back off like a TCP retransmit
+            self.timeout_multiplier = min(self.timeout_multiplier * 2, 8)
+        if self.state == HALF_OPEN:
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.threshold:
+            self.state = OPEN
+            self.probe_started = None
+            delay = self.backoff * random.uniform(0.8, 1.2)
+            self.retry_at = now + delay
+            self.retry_at_wall = time.time() + delay
+
+    def snapshot(self):
+        """Breaker state and recent errors, as shown in API responses."""
+        return {
+            "state": self.state,
+            "reachable": self.state == CLOSED,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_error_at": _isoformat(self.last_error_at),
+            "last_success_at": _isoformat(self.last_success_at),
+            "retry_at": _isoformat(self.retry_at_wall) if self.state == OPEN else None,
+            "latency_ms": round(self.srtt * 1000, 1) if self.srtt is not None else None,
+            "timeout": round(self.timeout(), 2),
+        }
+
+# One tracker per iDRAC IP, shared by every client instance
+_hosts: dict[str, HostHealth] = {}
+
+def get_host_health(ip: str) -> HostHealth:
+    health = _hosts.get(ip)
+    if health is None:
+        health = _hosts[ip] = HostHealth()
+    return health
+
+def host_health_snapshot(ip: str | None):
+    """API view of an iDRAC's breaker; hosts never contacted from this process report as closed."""
+    health = _hosts.get(ip) if ip else None
+    return health.snapshot() if health else dict(_NEVER_CONTACTED)
+
+# The parts of a snapshot that only change when the breaker does, for ETag-hashed responses;
+# latency, timeout and last success move with nearly every request
+STABLE_FIELDS = ("state", "reachable", "last_error", "retry_at")
+
+def host_reachability(ip: str | None):
+    """The stable part of host_health_snapshot, so a busy poller doesn't change response ETags."""
+    snapshot = host_health_snapshot(ip)
+    return {field: snapshot[field] for field in STABLE_FIELDS}
+
+def breaker_states():
+    """Number of tracked iDRACs in each breaker state."""
+    counts = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+    for health in list(_hosts.values()):
+        counts[health.state] += 1
+    return counts
+
+_NEVER_CONTACTED = HostHealth().snapshot()
@@ -1,52 +1,423 @@
-import requests
+import asyncio
+import hashlib
+import httpx
+import json
 import logging
-import socket
+import time
+from collections import OrderedDict
 from datetime import datetime
 import warnings
+from app.config import (
+    REDFISH_MAX_CONNECTIONS_PER_HOST,
+    REDFISH_MAX_CONCURRENT_REQUESTS,
+    REDFISH_TIMEOUT,
+    REDFISH_KEEPALIVE_EXPIRY,
+    REDFISH_SESSION_AUTH,
+    REDFISH_SESSION_RETRY,
+    REDFISH_ETAG_ENTRIES_PER_HOST,
+    REDFISH_HEDGE_GETS,
+    REDFISH_BASE_URL_TEMPLATE,
+    METRICS_PER_HOST,
+)
+from app.services.host_health import CLOSED, get_host_health
+from app.utils import metrics
+from app.services.resolver import resolver
 
 # Suppress warnings for unverified HTTPS requests
 warnings.filterwarnings("ignore")
 logging.basicConfig(level=logging.INFO)
+# httpx logs every request at INFO, which floods the log when polling a fleet
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# One keep-alive connection pool per iDRAC, shared by every client instance.
+_pools: dict[str, httpx.AsyncClient] = {}
+# Caps the number of Redfish requests in flight across the whole fleet.
+_request_slots = asyncio.Semaphore(REDFISH_MAX_CONCURRENT_REQUESTS)
+
+# One Redfish session per iDRAC, shared by every client instance: ip -> {"token", "location", "username"}
+_sessions: dict[str, dict] = {}
+# Serializes logins so concurrent section fetches share one session instead of each opening their own
+_session_locks: dict[str, asyncio.Lock] = {}
+# iDRACs whose last login failed, with when to try again; basic auth is used until then
+_session_retry_at: dict[str, float] = {}
+
+# Last body returned for each Redfish URL that carried an ETag, per iDRAC IP and least
+# recently used first: ip -> url -> (etag, raw body). Bodies are kept as bytes and parsed
+# per use, since callers merge OEM fields into the resources they get back.
+_etags: dict[str, OrderedDict[str, tuple[str, bytes]]] = {}
+_etag_stats = {"not_modified": 0, "modified": 0}
+
+# Redfish query capabilities per iDRAC, read once from the service root.
+_capabilities: dict[str, dict] = {}
+
+# Properties requested with $select when a collection is fetched with $expand.
+# "Members" is listed so services that apply $select to the collection itself
+# still return the expanded members.
+PROCESSOR_FIELDS = (
+    "Members", "Id", "Name", "Socket", "Manufacturer", "Model", "ProcessorType",
+    "ProcessorArchitecture", "InstructionSet", "MaxSpeedMHz", "TotalCores",
+    "TotalThreads", "Status", "Oem",
+)
+MEMORY_FIELDS = (
+    "Members", "Id", "Name", "DeviceLocator", "CapacityMiB", "MemoryDeviceType",
+    "MemoryType", "OperatingSpeedMhz", "Manufacturer", "PartNumber",
+    "SerialNumber", "RankCount", "Status", "Oem",
+)
+NIC_FIELDS = (
+    "Members", "Id", "Name", "Description", "MACAddress", "PermanentMACAddress",
+    "SpeedMbps", "AutoNeg", "FullDuplex", "LinkStatus", "Status", "Oem",
+)
+
+# Independently collectable parts of a server's details, mapped to the method that fetches each.
+SECTIONS = {
+    "system": "get_system_info",
+    "hardware": "get_hardware_inventory",
+    "storage": "get_storage_details",
+    "thermals_and_power": "get_thermals_and_power",
+    "firmware": "get_firmware_inventory",
+    "warranty": "get_warranty_info",
+}
+
+REQUEST_SECONDS = metrics.Histogram(
+    "idrac_monitor_redfish_request_duration_seconds", "Redfish request latency by resource path", ("path",)
+)
+HOST_REQUEST_SECONDS = metrics.Histogram(
+    "idrac_monitor_redfish_host_request_duration_seconds", "Redfish request latency by iDRAC", ("host",)
+)
+REQUESTS = metrics.Counter(
+    "idrac_monitor_redfish_requests", "Redfish requests by resource path and outcome (HTTP status or error type)", ("path", "status")
+)
+RESPONSE_BYTES = metrics.Counter("idrac_monitor_redfish_response_bytes", "Redfish response body bytes received per iDRAC", ("host",))
+SECTION_SECONDS = metrics.Histogram(
+    "idrac_monitor_section_duration_seconds", "Time to collect one section of a server's details", ("section",)
+)
+
+# Collections whose member IDs become "{id}" in metric labels, so label values stay bounded
+_MEMBER_COLLECTIONS = {"Processors", "Memory", "EthernetInterfaces", "Storage", "Drives", "FirmwareInventory", "Sessions"}
+
+def _metric_path(path: str) -> str:
+    """/redfish/v1/Systems/System.Embedded.1/Memory/DIMM.A1?$select=x -> /Systems/System.Embedded.1/Memory/{id}"""
+    path = path.split("?", 1)[0].removeprefix("/redfish/v1")
+    segments = path.split("/")
+    for index in range(1, len(segments)):
+        if segments[index - 1] in _MEMBER_COLLECTIONS:
+            segments[index] = "{id}"
+    return "/".join(segments) or "/"
+
+def _is_bare_link(resource: dict) -> bool:
+    """True if a member entry is only a link and was not expanded by the service."""
+    return all(key.startswith("@odata.") for key in resource)
+
+def _get_pool(ip: str, verify_ssl: bool) -> httpx.AsyncClient:
+    """Returns the shared connection pool for an iDRAC, creating it on first use."""
+    pool = _pools.get(ip)
+    if pool is None or pool.is_closed:
+        pool = httpx.AsyncClient(
+            verify=verify_ssl,
+            timeout=REDFISH_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=REDFISH_MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=REDFISH_MAX_CONNECTIONS_PER_HOST,
+                keepalive_expiry=REDFISH_KEEPALIVE_EXPIRY,
+            ),
+            headers={"Accept": "application/json", "Connection": "keep-alive"},
+        )
+        _pools[ip] = pool
+    return pool
+
+async def _logout(ip: str, session: dict):
+    """Deletes a Redfish session on the iDRAC so it does not count against its session limit."""
+    pool = _pools.get(ip)
+    if pool is None or pool.is_closed or not session.get("location"):
+        return
+    location = session["location"]
+    url = location if location.startswith("http") else f"{REDFISH_BASE_URL_TEMPLATE.format(ip=ip)}{location}"
+    try:
+        async with _request_slots:
+            await pool.delete(url, headers={"X-Auth-Token": session["token"]})
+    except httpx.HTTPError as e:
+        logging.error(f"Could not delete Redfish session on {ip}: {e}")
+
+async def close_sessions():
+    """Logs out of every Redfish session. Called on application shutdown, before close_pools()."""
+    sessions = list(_sessions.items())
+    _sessions.clear()
+    await asyncio.gather(*(_logout(ip, session) for ip, session in sessions), return_exceptions=True)
+
+def etag_stats():
+    """Conditional-GET counters: responses reused on 304 versus downloaded again."""
+    return {**_etag_stats, "entries": sum(len(urls) for urls in list(_etags.values()))}
+
+def content_hash(data) -> str:
+    """Stable hash of a parsed section, for detecting unchanged data when the iDRAC sends no ETags."""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+async def close_pools():
+    """Closes every pooled iDRAC connection. Called on application shutdown."""
+    pools = list(_pools.values())
+    _pools.clear()
+    await asyncio.gather(*(pool.aclose() for pool in pools), return_exceptions=True)
 
 class IdracClient:
-    def __init__(self, host: str, username: str, password: str, verify_ssl: bool = False):
-        """Initializes the client with a hostname or IP address."""
+    def __init__(self, host: str, username: str, password: str, verify_ssl: bool = False, ip: str | None = None):
+        """Initializes the client with a hostname or IP address.
+
+        Pass ip when it is already known; otherwise the hostname is resolved through the
+        shared resolver cache on the first request.
+        """
         self.host = host
         self.username = username
         self.password = password
         self.verify_ssl = verify_ssl
-        self.ip = self._get_ip_from_hostname(host)
-        if not self.ip:
-            raise ValueError(f"Could not resolve IP address for hostname: {host}")
-        self.base_url = f"https://{self.ip}/redfish/v1"
+        self.ip = ip
+
+    @property
+    def root_url(self):
+        return REDFISH_BASE_URL_TEMPLATE.format(ip=self.ip)
+
+    @property
+    def base_url(self):
+        return f"{self.root_url}/redfish/v1"
 
-    def _get_ip_from_hostname(self, hostname: str):
-        """Performs a DNS lookup to get the IP address from a hostname."""
+    async def _ensure_ip(self):
+        """Resolves the hostname if no IP was given. Raises ValueError if it does not resolve."""
+        if self.ip is None:
+            self.ip = await resolver.resolve(self.host)
+            if not self.ip:
+                raise ValueError(f"Could not resolve IP address for hostname: {self.host}")
+        return self.ip
+
+    async def _request(self, path: str):
+        """Generic GET request to iDRAC Redfish API over the shared connection pool."""
         try:
-            return socket.gethostbyname(hostname)
-        except socket.gaierror as e:
-            logging.error(f"DNS lookup failed for {hostname}: {e}")
+            await self._ensure_ip()
+        except ValueError as e:
+            logging.error(str(e))
             return None
-
-    def _request(self, path: str):
-        """Generic GET request to iDRAC Redfish API."""
-        url = f"{self.base_url}{path}"
+        # Member links ("@odata.id") are absolute Redfish paths; everything else is relative to the service root.
+        url = f"{self.root_url}{path}" if path.startswith("/redfish/") else f"{self.base_url}{path}"
+        if not get_host_health(self.ip).allow():
+            # Circuit open: fail fast instead of waiting out another timeout
+            REQUESTS.inc(_metric_path(path), "circuit_open")
+            return None
+        pool = _get_pool(self.ip, self.verify_ssl)
+        host_etags = _etags.setdefault(self.ip, OrderedDict())
+        cached = host_etags.get(url)
         try:
-            response = requests.get(url, auth=(self.username, self.password), verify=self.verify_ssl, timeout=30)
+            token = await self._session_token(pool)
+            response = await self._send(pool, url, path, token, cached)
+            if response.status_code == 401 and token:
+                # The session timed out or was deleted on the iDRAC: log in again and retry once
+                token = await self._session_token(pool, stale=token)
+                response = await self._send(pool, url, path, token, cached)
+            if response.status_code == 304 and cached:
+                _etag_stats["not_modified"] += 1
+                host_etags.move_to_end(url)
+                return json.loads(cached[1])
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.HTTPError as e:
+            data = response.json()
+            self._remember_etag(url, response, data)
+            return data
+        except httpx.HTTPStatusError as e:
             logging.error(f"HTTP error for {self.ip} on {path}: {e.response.status_code} - {e.response.text}")
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logging.error(f"Network error for {self.ip} on {path}: {e}")
         return None
 
-    # (The rest of your original methods like get_system_info, get_hardware_inventory, etc., remain unchanged. 
-    # The only change is how the class is initialized, using self.ip from the DNS lookup.)
+    async def _get(self, pool: httpx.AsyncClient, url: str, path: str, token: str | None, cached: tuple | None = None):
+        """One GET with the iDRAC's adaptive timeout, recording its latency or failure in the host's health."""
+        health = get_host_health(self.ip)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        if token:
+            headers["X-Auth-Token"] = token
+        # Waiting for one of the host's pooled connections is not the iDRAC's fault, so it has no limit
+        timeout = httpx.Timeout(health.timeout(), pool=None)
+        async with _request_slots:
+            started = time.monotonic()
+            try:
+                response = await pool.get(url, headers=headers, timeout=timeout,
+                                          auth=None if token else (self.username, self.password))
+            except httpx.TransportError as e:
+                health.record_failure(f"{type(e).__name__}: {e}" if str(e) else type(e).__name__,
+                                      timed_out=isinstance(e, httpx.TimeoutException))
+                REQUESTS.inc(_metric_path(path), type(e).__name__)
+                raise
+        elapsed = time.monotonic() - started
+        if response.status_code >= 500:
+            health.record_failure(f"HTTP {response.status_code}")
+        else:
+            health.record_success(elapsed)
+        label = _metric_path(path)
+        REQUEST_SECONDS.observe(elapsed, label)
+        REQUESTS.inc(label, response.status_code)
+        if METRICS_PER_HOST:
+            HOST_REQUEST_SECONDS.observe(elapsed, self.ip)
+            RESPONSE_BYTES.inc(self.ip, amount=len(response.content))
+        return response
+
+    async def _send(self, pool: httpx.AsyncClient, url: str, path: str, token: str | None, cached: tuple | None = None):
+        """Sends a GET, hedged with a second copy when enabled and the first is slower than usual."""
+        delay = get_host_health(self.ip).hedge_delay() if REDFISH_HEDGE_GETS else None
+        if delay is None:
+            return await self._get(pool, url, path, token, cached)
+
+        first = asyncio.ensure_future(self._get(pool, url, path, token, cached))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        pending = {first, asyncio.ensure_future(self._get(pool, url, path, token, cached))}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _post(self, path: str, body: dict):
+        """POST to the Redfish API with the shared session. Returns the response; raises httpx.HTTPError on failure."""
+        await self._ensure_ip()
+        pool = _get_pool(self.ip, self.verify_ssl)
+
+        async def send(token):
+            async with _request_slots:
+                return await pool.post(
+                    f"{self.base_url}{path}", json=body,
+                    headers={"X-Auth-Token": token} if token else {},
+                    auth=None if token else (self.username, self.password),
+                )
+
+        token = await self._session_token(pool)
+        response = await send(token)
+        if response.status_code == 401 and token:
+            response = await send(await self._session_token(pool, stale=token))
+        response.raise_for_status()
+        return response
+
+    def _remember_etag(self, url: str, response: httpx.Response, data):
+        """Keeps a response body for If-None-Match, using the ETag header or the resource's @odata.etag."""
+        etag = response.headers.get("ETag") or (data.get("@odata.etag") if isinstance(data, dict) else None)
+        if not etag:
+            return
+        host_etags = _etags.setdefault(self.ip, OrderedDict())
+        if url in host_etags:
+            _etag_stats["modified"] += 1
+        host_etags[url] = (etag, response.content)
+        host_etags.move_to_end(url)
+        while len(host_etags) > REDFISH_ETAG_ENTRIES_PER_HOST:
+            host_etags.popitem(last=False)
+
+    async def _session_token(self, pool: httpx.AsyncClient, stale: str | None = None):
+        """Returns the iDRAC's shared session token, logging in if there is none yet or it is `stale`.
 
-    def get_system_info(self):
+        Returns None when sessions are disabled or login failed, meaning basic auth should be used.
+        """
+        if not REDFISH_SESSION_AUTH:
+            return None
+
+        def current():
+            session = _sessions.get(self.ip)
+            if session and session["token"] != stale and session["username"] == self.username:
+                return session["token"]
+            return None
+
+        token = current()
+        if token or _session_retry_at.get(self.ip, 0) > time.monotonic():
+            return token
+        async with _session_locks.setdefault(self.ip, asyncio.Lock()):
+            # Another request may have logged in, or failed to, while we waited
+            token = current()
+            if token or _session_retry_at.get(self.ip, 0) > time.monotonic():
+                return token
+            health = get_host_health(self.ip)
+            if not health.allow():
+                return None
+            previous = _sessions.pop(self.ip, None)
+            if previous and previous["token"] != stale:
+                # The credentials for this host changed; free the old session's slot
+                await _logout(self.ip, previous)
+            try:
+                async with _request_slots:
+                    try:
+                        response = await pool.post(
+                            f"{self.base_url}/SessionService/Sessions",
+                            json={"UserName": self.username, "Password": self.password},
+                            timeout=httpx.Timeout(health.timeout(), pool=None),
+                        )
+                    except httpx.TransportError as e:
+                        health.record_failure(f"{type(e).__name__}: {e}" if str(e) else type(e).__name__,
+                                              timed_out=isinstance(e, httpx.TimeoutException))
+                        raise
+                if response.status_code >= 500:
+                    health.record_failure(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                token = response.headers.get("X-Auth-Token")
+                if not token:
+                    raise ValueError("login response has no X-Auth-Token")
+            except (httpx.HTTPError, ValueError) as e:
+                logging.error(f"Redfish session login failed for {self.ip}, using basic auth: {e}")
+                _session_retry_at[self.ip] = time.monotonic() + REDFISH_SESSION_RETRY
+                return None
+            _session_retry_at.pop(self.ip, None)
+            _sessions[self.ip] = {"token": token, "location": response.headers.get("Location"), "username": self.username}
+            return token
+
+    async def _get_capabilities(self):
+        """Reads which Redfish query parameters the iDRAC supports from the service root."""
+        capabilities = _capabilities.get(self.ip)
+        if capabilities is not None:
+            return capabilities
+
+        service_root = await self._request("")
+        features = (service_root or {}).get("ProtocolFeaturesSupported", {})
+        expand = features.get("ExpandQuery", {})
+        capabilities = {
+            # "." expands subordinate resources such as Members and Drives, but not the Links section
+            "expand": bool(expand.get("NoLinks")) and bool(expand.get("Levels")),
+            "max_levels": expand.get("MaxLevels", 1) if expand.get("Levels") else 0,
+            "select": bool(features.get("SelectQuery")),
+        }
+        # Only remember the answer once the iDRAC actually gave us one
+        if service_root:
+            _capabilities[self.ip] = capabilities
+        return capabilities
+
+    async def _expand_query(self, levels: int = 1, select: tuple = ()):
+        """Builds the $expand/$select query string, or "" if the iDRAC can't expand."""
+        capabilities = await self._get_capabilities()
+        if not capabilities["expand"] or capabilities["max_levels"] < levels:
+            return ""
+        query = f"?$expand=.($levels={levels})"
+        if select and capabilities["select"]:
+            query += "&$select=" + ",".join(select)
+        return query
+
+    async def _resolve_link(self, entry: dict):
+        """Returns the resource behind a link, fetching it only if it wasn't expanded inline."""
+        if _is_bare_link(entry):
+            return await self._request(entry["@odata.id"])
+        return entry
+
+    async def _resolve_links(self, entries: list):
+        """Resolves a list of links concurrently, dropping any that failed."""
+        resolved = await asyncio.gather(*(self._resolve_link(entry) for entry in entries))
+        return [resource for resource in resolved if resource]
+
+    async def _get_members(self, collection_path: str, select: tuple = ()):
+        """Fetches a collection and all of its members, in one request when $expand is supported."""
+        collection = await self._request(collection_path + await self._expand_query(select=select))
+        if not collection:
+            return []
+        return await self._resolve_links(collection.get("Members", []))
+
+    async def get_system_info(self):
         """Get hostname, model, service tag, health, and more detailed system info."""
-        data = self._request("/Systems/System.Embedded.1")
+        data = await self._request("/Systems/System.Embedded.1")
         if not data:
             return {}
         
@@ -66,38 +437,20 @@ class IdracClient:
         
         return system_info
 
-    def get_hardware_inventory(self):
+    async def get_hardware_inventory(self):
         """Get detailed information for processors, memory, and network devices."""
-        inventory = {
-            "processors": [],
-            "memory_modules": [],
-            "nics": []
+        processors, memory_modules, nics = await asyncio.gather(
+            self._get_members("/Systems/System.Embedded.1/Processors", PROCESSOR_FIELDS),
+            self._get_members("/Systems/System.Embedded.1/Memory", MEMORY_FIELDS),
+            self._get_members("/Systems/System.Embedded.1/EthernetInterfaces", NIC_FIELDS),
+        )
+        return {
+            "processors": processors,
+            "memory_modules": memory_modules,
+            "nics": nics
         }
         
-        processors_collection = self._request("/Systems/System.Embedded.1/Processors")
-        if processors_collection:
-            for member in processors_collection.get("Members", []):
-                processor_details = self._request(member["@odata.id"])
-                if processor_details:
-                    inventory["processors"].append(processor_details)
-
-        memory_collection = self._request("/Systems/System.Embedded.1/Memory")
-        if memory_collection:
-            for member in memory_collection.get("Members", []):
-                memory_details = self._request(member["@odata.id"])
-                if memory_details:
-                    inventory["memory_modules"].append(memory_details)
-        
-        nics_collection = self._request("/Systems/System.Embedded.1/EthernetInterfaces")
-        if nics_collection:
-            for member in nics_collection.get("Members", []):
-                nic_details = self._request(member["@odata.id"])
-                if nic_details:
-                    inventory["nics"].append(nic_details)
-        
-        return inventory
-        
-    def get_thermals_and_power(self):
+    async def get_thermals_and_power(self):
         """Get detailed information for fans, temperature sensors, and power supplies."""
         env_data = {
             "fans": [],
@@ -105,12 +458,14 @@ class IdracClient:
             "power_supplies": []
         }
 
-        thermal_data = self._request("/Chassis/System.Embedded.1/Thermal")
+        thermal_data, power_data = await asyncio.gather(
+            self._request("/Chassis/System.Embedded.1/Thermal"),
+            self._request("/Chassis/System.Embedded.1/Power"),
+        )
         if thermal_data:
             env_data["fans"] = thermal_data.get("Fans", [])
             env_data["temperature_sensors"] = thermal_data.get("Temperatures", [])
 
-        power_data = self._request("/Chassis/System.Embedded.1/Power")
         if power_data:
             for psu in power_data.get("PowerSupplies", []):
                 psu_details = psu
@@ -120,55 +475,128 @@ class IdracClient:
 
         return env_data
 
-    def get_storage_details(self):
+    async def _get_controller_and_drives(self, controller_link: dict):
+        """Fetches one storage controller and its physical disks."""
+        controller_data = controller_link
+        # Without an expanded controller (or its drives) ask for it, expanding Drives[] when possible
+        if _is_bare_link(controller_data) or any(_is_bare_link(drive) for drive in controller_data.get("Drives", [])):
+            controller_data = await self._request(controller_link["@odata.id"] + await self._expand_query())
+        if not controller_data:
+            return None, []
+
+        controller_details = controller_data.get("StorageControllers", [{}])[0]
+        dell_controller_oem = controller_data.get("Oem", {}).get("Dell", {}).get("DellController", {})
+        controller_details.update(dell_controller_oem)
+
+        drives = await self._resolve_links(controller_data.get("Drives", []))
+        drive_details = []
+        for drive_data in drives:
+            if drive_data:
+                dell_drive_oem = drive_data.get("Oem", {}).get("Dell", {}).get("DellPhysicalDisk", {})
+                drive_data.update(dell_drive_oem)
+                drive_details.append(drive_data)
+        return controller_details, drive_details
+
+    async def get_storage_details(self):
         """Get detailed information for storage controllers and connected physical disks."""
         storage_info = {
             "controllers": [],
             "drives": []
         }
 
-        storage_collection = self._request("/Systems/System.Embedded.1/Storage")
+        # Two levels pull controllers and their drives in a single response; with only one
+        # level the per-controller fetch below expands Drives[] instead.
+        storage_collection = await self._request("/Systems/System.Embedded.1/Storage" + await self._expand_query(levels=2))
         if storage_collection:
-            for controller_link in storage_collection.get("Members", []):
-                controller_data = self._request(controller_link["@odata.id"])
-                if not controller_data:
+            results = await asyncio.gather(
+                *(self._get_controller_and_drives(link) for link in storage_collection.get("Members", []))
+            )
+            for controller_details, drives in results:
+                if controller_details is None:
                     continue
-                
-                controller_details = controller_data.get("StorageControllers", [{}])[0]
-                dell_controller_oem = controller_data.get("Oem", {}).get("Dell", {}).get("DellController", {})
-                controller_details.update(dell_controller_oem)
                 storage_info["controllers"].append(controller_details)
-
-                for drive_link in controller_data.get("Drives", []):
-                    drive_data = self._request(drive_link["@odata.id"])
-                    if drive_data:
-                        dell_drive_oem = drive_data.get("Oem", {}).get("Dell", {}).get("DellPhysicalDisk", {})
-                        drive_data.update(dell_drive_oem)
-                        storage_info["drives"].append(drive_data)
+                storage_info["drives"].extend(drives)
         
         return storage_info
 
-    def get_full_details(self):
-        """Aggregates all system inventory into a single, structured dictionary."""
+    async def get_firmware_inventory(self):
+        """Get the firmware inventory collection."""
+        return await self._request("/UpdateService/FirmwareInventory")
+
+    async def subscribe_events(self, destination: str, context: str, formats=("Event", "MetricReport")):
+        """Makes sure the iDRAC's EventService pushes to destination, adding any missing subscriptions.
+
+        Alerts are subscribed with EventFormatType "Event" and telemetry with "MetricReport".
+        Returns the formats that were newly subscribed.
+        """
+        subscriptions = await self._request("/EventService/Subscriptions" + await self._expand_query())
+        if subscriptions is None:
+            raise ConnectionError("could not read the event subscriptions")
+        existing = {
+            member.get("EventFormatType", "Event")
+            for member in await self._resolve_links(subscriptions.get("Members", []))
+            if member.get("Destination") == destination
+        }
+        added = []
+        for event_format in formats:
+            if event_format in existing:
+                continue
+            await self._post("/EventService/Subscriptions", {
+                "Destination": destination,
+                "Protocol": "Redfish",
+                "Context": context,
+                "EventFormatType": event_format,
+                "EventTypes": ["Alert"] if event_format == "Event" else ["MetricReport"],
+            })
+            added.append(event_format)
+        return added
+
+    async def _get_section(self, section: str):
+        """Fetches one section and records when it was collected."""
+        started = time.perf_counter()
+        data = await getattr(self, SECTIONS[section])()
+        SECTION_SECONDS.observe(time.perf_counter() - started, section)
+        return data, datetime.utcnow().isoformat()
+
+    async def get_sections(self, sections):
+        """Fetches only the named sections, concurrently, each with its own collection timestamp and content hash."""
+        sections = list(sections)
         try:
-            return {
-                "idrac_ip": self.ip,
-                "timestamp": datetime.utcnow().isoformat(),
-                "system": self.get_system_info(),
-                "hardware": self.get_hardware_inventory(),
-                "storage": self.get_storage_details(),
-                "thermals_and_power": self.get_thermals_and_power(),
-                "firmware": self._request("/UpdateService/FirmwareInventory"),
-                "warranty": self.get_warranty_info()
-            }
+            await self._ensure_ip()
+            health = get_host_health(self.ip)
+            if health.state != CLOSED:
+                # Only one probe gets through a tripped breaker; send it before fanning out
+                await self._request("")
+                if health.state != CLOSED:
+                    raise ConnectionError(f"iDRAC unreachable: {health.last_error}")
+            results = await asyncio.gather(*(self._get_section(section) for section in sections))
+            if health.state != CLOSED:
+                # Requests failed along the way; don't hand back a snapshot of empty sections
+                raise ConnectionError(f"iDRAC unreachable: {health.last_error}")
         except Exception as e:
-            logging.error(f"Failed to get full details for {self.ip}: {e}")
+            logging.error(f"Failed to get {', '.join(sections)} for {self.ip or self.host}: {e}")
             return {"status": "error", "message": str(e)}
 
-    def get_warranty_info(self):
+        details = {
+            "idrac_ip": self.ip,
+            "timestamp": datetime.utcnow().isoformat(),
+            "section_timestamps": {},
+            "section_hashes": {},
+        }
+        for section, (data, collected_at) in zip(sections, results):
+            details[section] = data
+            details["section_timestamps"][section] = collected_at
+            details["section_hashes"][section] = content_hash(data)
+        return details
+
+    async def get_full_details(self):
+        """Aggregates all system inventory into a single, structured dictionary."""
+        return await self.get_sections(SECTIONS)
+
+    async def get_warranty_info(self):
         """Get warranty details (Dell OEM extension)."""
         try:
-            data = self._request("/Managers/iDRAC.Embedded.1/Oem/Dell/DellWarranty")
+            data = await self._request("/Managers/iDRAC.Embedded.1/Oem/Dell/DellWarranty")
             if data:
                 return {
                     "start_date": data.get("WarrantyStartDate"),
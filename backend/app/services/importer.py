@@ -0,0 +1,73 @@
+import asyncio
+import csv
+import io
+from pydantic import ValidationError
+from app import database
+from app.schemas import ServerData
+from app.services.cache import details_cache
+from app.services.idrac_client import SECTIONS
+from app.services.resolver import resolver
+
+# What to do with hostnames that are already in the database; see database.import_servers
+CONFLICT_POLICIES = ("skip", "update", "fail")
+
+def parse_csv(text: str):
+    """Reads CSV with a header row of ServerData field names. Empty cells become None."""
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {key.strip(): (value.strip() or None) if isinstance(value, str) else value for key, value in row.items() if key}
+        for row in reader
+    ]
+
+async def import_servers(records: list[dict], on_conflict: str = "skip"):
+    """Validates, resolves and inserts a batch of servers, returning a per-row report.
+
+    Hostnames are resolved concurrently through the shared resolver, bypassing any cached
+    answer so a fixed DNS record or a moved iDRAC is picked up by the import.
+    """
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"on_conflict must be one of: {', '.join(CONFLICT_POLICIES)}")
+
+    report = [{"row": number, "hostname": None, "status": None, "ip": None, "message": None} for number in range(1, len(records) + 1)]
+    valid = []
+    seen = set()
+    for entry, record in zip(report, records):
+        try:
+            server = ServerData.model_validate(record)
+        except ValidationError as e:
+            entry.update(status="error", message="; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        entry["hostname"] = server.Hostname
+        if server.Hostname in seen:
+            entry.update(status="error", message="Hostname appears more than once in this import")
+            continue
+        seen.add(server.Hostname)
+        valid.append((entry, server))
+
+    for _, server in valid:
+        resolver.invalidate(server.Hostname)
+    addresses = await resolver.resolve_many(server.Hostname for _, server in valid)
+    rows = []
+    for entry, server in valid:
+        ip = addresses.get(server.Hostname)
+        if not ip:
+            entry.update(status="error", message=f"Could not resolve IP for hostname: {server.Hostname}")
+            continue
+        entry["ip"] = ip
+        # Only the fields the record gave, so an update never blanks columns it left out
+        rows.append((entry, {**server.model_dump(exclude_unset=True), "iDRAC_IP": ip}))
+
+    outcomes = await asyncio.to_thread(database.import_servers, [row for _, row in rows], on_conflict)
+    for entry, row in rows:
+        entry["status"] = outcomes[row["Hostname"]]
+        if entry["status"] == "updated":
+            # The row may bring its own iDRAC_details or a new address; serve neither from the cache
+            for section in SECTIONS:
+                details_cache.invalidate((row["iDRAC_IP"], section))
+        if entry["status"] == "conflict":
+            entry["message"] = "Hostname already exists"
+
+    counts = {}
+    for entry in report:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return {"on_conflict": on_conflict, "counts": counts, "rows": report}
@@ -0,0 +1,264 @@
+import asyncio
+import heapq
+import logging
+import random
+import time
+from app.config import (
+    SECTION_INTERVALS,
+    POLL_JITTER,
+    POLL_WORKERS,
+    POLL_HOST_REFRESH_INTERVAL,
+    TIMESERIES_FLUSH_INTERVAL,
+    HISTORY_RETENTION_DAYS,
+)
+from app import database
+from app.services.broadcast import status_changes
+from app.services.cache import details_cache
+from app.services.idrac_client import IdracClient, SECTIONS
+from app.services.resolver import resolver
+from app.services.timeseries import timeseries, sensor_samples
+from app.utils import metrics
+from app.utils.auth import get_credentials
+
+# Summary fields whose changes are pushed to /servers/events subscribers
+STATUS_FIELDS = ("health", "power_state", "psu_state")
+
+POLL_SECONDS = metrics.Histogram(
+    "idrac_monitor_poll_duration_seconds", "Time to crawl and store one host's due sections", ("outcome",)
+)
+POLL_LAG_SECONDS = metrics.Histogram(
+    "idrac_monitor_poll_lag_seconds", "How long due work waited for a free worker"
+)
+POLL_INTERVAL_SECONDS = metrics.Histogram(
+    "idrac_monitor_poll_interval_seconds", "Achieved time between successive polls of a section", ("section",),
+    buckets=(15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 21600, 86400),
+)
+
+def section_entry(details: dict, section: str):
+    """The cached form of one section: its data plus when it was collected."""
+    return {
+        "data": details.get(section),
+        "collected_at": details.get("section_timestamps", {}).get(section),
+    }
+
+def cache_sections(ip: str, details: dict, sections=None, overwrite: bool = True):
+    """Puts the given sections (default: all present) of a snapshot into the details cache."""
+    for section in sections or [s for s in SECTIONS if s in details]:
+        if overwrite or (ip, section) not in details_cache:
+            details_cache.set((ip, section), section_entry(details, section))
+
+async def poll_host(hostname: str, sections=None):
+    """Crawls the given sections (default: all) of one iDRAC and merges them into its snapshot.
+
+    Returns the merged snapshot.
+    """
+    # Cached until the DNS record expires; the address used is written back to iDRAC_IP
+    ip = await resolver.resolve(hostname)
+    if not ip:
+        raise RuntimeError(f"Could not resolve IP address for hostname: {hostname}")
+    username, password = get_credentials(hostname, ip)
+    client = IdracClient(hostname, username, password, ip=ip)
+    details = await client.get_sections(sections or SECTIONS)
+    if details.get("status") == "error":
+        # Keep the last good snapshot rather than replacing it with an error
+        raise RuntimeError(details.get("message"))
+    if "thermals_and_power" in details:
+        timeseries.record(hostname, sensor_samples(details["thermals_and_power"] or {}), time.time())
+    snapshot, summary, previous = await asyncio.to_thread(database.save_server_details, hostname, details)
+    cache_sections(details["idrac_ip"], snapshot, details["section_timestamps"])
+    publish_status_change(hostname, details["idrac_ip"], summary, previous)
+    return snapshot
+
+def publish_status_change(hostname: str, ip: str, summary: dict, previous: dict | None):
+    """Tells subscribers when a server's health or power state differs from its last snapshot."""
+    previous = previous or {}
+    changed = {key: summary.get(key) for key in STATUS_FIELDS if summary.get(key) != previous.get(key)}
+    if not changed:
+        return
+    status_changes.publish({
+        "hostname": hostname,
+        "ip": ip,
+        "changed": changed,
+        "previous": {key: previous.get(key) for key in changed},
+        "timestamp": summary.get("last_polled"),
+    })
+
+class FleetPoller:
+    """Polls every server in the database in the background and keeps its snapshot current.
+
+    Each section of each host is scheduled independently on its own interval. A scheduler
+    hands due work to a fixed pool of workers, batching the sections of one host that fall
+    due together into a single crawl; each section is rescheduled one (jittered) interval
+    after its poll finishes, so a slow iDRAC never holds up the rest of the fleet.
+    """
+
+    def __init__(self, intervals: dict = SECTION_INTERVALS, jitter: float = POLL_JITTER, workers: int = POLL_WORKERS):
+        self.intervals = dict(intervals)
+        self.jitter = jitter
+        self.workers = workers
+        # Set by a sharded worker (see services/sharding.py) to the hosts it holds leases on
+        self.only_hosts: set[str] | None = None
+        # Polled hosts, each with the generation its schedule entries carry, so entries left
+        # over from before a host was dropped and re-added are discarded
+        self._hosts: dict[str, int] = {}
+        self._generation = 0
+        self._schedule: list[tuple[float, str, str, int]] = []
+        self._queue: asyncio.Queue | None = None
+        self._wakeup = asyncio.Event()
+        self._refresh_lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task] = []
+        self._busy = 0
+        self._last_polled: dict[tuple[str, str], float] = {}
+
+    def _next_due(self, now: float, section: str):
+        """Returns when a section polled at `now` is due again."""
+        return now + self.intervals[section] * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _schedule_section(self, due: float, hostname: str, section: str, generation: int):
+        heapq.heappush(self._schedule, (due, hostname, section, generation))
+        self._wakeup.set()
+
+    async def refresh_hosts(self):
+        """Picks up servers added to or removed from the database (or from only_hosts)."""
+        async with self._refresh_lock:
+            await self._refresh_hosts()
+
+    async def _refresh_hosts(self):
+        if self.only_hosts is not None and not self.only_hosts:
+            # Nothing to poll; this also lets a sharded worker cut off from the database stop polling
+            servers = []
+        else:
+            servers = await asyncio.to_thread(database.get_all_servers)
+        if self.only_hosts is not None:
+            servers = [server for server in servers if server["hostname"] in self.only_hosts]
+        current = {server["hostname"] for server in servers}
+        added = current - self._hosts.keys()
+        removed = self._hosts.keys() - current
+        if added:
+            # Warm the resolver for the whole batch at once rather than one lookup per first poll
+            addresses = await resolver.resolve_many(added)
+            stored = {server["hostname"]: server["ip"] for server in servers}
+            moved = {hostname: ip for hostname, ip in addresses.items() if ip and ip != stored.get(hostname)}
+            if moved:
+                await asyncio.to_thread(database.update_server_ips, moved)
+        now = time.monotonic()
+        self._generation += 1
+        for hostname in added:
+            self._hosts[hostname] = self._generation
+            for section, interval in self.intervals.items():
+                # Spread first polls across one interval instead of crawling everything at startup
+                self._schedule_section(now + random.uniform(0, interval), hostname, section, self._generation)
+        # Removed hosts' schedule entries are dropped lazily when they fall due
+        for hostname in removed:
+            del self._hosts[hostname]
+        if removed:
+            # Another worker may carry on with these hosts; write out their partial sensor chunks now
+            timeseries.release(removed)
+        for key in [key for key in self._last_polled if key[0] not in current]:
+            del self._last_polled[key]
+
+    async def _host_refresher(self):
+        while True:
+            try:
+                await self.refresh_hosts()
+            except Exception as e:
+                logging.error(f"Poller could not read the server list: {e}")
+            await asyncio.sleep(POLL_HOST_REFRESH_INTERVAL)
+
+    async def _timeseries_writer(self):
+        """Periodically writes sensor history to SQLite and applies sensor and snapshot history retention."""
+        last_prune = 0.0
+        while True:
+            await asyncio.sleep(TIMESERIES_FLUSH_INTERVAL)
+            try:
+                await asyncio.to_thread(timeseries.flush)
+                if time.monotonic() - last_prune > 3600:
+                    await asyncio.to_thread(timeseries.prune)
+                    await asyncio.to_thread(database.prune_snapshot_history, HISTORY_RETENTION_DAYS)
+                    last_prune = time.monotonic()
+            except Exception as e:
+                logging.error(f"Could not write sensor history: {e}")
+
+    async def _scheduler(self):
+        while True:
+            now = time.monotonic()
+            # hostname -> (sections, when the first fell due, generation they were scheduled under)
+            due: dict[str, tuple[list[str], float, int]] = {}
+            while self._schedule and self._schedule[0][0] <= now:
+                at, hostname, section, generation = heapq.heappop(self._schedule)
+                if self._hosts.get(hostname) == generation:
+                    due.setdefault(hostname, ([], at, generation))[0].append(section)
+            for hostname, (sections, at, generation) in due.items():
+                # put() blocks while every worker is busy, and the host may be dropped meanwhile
+                if self._hosts.get(hostname) == generation:
+                    await self._queue.put((hostname, sections, at, generation))
+            self._wakeup.clear()
+            timeout = self._schedule[0][0] - now if self._schedule else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        while True:
+            hostname, sections, due, generation = await self._queue.get()
+            if self._hosts.get(hostname) != generation:
+                # Dropped (or handed to another worker) while it waited in the queue
+                self._queue.task_done()
+                continue
+            started = time.monotonic()
+            POLL_LAG_SECONDS.observe(max(started - due, 0))
+            self._busy += 1
+            outcome = "error"
+            try:
+                await poll_host(hostname, sections)
+                outcome = "ok"
+            except Exception as e:
+                logging.error(f"Background poll of {', '.join(sections)} failed for {hostname}: {e}")
+            finally:
+                self._busy -= 1
+                self._queue.task_done()
+                now = time.monotonic()
+                POLL_SECONDS.observe(now - started, outcome)
+                if self._hosts.get(hostname) == generation:
+                    for section in sections:
+                        if outcome == "ok":
+                            last = self._last_polled.get((hostname, section))
+                            if last is not None:
+                                POLL_INTERVAL_SECONDS.observe(now - last, section)
+                            self._last_polled[(hostname, section)] = now
+                        self._schedule_section(self._next_due(now, section), hostname, section, generation)
+
+    def stats(self):
+        """Current size of the schedule and how much of the worker pool is in use."""
+        return {
+            "hosts": len(self._hosts),
+            "scheduled": len(self._schedule),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "workers": self.workers if self._tasks else 0,
+            "busy_workers": self._busy,
+        }
+
+    async def start(self):
+        """Starts the scheduler, the host-list refresher and the worker pool."""
+        self._queue = asyncio.Queue(maxsize=self.workers)
+        self._tasks = [
+            asyncio.create_task(self._host_refresher()),
+            asyncio.create_task(self._scheduler()),
+            asyncio.create_task(self._timeseries_writer()),
+            *(asyncio.create_task(self._worker()) for _ in range(self.workers)),
+        ]
+        logging.info(f"Fleet poller started with {self.workers} workers")
+
+    async def stop(self):
+        """Cancels all poller tasks and waits for them to finish."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Seal the open sensor chunks so they are rolled up now; after a restart new samples
+        # start fresh chunks and these would never reach the 1m/5m/1h rollups
+        timeseries.release(set(self._hosts))
+        await asyncio.to_thread(timeseries.flush)
+
+poller = FleetPoller()
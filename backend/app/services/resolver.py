@@ -0,0 +1,136 @@
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from app.config import (
+    DNS_CACHE_TTL,
+    DNS_MIN_TTL,
+    DNS_MAX_TTL,
+    DNS_NEGATIVE_TTL,
+    DNS_MAX_CONCURRENT_LOOKUPS,
+)
+
+try:
+    # Optional: with dnspython installed, lookups are truly async and honour each record's TTL
+    import dns.asyncresolver
+    import dns.exception
+    import dns.resolver
+except ImportError:
+    dns = None
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+class Resolver:
+    """Async hostname -> IPv4 lookups shared by the API, the importer and the poller.
+
+    Answers are cached for the record's TTL (clamped to min_ttl..max_ttl, or default_ttl
+    when the TTL is unknown) and failures for negative_ttl. Concurrent lookups of the same
+    name share one query, and at most max_concurrency queries run at once.
+    """
+
+    def __init__(
+        self,
+        default_ttl: float = DNS_CACHE_TTL,
+        min_ttl: float = DNS_MIN_TTL,
+        max_ttl: float = DNS_MAX_TTL,
+        negative_ttl: float = DNS_NEGATIVE_TTL,
+        max_concurrency: int = DNS_MAX_CONCURRENT_LOOKUPS,
+    ):
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self._cache: dict[str, tuple[str | None, float]] = {}  # hostname -> (ip or None, expires at)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._stats = {"hits": 0, "negative_hits": 0, "lookups": 0, "failures": 0, "coalesced": 0}
+
+    async def _query(self, hostname: str):
+        """Returns (ip, ttl) from DNS, or (None, None) if the name does not resolve."""
+        if dns is not None:
+            try:
+                # search=True applies the resolv.conf search domains to short names, as getaddrinfo does
+                answer = await dns.asyncresolver.resolve(hostname, "A", search=True)
+                return answer[0].address, answer.rrset.ttl
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+                # Not in DNS, but it may be in /etc/hosts (or another NSS source) that dnspython doesn't read
+                return await self._getaddrinfo(hostname)
+            except dns.exception.DNSException as e:
+                logging.error(f"DNS lookup failed for {hostname}: {e}")
+                return None, None
+        return await self._getaddrinfo(hostname)
+
+    async def _getaddrinfo(self, hostname: str):
+        """Looks a name up through the system resolver; the TTL is not exposed, so it is returned as None."""
+        try:
+            # The loop runs getaddrinfo in its default thread pool
+            infos = await asyncio.get_running_loop().getaddrinfo(hostname, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+            return infos[0][4][0], None
+        except (socket.gaierror, UnicodeError, IndexError) as e:
+            logging.error(f"DNS lookup failed for {hostname}: {e}")
+            return None, None
+
+    async def _lookup(self, hostname: str):
+        async with self._slots:
+            self._stats["lookups"] += 1
+            ip, ttl = await self._query(hostname)
+        if ip is None:
+            self._stats["failures"] += 1
+            ttl = self.negative_ttl
+        else:
+            ttl = self.default_ttl if ttl is None else min(max(ttl, self.min_ttl), self.max_ttl)
+        self._cache[hostname] = (ip, time.monotonic() + ttl)
+        return ip
+
+    def cached(self, hostname: str):
+        """The unexpired cached answer for a name: (True, ip or None), or (False, None) if there is none."""
+        entry = self._cache.get(hostname)
+        if entry is None or entry[1] <= time.monotonic():
+            return False, None
+        return True, entry[0]
+
+    async def resolve(self, hostname: str):
+        """Returns the IPv4 address of a hostname, or None if it does not resolve. IPs are returned as-is."""
+        if _is_ip(hostname):
+            return hostname
+        found, ip = self.cached(hostname)
+        if found:
+            self._stats["hits" if ip else "negative_hits"] += 1
+            return ip
+
+        future = self._inflight.get(hostname)
+        if future is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(self._lookup(hostname))
+        self._inflight[hostname] = future
+        future.add_done_callback(lambda _: self._inflight.pop(hostname, None))
+        # Shielded so a cancelled caller doesn't cancel the lookup other callers are waiting on
+        return await asyncio.shield(future)
+
+    async def resolve_many(self, hostnames):
+        """Resolves many hostnames concurrently. Returns {hostname: ip or None}."""
+        hostnames = list(dict.fromkeys(hostnames))
+        addresses = await asyncio.gather(*(self.resolve(hostname) for hostname in hostnames))
+        return dict(zip(hostnames, addresses))
+
+    def invalidate(self, hostname: str):
+        """Forgets a cached answer (including a failure), so the next resolve() looks the name up again."""
+        self._cache.pop(hostname, None)
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            **self._stats,
+            "backend": "dnspython" if dns is not None else "getaddrinfo",
+            "entries": sum(1 for _, expires in self._cache.values() if expires > now),
+            "negative_entries": sum(1 for ip, expires in self._cache.values() if ip is None and expires > now),
+        }
+
+resolver = Resolver()
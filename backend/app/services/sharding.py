@@ -0,0 +1,116 @@
+# Splitting the fleet between polling workers: a consistent-hash ring over the live workers
+# decides which worker should poll each host, and leases in poll_assignments make sure a
+# host is only handed over once its previous worker has let go of it.
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import time
+from app.config import WORKER_HEARTBEAT_INTERVAL, WORKER_LEASE_TIMEOUT, WORKER_VNODES, POLL_HOST_REFRESH_INTERVAL
+from app import database
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+class HashRing:
+    """Consistent hashing: each worker owns the arcs before its `vnodes` points on the ring.
+
+    When a worker joins or leaves, only the hosts on the arcs it gains or loses move; every
+    other host stays with the worker that already has its sessions and ETags.
+    """
+
+    def __init__(self, workers, vnodes: int = WORKER_VNODES):
+        points = sorted((_hash(f"{worker}#{index}"), worker) for worker in workers for index in range(vnodes))
+        self._keys = [key for key, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    def owner(self, host: str):
+        if not self._keys:
+            return None
+        return self._workers[bisect.bisect(self._keys, _hash(host)) % len(self._keys)]
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class ShardMember:
+    """Keeps one worker's share of the fleet current and hands it to the worker's poller.
+
+    Every heartbeat it records that the worker is alive, rebuilds the ring from the live
+    workers, releases hosts that now belong elsewhere and claims the ones that belong to
+    it. The poller only polls hosts this worker holds the lease on.
+    """
+
+    def __init__(self, poller, worker_id: str | None = None, interval: float = WORKER_HEARTBEAT_INTERVAL,
+                 timeout: float = WORKER_LEASE_TIMEOUT):
+        self.poller = poller
+        self.worker_id = worker_id or default_worker_id()
+        self.interval = interval
+        self.timeout = timeout
+        self.workers: list[str] = []
+        self.assigned: set[str] = set()
+        self._hostnames: list[str] = []
+        self._hosts_read_at = 0.0
+        self._wanted: list[str] = []
+        # Unix time of the last successful claim; the leases it renewed run out `timeout` after it
+        self._claimed_at: float | None = None
+        self._task: asyncio.Task | None = None
+        # Nothing is polled until the first heartbeat has claimed some hosts
+        poller.only_hosts = set()
+
+    async def heartbeat(self):
+        """Renews this worker's leases. If it can't, stops polling before the leases run out."""
+        try:
+            await self._heartbeat()
+        except Exception as e:
+            logging.error(f"Worker {self.worker_id} heartbeat failed: {e}")
+            # Another worker may take these hosts once the leases expire; stop polling them
+            # one heartbeat before that so the two never overlap
+            if self.assigned and time.time() - self._claimed_at > self.timeout - self.interval:
+                logging.error(f"Worker {self.worker_id} could not renew its leases; pausing polling of {len(self.assigned)} hosts")
+                self.assigned = set()
+                self.poller.only_hosts = set()
+                await self.poller.refresh_hosts()
+
+    async def _heartbeat(self):
+        now = time.time()
+        workers = await asyncio.to_thread(
+            database.worker_heartbeat, self.worker_id, socket.gethostname(), os.getpid(), now, self.timeout
+        )
+        hosts_changed = time.monotonic() - self._hosts_read_at > POLL_HOST_REFRESH_INTERVAL
+        if hosts_changed:
+            servers = await asyncio.to_thread(database.get_all_servers)
+            self._hostnames = sorted(server["hostname"] for server in servers)
+            self._hosts_read_at = time.monotonic()
+        if hosts_changed or workers != self.workers:
+            if workers != self.workers:
+                logging.info(f"Worker {self.worker_id}: {len(workers)} live workers")
+            self.workers = workers
+            ring = HashRing(workers)
+            self._wanted = [hostname for hostname in self._hostnames if ring.owner(hostname) == self.worker_id]
+
+        assigned = await asyncio.to_thread(database.claim_hosts, self.worker_id, self._wanted, now, now + self.timeout)
+        self._claimed_at = now
+        if assigned != self.assigned:
+            logging.info(f"Worker {self.worker_id} now polls {len(assigned)} of {len(self._hostnames)} hosts "
+                         f"({len(self._wanted) - len(assigned)} waiting for their previous worker)")
+            self.assigned = assigned
+            self.poller.only_hosts = assigned
+            await self.poller.refresh_hosts()
+
+    async def _run(self):
+        while True:
+            await self.heartbeat()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops heartbeating and releases this worker's hosts so the others pick them up straight away."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(database.release_worker, self.worker_id)
@@ -0,0 +1,31 @@
+# Compact per-server status derived from a full iDRAC_details snapshot.
+
+# Redfish Status.Health values, least to most severe
+HEALTH_RANK = {"OK": 0, "Warning": 1, "Critical": 2}
+
+def worst_health(values):
+    """Returns the most severe Redfish health value, or None if none is known."""
+    known = [value for value in values if value in HEALTH_RANK]
+    return max(known, key=HEALTH_RANK.get, default=None)
+
+def summarize_snapshot(details: dict):
+    """Builds the compact record served by GET /servers/summary."""
+    system = details.get("system") or {}
+    env = details.get("thermals_and_power") or {}
+
+    worst_temperature = None
+    for sensor in env.get("temperature_sensors", []):
+        reading = sensor.get("ReadingCelsius")
+        if reading is not None and (worst_temperature is None or reading > worst_temperature["reading_celsius"]):
+            worst_temperature = {"name": sensor.get("Name"), "reading_celsius": reading}
+
+    power_supplies = env.get("power_supplies", [])
+    return {
+        "health": system.get("health"),
+        "power_state": system.get("power_state"),
+        "model": system.get("model"),
+        "worst_temperature": worst_temperature,
+        "psu_state": worst_health((psu.get("Status") or {}).get("Health") for psu in power_supplies),
+        "psu_count": len(power_supplies),
+        "last_polled": details.get("timestamp"),
+    }
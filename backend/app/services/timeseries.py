@@ -0,0 +1,248 @@
+import array
+import threading
+import time
+import zlib
+from app.config import TIMESERIES_RETENTION_DAYS
+from app.database import QUERY_SECONDS, get_connection, transaction
+
+# Resolution 0 holds raw samples; the others are rollups with one point per that many seconds.
+RAW = 0
+ROLLUP_RESOLUTIONS = (60, 300, 3600)
+# Seconds of data held in one chunk row, per resolution. Raw chunks are sealed on a multiple
+# of the coarsest rollup so every rollup bucket is computed from a single chunk.
+CHUNK_SPANS = {RAW: 6 * 3600, 60: 86400, 300: 7 * 86400, 3600: 30 * 86400}
+
+# Column layouts of a chunk's data blob: offsets (seconds from chunk_start) followed by values
+RAW_COLUMNS = ("I", "f")
+ROLLUP_COLUMNS = ("I", "I", "f", "f", "f")  # offset, sample count, avg, min, max
+
+# rolled_up is set on raw chunks whose samples are already in the rollups
+INSERT_CHUNK = """INSERT OR REPLACE INTO metric_chunks (host, metric, resolution, chunk_start, count, data, rolled_up)
+                  VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+def sensor_samples(env: dict):
+    """Extracts the readings we keep history for from a thermals_and_power section."""
+    samples = {}
+    for sensor in env.get("temperature_sensors", []):
+        if sensor.get("ReadingCelsius") is not None:
+            samples[f"temperature:{sensor.get('Name')}"] = sensor["ReadingCelsius"]
+    for fan in env.get("fans", []):
+        reading = fan.get("Reading", fan.get("ReadingRPM"))
+        if reading is not None:
+            samples[f"fan_rpm:{fan.get('Name')}"] = reading
+    for psu in env.get("power_supplies", []):
+        if psu.get("PowerInputWatts") is not None:
+            samples[f"psu_input_watts:{psu.get('Name')}"] = psu["PowerInputWatts"]
+    return samples
+
+def _encode(columns):
+    return zlib.compress(b"".join(column.tobytes() for column in columns))
+
+def _decode(blob: bytes, count: int, typecodes):
+    raw = zlib.decompress(blob)
+    columns, position = [], 0
+    for typecode in typecodes:
+        column = array.array(typecode)
+        size = count * column.itemsize
+        column.frombytes(raw[position:position + size])
+        columns.append(column)
+        position += size
+    return columns
+
+class TimeSeriesStore:
+    """Compact per-host sensor history in SQLite: one row per host/metric/resolution/chunk.
+
+    Samples are appended to an in-memory chunk per host and metric. Open chunks are written
+    out periodically by flush(); when a chunk's window ends it is sealed and its samples are
+    rolled up into 1m/5m/1h points (count, avg, min, max). Each resolution has its own
+    retention, applied by prune().
+    """
+
+    def __init__(self):
+        self._open: dict[tuple, dict] = {}
+        self._sealed: list[tuple[tuple, dict]] = []
+        self._dirty: set[tuple] = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def record(self, host: str, samples: dict, timestamp: float):
+        """Appends one reading per metric, taken at the given unix time."""
+        ts = int(timestamp)
+        window = ts - ts % CHUNK_SPANS[RAW]
+        with self._lock:
+            for metric, value in samples.items():
+                key = (host, metric)
+                chunk = self._open.get(key)
+                if chunk is not None and chunk["window"] != window:
+                    self._sealed.append((key, chunk))
+                    chunk = None
+                if chunk is None:
+                    # Raw chunks are keyed by their first sample, so a chunk started after a
+                    # restart never overwrites one written earlier in the same window
+                    chunk = {"window": window, "start": ts, "offsets": array.array("I"), "values": array.array("f")}
+                    self._open[key] = chunk
+                if ts < chunk["start"]:
+                    continue  # Clock went backwards; offsets are unsigned
+                chunk["offsets"].append(ts - chunk["start"])
+                chunk["values"].append(value)
+                self._dirty.add(key)
+
+    def _rollup_rows(self, conn, host: str, metric: str, chunk: dict):
+        """Merges a sealed raw chunk's samples into the rollup chunks of every resolution."""
+        for resolution in ROLLUP_RESOLUTIONS:
+            buckets: dict[int, list] = {}
+            for offset, value in zip(chunk["offsets"], chunk["values"]):
+                ts = chunk["start"] + offset
+                bucket = buckets.setdefault(ts - ts % resolution, [0, 0.0, value, value])
+                bucket[0] += 1
+                bucket[1] += value
+                bucket[2] = min(bucket[2], value)
+                bucket[3] = max(bucket[3], value)
+
+            by_chunk: dict[int, dict] = {}
+            for bucket_ts, (count, total, low, high) in buckets.items():
+                chunk_start = bucket_ts - bucket_ts % CHUNK_SPANS[resolution]
+                by_chunk.setdefault(chunk_start, {})[bucket_ts - chunk_start] = (count, total / count, low, high)
+
+            for chunk_start, points in by_chunk.items():
+                row = conn.execute(
+                    "SELECT count, data FROM metric_chunks WHERE host = ? AND metric = ? AND resolution = ? AND chunk_start = ?",
+                    (host, metric, resolution, chunk_start)
+                ).fetchone()
+                if row:
+                    for offset, count, avg, low, high in zip(*_decode(row[1], row[0], ROLLUP_COLUMNS)):
+                        if offset in points:
+                            # A bucket split across two raw chunks (e.g. around a restart)
+                            new_count, new_avg, new_low, new_high = points[offset]
+                            total = count + new_count
+                            points[offset] = (total, (avg * count + new_avg * new_count) / total, min(low, new_low), max(high, new_high))
+                        else:
+                            points[offset] = (count, avg, low, high)
+                offsets = sorted(points)
+                columns = [array.array(typecode) for typecode in ROLLUP_COLUMNS]
+                for offset in offsets:
+                    columns[0].append(offset)
+                    for column, value in zip(columns[1:], points[offset]):
+                        column.append(value)
+                yield (host, metric, resolution, chunk_start, len(offsets), _encode(columns))
+
+    def release(self, hosts):
+        """Seals the open chunks of hosts no longer polled here, so the next flush rolls them up."""
+        with self._lock:
+            for key in [key for key in self._open if key[0] in hosts]:
+                self._sealed.append((key, self._open.pop(key)))
+                self._dirty.discard(key)
+
+    @QUERY_SECONDS.time("timeseries_flush")
+    def flush(self):
+        """Writes open chunks and seals finished ones, rolling them up. Blocking; run off the event loop."""
+        with self._flush_lock:
+            with self._lock:
+                sealed, self._sealed = self._sealed, []
+                dirty = [
+                    (key, {**self._open[key], "offsets": array.array("I", self._open[key]["offsets"]),
+                           "values": array.array("f", self._open[key]["values"])})
+                    for key in self._dirty if key in self._open
+                ]
+                self._dirty.clear()
+
+            if not sealed and not dirty:
+                return
+            # Sealed chunks are rolled up in the same transaction, so they are written as rolled up
+            rows = [
+                (host, metric, RAW, chunk["start"], len(chunk["offsets"]), _encode([chunk["offsets"], chunk["values"]]), rolled_up)
+                for rolled_up, chunks in ((1, sealed), (0, dirty))
+                for (host, metric), chunk in chunks
+            ]
+            try:
+                with transaction() as conn:
+                    conn.executemany(INSERT_CHUNK, rows)
+                    for (host, metric), chunk in sealed:
+                        # Written one by one: the next sealed chunk may merge into the same rollup row
+                        for row in self._rollup_rows(conn, host, metric, chunk):
+                            conn.execute(INSERT_CHUNK, (*row, 0))
+            except Exception:
+                # Put sealed chunks back so their rollups are retried on the next flush
+                with self._lock:
+                    self._sealed = sealed + self._sealed
+                raise
+
+    @QUERY_SECONDS.time("timeseries_prune")
+    def prune(self, now: float | None = None):
+        """Deletes chunks that ended before their resolution's retention window. Blocking."""
+        now = now or time.time()
+        with transaction() as conn:
+            for resolution, days in TIMESERIES_RETENTION_DAYS.items():
+                cutoff = int(now - days * 86400) - CHUNK_SPANS[resolution]
+                conn.execute("DELETE FROM metric_chunks WHERE resolution = ? AND chunk_start < ?", (resolution, cutoff))
+
+    def metrics(self, host: str):
+        """Lists the metric names with history for a host."""
+        rows = get_connection().execute("SELECT DISTINCT metric FROM metric_chunks WHERE host = ?", (host,))
+        names = {row[0] for row in rows}
+        with self._lock:
+            names.update(metric for (chunk_host, metric) in self._open if chunk_host == host)
+        return sorted(names)
+
+    @QUERY_SECONDS.time("timeseries_query")
+    def query(self, host: str, metric: str, start: float, end: float, step: int):
+        """Returns [timestamp, avg, min, max] points every `step` seconds between start and end. Blocking.
+
+        Reads the coarsest stored resolution not wider than step, plus the raw samples not yet
+        rolled up into it: open chunks, and those cut short by a restart or a handover.
+        """
+        resolution = max([r for r in ROLLUP_RESOLUTIONS if r <= step], default=RAW)
+        start, end = int(start), int(end)
+        points = []  # (ts, count, avg, min, max)
+
+        # One read transaction so rollups and raw chunks come from the same database state
+        with transaction() as conn:
+            if resolution != RAW:
+                for chunk_start, count, data in conn.execute(
+                    """SELECT chunk_start, count, data FROM metric_chunks
+                       WHERE host = ? AND metric = ? AND resolution = ? AND chunk_start BETWEEN ? AND ?""",
+                    (host, metric, resolution, start - CHUNK_SPANS[resolution], end)
+                ):
+                    for offset, *values in zip(*_decode(data, count, ROLLUP_COLUMNS)):
+                        ts = chunk_start + offset
+                        if start <= ts <= end:
+                            points.append((ts, *values))
+
+            with self._lock:
+                pending = [chunk for key, chunk in self._sealed if key == (host, metric)]
+                if (host, metric) in self._open:
+                    pending.append(self._open[(host, metric)])
+                pending = [(chunk["start"], list(zip(chunk["offsets"], chunk["values"]))) for chunk in pending]
+            pending_starts = {chunk_start for chunk_start, _ in pending}
+
+            raw_chunks = list(pending)
+            for chunk_start, count, data, rolled_up in conn.execute(
+                """SELECT chunk_start, count, data, rolled_up FROM metric_chunks
+                   WHERE host = ? AND metric = ? AND resolution = 0 AND chunk_start BETWEEN ? AND ?""",
+                (host, metric, start - CHUNK_SPANS[RAW], end)
+            ):
+                if rolled_up and resolution != RAW:
+                    continue  # Already counted in the rollup points above
+                # Chunks still held in memory may also have been flushed; prefer the in-memory copy
+                if chunk_start not in pending_starts:
+                    raw_chunks.append((chunk_start, list(zip(*_decode(data, count, RAW_COLUMNS)))))
+
+        for chunk_start, samples in raw_chunks:
+            for offset, value in samples:
+                ts = chunk_start + offset
+                if start <= ts <= end:
+                    points.append((ts, 1, value, value, value))
+
+        buckets: dict[int, list] = {}
+        for ts, count, avg, low, high in points:
+            bucket = buckets.setdefault(ts - ts % step, [0, 0.0, low, high])
+            bucket[0] += count
+            bucket[1] += avg * count
+            bucket[2] = min(bucket[2], low)
+            bucket[3] = max(bucket[3], high)
+        return {
+            "resolution": resolution,
+            "points": [[ts, total / count, low, high] for ts, (count, total, low, high) in sorted(buckets.items())],
+        }
+
+timeseries = TimeSeriesStore()
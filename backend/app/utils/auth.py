@@ -0,0 +1,43 @@
+import fnmatch
+import json
+import logging
+import os
+from app.config import IDRAC_CREDENTIALS_FILE, IDRAC_USERNAME, IDRAC_PASSWORD
+
+# Parsed IDRAC_CREDENTIALS_FILE, re-read when its modification time changes
+_loaded = {"mtime": None, "entries": []}
+
+def _load_entries():
+    if not IDRAC_CREDENTIALS_FILE:
+        return []
+    try:
+        mtime = os.path.getmtime(IDRAC_CREDENTIALS_FILE)
+    except OSError:
+        return []
+    if mtime != _loaded["mtime"]:
+        try:
+            with open(IDRAC_CREDENTIALS_FILE) as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            # Keep using the last good version rather than locking every iDRAC out
+            logging.error(f"Could not read credentials file {IDRAC_CREDENTIALS_FILE}: {e}")
+            return _loaded["entries"]
+        _loaded.update(mtime=mtime, entries=entries)
+    return _loaded["entries"]
+
+def get_credentials(hostname: str, ip: str | None = None):
+    """Returns (username, password) for an iDRAC.
+
+    IDRAC_CREDENTIALS_FILE is a JSON list of {"hosts": [glob patterns], "username", "password"}
+    entries ("password_env" names an environment variable to read the password from instead).
+    The first entry with a pattern matching the hostname or IP wins; hosts matching no entry
+    use IDRAC_USERNAME / IDRAC_PASSWORD.
+    """
+    for entry in _load_entries():
+        patterns = entry.get("hosts", [])
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if any(fnmatch.fnmatch(hostname, pattern) or (ip and fnmatch.fnmatch(ip, pattern)) for pattern in patterns):
+            password = os.getenv(entry["password_env"]) if entry.get("password_env") else entry.get("password")
+            return entry.get("username", IDRAC_USERNAME), password if password is not None else IDRAC_PASSWORD
+    return IDRAC_USERNAME, IDRAC_PASSWORD
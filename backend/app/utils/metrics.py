@@ -0,0 +1,139 @@
+"""Minimal in-process metrics registry with Prometheus / OpenMetrics text exposition.
+
+Recording is a dict lookup and a few additions under a per-metric lock, cheap enough for
+every Redfish request. Values that already live elsewhere (cache counters, queue depth)
+are read by callbacks at scrape time instead of being mirrored on every change.
+"""
+import bisect
+import threading
+import time
+from functools import wraps
+
+# Seconds; covers a fast 304 from a nearby iDRAC up to a full timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry: list = []
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames=(), callback=None):
+        """callback, if given, returns {label values tuple: value} at scrape time instead of recorded values."""
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values: dict = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _items(self):
+        if self.callback:
+            return list(self.callback().items())
+        with self._lock:
+            return list(self._values.items())
+
+    def _header(self, openmetrics: bool, name: str | None = None):
+        name = name or self.name
+        return [f"# HELP {name} {self.help}", f"# TYPE {name} {self.kind}"]
+
+class Counter(_Metric):
+    """Monotonic count. Exposed with the conventional _total suffix."""
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, openmetrics: bool):
+        # OpenMetrics names the counter family without the suffix; the Prometheus format names it as sampled
+        lines = self._header(openmetrics, self.name if openmetrics else f"{self.name}_total")
+        lines += [f"{self.name}_total{_labels(self.labelnames, labels)} {format_value(value)}" for labels, value in self._items()]
+        return lines
+
+class Gauge(_Metric):
+    """Current value, either set directly or read from a callback at scrape time."""
+    kind = "gauge"
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self, openmetrics: bool):
+        lines = self._header(openmetrics)
+        lines += [f"{self.name}{_labels(self.labelnames, labels)} {format_value(value)}" for labels, value in self._items()]
+        return lines
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum; cumulated when rendered
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, *labels):
+        """Decorator recording how long each call of a (blocking) function takes."""
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, *labels)
+            return wrapper
+        return decorator
+
+    def render(self, openmetrics: bool):
+        lines = self._header(openmetrics)
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._values.items()]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = f'le="{format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {format_value(series[-1])}")
+        return lines
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+def wants_openmetrics(accept: str | None) -> bool:
+    """True if a scraper's Accept header asks for OpenMetrics rather than the Prometheus text format."""
+    return "application/openmetrics-text" in (accept or "")
+
+def render(openmetrics: bool = False) -> str:
+    """Every registered metric in Prometheus text format, or OpenMetrics (which ends with # EOF)."""
+    lines = []
+    for metric in _registry:
+        lines += metric.render(openmetrics)
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,74 @@
+"""Standalone polling worker, for spreading collection over several processes or machines.
+
+    python -m app.worker                  # one worker; start more here or on other machines
+    python -m app.worker --processes 4    # four workers on this machine
+
+Workers share the servers table and split the hosts between them by consistent hashing
+(see app/services/sharding.py), rebalancing as workers start, stop or die. Each writes the
+snapshots, sensor history and snapshot history of its hosts to the shared database. Run
+the API with POLLER_ENABLED=false so it serves what the workers collect.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import subprocess
+import sys
+from app import database
+from app.services.idrac_client import close_pools, close_sessions
+from app.services.monitor import FleetPoller
+from app.services.sharding import ShardMember
+
+async def run_worker(worker_id: str | None):
+    database.init_db()
+    poller = FleetPoller()
+    member = ShardMember(poller, worker_id)
+    await poller.start()
+    member.start()
+    logging.info(f"Worker {member.worker_id} started")
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    await stopping.wait()
+
+    # Hand the hosts back first so other workers take them over while this one shuts down
+    await member.stop()
+    await poller.stop()
+    await close_sessions()
+    await close_pools()
+    database.close_connections()
+    logging.info(f"Worker {member.worker_id} stopped")
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def run_processes(count: int):
+    """Starts `count` workers as child processes and stops them all on Ctrl-C or SIGTERM."""
+    children = [subprocess.Popen([sys.executable, "-m", "app.worker"]) for _ in range(count)]
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        for child in children:
+            child.wait()
+    except KeyboardInterrupt:
+        for child in children:
+            child.send_signal(signal.SIGTERM)
+        for child in children:
+            child.wait()
+    return max(child.returncode for child in children)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="Sharded iDRAC polling worker")
+    parser.add_argument("--processes", type=int, default=1, help="Number of worker processes to run on this machine")
+    parser.add_argument("--worker-id", help="Name on the hash ring (default: <hostname>:<pid>)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(message)s")
+
+    if args.processes > 1:
+        return run_processes(args.processes)
+    asyncio.run(run_worker(args.worker_id))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+"""Simulated fleet of Dell iDRAC Redfish services, for running the collector without hardware.
+
+    python -m bench.mock_redfish --hosts 1000 --latency-ms 40 --jitter-ms 20 --port 8900
+
+Every simulated iDRAC is served under /hosts/<ip>/redfish/v1, so point the backend at it with
+REDFISH_BASE_URL_TEMPLATE=http://127.0.0.1:8900/hosts/{ip}. Host IPs are 10.<x>.<y>.<z>, listed
+at /_hosts. Each host's inventory is generated from its IP, so it is the same on every request;
+only sensor readings move. /_stats counts the requests served, and POST /_stats/reset clears it.
+
+Hosts accept EventService subscriptions. POST /_events/<ip>?kind=psu_failure fails a power
+supply and pushes the matching alert to that host's subscribers, like an iDRAC would;
+kind=psu_restored undoes it and kind=metric_report sends a sensor metric report.
+"""
+import argparse
+import asyncio
+import hashlib
+import httpx
+import ipaddress
+import json
+import random
+import re
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+FIRST_HOST = ipaddress.ip_address("10.0.0.1")
+
+class Settings:
+    """Simulation parameters, shared by all hosts."""
+    hosts = 100
+    latency_ms = 30.0
+    jitter_ms = 10.0
+    failure_rate = 0.0       # fraction of requests answered with 503
+    unreachable_rate = 0.0   # fraction of hosts that never answer
+    processors = 2
+    dimms = 16
+    nics = 4
+    controllers = 1
+    drives = 8
+    firmware = 40
+    etags = True
+    expand = True
+    max_levels = 2
+
+settings = Settings()
+stats = Counter()
+# Per host: EventService subscriptions by Id, and the PSU slots failed through /_events
+event_subscriptions: dict[str, dict[str, dict]] = {}
+failed_psus: dict[str, set] = {}
+app = FastAPI(title="Simulated iDRAC Redfish fleet")
+
+def host_ips(count: int):
+    return [str(FIRST_HOST + index) for index in range(count)]
+
+def _host_index(ip: str):
+    try:
+        index = int(ipaddress.ip_address(ip)) - int(FIRST_HOST)
+    except ValueError:
+        return None
+    return index if 0 <= index < settings.hosts else None
+
+def _seed(ip: str, *parts) -> random.Random:
+    return random.Random(hashlib.md5(":".join((ip, *map(str, parts))).encode()).hexdigest())
+
+def _link(path: str):
+    return {"@odata.id": f"/redfish/v1/{path}"}
+
+def _collection(path: str, name: str, member_ids):
+    members = [_link(f"{path}/{member_id}") for member_id in member_ids]
+    return {"@odata.id": f"/redfish/v1/{path}", "Name": name, "Members": members, "Members@odata.count": len(members)}
+
+def _status(rng, healthy=0.98):
+    return {"State": "Enabled", "Health": "OK" if rng.random() < healthy else rng.choice(["Warning", "Critical"])}
+
+def _service_tag(ip: str):
+    return hashlib.md5(ip.encode()).hexdigest()[:7].upper()
+
+SYSTEM = "Systems/System.Embedded.1"
+CHASSIS = "Chassis/System.Embedded.1"
+STORAGE = f"{SYSTEM}/Storage"
+
+def _controller_ids():
+    return [f"RAID.Integrated.{index}-1" for index in range(1, settings.controllers + 1)]
+
+def _drive_ids(controller: str):
+    return [f"Disk.Bay.{bay}:Enclosure.Internal.0-1:{controller}" for bay in range(settings.drives)]
+
+def build_resource(ip: str, path: str):
+    """Returns the Redfish body for a path under /redfish/v1, or None if there is no such resource."""
+    rng = _seed(ip, path)
+    tag = _service_tag(ip)
+    if path == "":
+        return {
+            "@odata.id": "/redfish/v1", "Id": "RootService", "Name": "Root Service", "RedfishVersion": "1.17.0",
+            "Systems": _link("Systems"), "Chassis": _link("Chassis"), "Managers": _link("Managers"),
+            "UpdateService": _link("UpdateService"), "SessionService": _link("SessionService"),
+            "EventService": _link("EventService"),
+            "ProtocolFeaturesSupported": {
+                "ExpandQuery": {"ExpandAll": False, "Levels": settings.expand, "Links": False,
+                                "NoLinks": settings.expand, "MaxLevels": settings.max_levels},
+                "SelectQuery": settings.expand,
+                "FilterQuery": False,
+            },
+        }
+    if path == SYSTEM:
+        return {
+            "@odata.id": f"/redfish/v1/{SYSTEM}", "Id": "System.Embedded.1", "HostName": f"node-{tag.lower()}",
+            "Model": rng.choice(["PowerEdge R650", "PowerEdge R750", "PowerEdge R760", "PowerEdge R7525"]),
+            "SKU": tag, "SerialNumber": f"CN7{rng.randrange(10**12):012d}", "Manufacturer": "Dell Inc.",
+            "Status": _status(rng), "PowerState": "On" if rng.random() < 0.97 else "Off",
+            "BiosVersion": f"1.{rng.randrange(4, 12)}.{rng.randrange(0, 5)}",
+            "Processors": _link(f"{SYSTEM}/Processors"), "Memory": _link(f"{SYSTEM}/Memory"),
+            "EthernetInterfaces": _link(f"{SYSTEM}/EthernetInterfaces"), "Storage": _link(STORAGE),
+            "Oem": {"Dell": {"DellSystem": {
+                "@odata.type": "#DellSystem.v1_3_0.DellSystem", "ChassisServiceTag": tag,
+                "CPURollupStatus": "OK", "FanRollupStatus": "OK", "PSRollupStatus": "OK", "StorageRollupStatus": "OK",
+                "TempRollupStatus": "OK", "VoltRollupStatus": "OK", "ExpressServiceCode": str(int(tag, 36)),
+                "SystemGeneration": "15G Monolithic", "MaxDIMMSlots": 32, "MaxCPUSockets": 2,
+            }}},
+        }
+    if path == f"{SYSTEM}/Processors":
+        return _collection(path, "Processors Collection", [f"CPU.Socket.{n}" for n in range(1, settings.processors + 1)])
+    if path.startswith(f"{SYSTEM}/Processors/CPU.Socket."):
+        socket = path.rsplit(".", 1)[-1]
+        if not socket.isdigit() or not 1 <= int(socket) <= settings.processors:
+            return None
+        cores = _seed(ip, "cpu").choice([16, 24, 28, 32])
+        return {
+            "@odata.id": f"/redfish/v1/{path}", "Id": f"CPU.Socket.{socket}", "Name": "CPU", "Socket": f"CPU.Socket.{socket}",
+            "Manufacturer": "Intel", "Model": f"Intel(R) Xeon(R) Gold 63{cores}Y CPU @ 2.80GHz", "ProcessorType": "CPU",
+            "ProcessorArchitecture": "x86", "InstructionSet": "x86-64", "MaxSpeedMHz": 4000, "TotalCores": cores,
+            "TotalThreads": cores * 2, "Status": _status(rng, 0.995),
+            "Oem": {"Dell": {"DellProcessor": {"CPUFamily": "Intel(R) Xeon(TM)", "Cache1InstalledSizeKB": 80 * cores}}},
+        }
+    if path == f"{SYSTEM}/Memory":
+        return _collection(path, "Memory Collection", [f"DIMM.Socket.{chr(65 + n // 16)}{n % 16 + 1}" for n in range(settings.dimms)])
+    if path.startswith(f"{SYSTEM}/Memory/DIMM.Socket."):
+        return {
+            "@odata.id": f"/redfish/v1/{path}", "Id": path.rsplit("/", 1)[-1], "Name": "DIMM",
+            "DeviceLocator": path.rsplit(".", 1)[-1], "CapacityMiB": 32768, "MemoryDeviceType": "DDR4",
+            "MemoryType": "DRAM", "OperatingSpeedMhz": 3200, "Manufacturer": rng.choice(["Micron Technology", "Samsung", "Hynix Semiconductor"]),
+            "PartNumber": "36ASF4G72PZ-3G2R1", "SerialNumber": f"{rng.randrange(16**8):08X}", "RankCount": 2,
+            "Status": _status(rng, 0.995), "Oem": {"Dell": {"DellMemory": {"RemainingRatedWriteEndurancePercent": None}}},
+        }
+    if path == f"{SYSTEM}/EthernetInterfaces":
+        return _collection(path, "System Ethernet Interface Collection", [f"NIC.Integrated.1-{n}-1" for n in range(1, settings.nics + 1)])
+    if path.startswith(f"{SYSTEM}/EthernetInterfaces/NIC."):
+        mac = ":".join(f"{rng.randrange(256):02X}" for _ in range(6))
+        return {
+            "@odata.id": f"/redfish/v1/{path}", "Id": path.rsplit("/", 1)[-1], "Name": "System Ethernet Interface",
+            "Description": "Integrated NIC 1 Port", "MACAddress": mac, "PermanentMACAddress": mac, "SpeedMbps": 25000,
+            "AutoNeg": True, "FullDuplex": True, "LinkStatus": "LinkUp" if rng.random() < 0.8 else "LinkDown",
+            "Status": _status(rng, 0.995),
+        }
+    if path == STORAGE:
+        return _collection(path, "Storage Collection", _controller_ids())
+    for controller in _controller_ids():
+        if path == f"{STORAGE}/{controller}":
+            return {
+                "@odata.id": f"/redfish/v1/{path}", "Id": controller, "Name": "PERC H755 Front",
+                "StorageControllers": [{
+                    "MemberId": controller, "Name": "PERC H755 Front", "FirmwareVersion": "52.16.1-4405",
+                    "SpeedGbps": 12, "SupportedRAIDTypes": ["RAID0", "RAID1", "RAID5", "RAID6", "RAID10"], "Status": _status(rng),
+                }],
+                "Drives": [_link(f"{path}/Drives/{drive}") for drive in _drive_ids(controller)],
+                "Oem": {"Dell": {"DellController": {"CacheSizeInMB": 8192, "PatrolReadState": "Stopped", "SecurityStatus": "SecurityKeyAssigned"}}},
+            }
+        if path.startswith(f"{STORAGE}/{controller}/Drives/"):
+            drive = path.rsplit("/", 1)[-1]
+            if drive not in _drive_ids(controller):
+                return None
+            return {
+                "@odata.id": f"/redfish/v1/{path}", "Id": drive, "Name": f"Solid State Disk {drive.split(':')[0][10:]}",
+                "CapacityBytes": 1920383410176, "MediaType": "SSD", "Protocol": "SAS", "Manufacturer": "TOSHIBA",
+                "Model": "KPM6XRUG1T92", "SerialNumber": f"{rng.randrange(16**8):08X}", "Revision": "BD48",
+                "PredictedMediaLifeLeftPercent": 100 - rng.randrange(10), "Status": _status(rng, 0.99),
+                "Oem": {"Dell": {"DellPhysicalDisk": {"RaidStatus": "Online", "SystemEraseCapability": "CryptographicErasePD"}}},
+            }
+    if path == f"{CHASSIS}/Thermal":
+        # Readings change on every request, like real sensors
+        live = random.Random()
+        return {
+            "@odata.id": f"/redfish/v1/{path}", "Id": "Thermal",
+            "Fans": [{"MemberId": f"Fan.Embedded.{n}", "Name": f"System Board Fan{n}", "Reading": live.randrange(5000, 9000, 120),
+                      "ReadingUnits": "RPM", "Status": _status(rng, 0.995)} for n in range(1, 7)],
+            "Temperatures": [
+                {"MemberId": "iDRAC.Embedded.1#SystemBoardInletTemp", "Name": "System Board Inlet Temp",
+                 "ReadingCelsius": live.randrange(18, 30), "Status": _status(rng, 0.999)},
+                {"MemberId": "iDRAC.Embedded.1#SystemBoardExhaustTemp", "Name": "System Board Exhaust Temp",
+                 "ReadingCelsius": live.randrange(30, 50), "Status": _status(rng, 0.999)},
+                *({"MemberId": f"iDRAC.Embedded.1#CPU{n}Temp", "Name": f"CPU{n} Temp",
+                   "ReadingCelsius": live.randrange(40, 85), "Status": _status(rng, 0.999)} for n in range(1, settings.processors + 1)),
+            ],
+        }
+    if path == f"{CHASSIS}/Power":
+        live = random.Random()
+        return {
+            "@odata.id": f"/redfish/v1/{path}", "Id": "Power",
+            "PowerSupplies": [{
+                "MemberId": f"PSU.Slot.{n}", "Name": f"PS{n} Status", "PowerInputWatts": live.randrange(180, 420),
+                "PowerCapacityWatts": 1400, "LineInputVoltage": 230, "FirmwareVersion": "00.1D.7D",
+                "Status": {"State": "Enabled", "Health": "Critical"} if n in failed_psus.get(ip, ()) else _status(rng, 0.99),
+                "Oem": {"Dell": {"DellPowerSupply": {"IsSwitchCapable": False, "OperationalStatus": ["OK"]}}},
+            } for n in (1, 2)],
+        }
+    if path == "EventService/Subscriptions":
+        return _collection(path, "Event Subscriptions Collection", list(event_subscriptions.get(ip, {})))
+    if path.startswith("EventService/Subscriptions/"):
+        return event_subscriptions.get(ip, {}).get(path.rsplit("/", 1)[-1])
+    if path == "UpdateService/FirmwareInventory":
+        members = [f"Installed-{25227 + n}-{rng.randrange(1, 30)}.{rng.randrange(0, 9)}.{rng.randrange(0, 9)}" for n in range(settings.firmware)]
+        return _collection(path, "Firmware Inventory Collection", members)
+    if path == "Managers/iDRAC.Embedded.1/Oem/Dell/DellWarranty":
+        start = 2019 + rng.randrange(5)
+        return {
+            "@odata.id": f"/redfish/v1/{path}", "Id": "DellWarranty",
+            "WarrantyStartDate": f"{start}-0{rng.randrange(1, 10)}-15T00:00:00-05:00",
+            "WarrantyEndDate": f"{start + rng.choice([3, 5, 7])}-0{rng.randrange(1, 10)}-15T00:00:00-05:00",
+            "WarrantyStatus": "Active",
+        }
+    return None
+
+# Link arrays that $expand replaces with the resources they point to
+EXPANDABLE = ("Members", "Drives")
+
+def _expand(ip: str, body: dict, levels: int, select: set):
+    for key in EXPANDABLE:
+        if key in body and levels > 0:
+            expanded = []
+            for link in body[key]:
+                member = build_resource(ip, link["@odata.id"][len("/redfish/v1/"):])
+                if member is None:
+                    expanded.append(link)
+                    continue
+                member = _expand(ip, member, levels - 1, set())
+                if select:
+                    member = {field: value for field, value in member.items() if field in select or field.startswith("@odata.")}
+                expanded.append(member)
+            body[key] = expanded
+    return body
+
+@app.get("/_hosts")
+def list_hosts():
+    return {"hosts": host_ips(settings.hosts)}
+
+@app.get("/_stats")
+def get_stats():
+    return dict(stats)
+
+@app.post("/_stats/reset")
+def reset_stats():
+    stats.clear()
+    return {}
+
+async def _simulate(ip: str):
+    """Applies latency, jitter and failures. Returns an error response, or None to carry on."""
+    index = _host_index(ip)
+    if index is None:
+        return JSONResponse({"error": "unknown host"}, status_code=404)
+    if _seed(ip, "unreachable").random() < settings.unreachable_rate:
+        stats["unreachable"] += 1
+        await asyncio.sleep(3600)  # Never answers; the client's timeout fires first
+    delay = settings.latency_ms + random.uniform(-settings.jitter_ms, settings.jitter_ms)
+    await asyncio.sleep(max(delay, 0) / 1000)
+    if random.random() < settings.failure_rate:
+        stats["failed"] += 1
+        return JSONResponse({"error": {"message": "Service temporarily unavailable"}}, status_code=503)
+    return None
+
+@app.post("/hosts/{ip}/redfish/v1/SessionService/Sessions")
+async def create_session(ip: str):
+    stats["session_logins"] += 1
+    error = await _simulate(ip)
+    if error:
+        return error
+    token = uuid.uuid4().hex
+    return JSONResponse(
+        {"@odata.id": f"/redfish/v1/SessionService/Sessions/{token[:8]}", "Id": token[:8], "UserName": "root"},
+        status_code=201,
+        headers={"X-Auth-Token": token, "Location": f"/redfish/v1/SessionService/Sessions/{token[:8]}"},
+    )
+
+@app.delete("/hosts/{ip}/redfish/v1/SessionService/Sessions/{session_id}")
+async def delete_session(ip: str, session_id: str):
+    stats["session_logouts"] += 1
+    return Response(status_code=204)
+
+@app.post("/hosts/{ip}/redfish/v1/EventService/Subscriptions")
+async def create_subscription(ip: str, request: Request):
+    stats["subscriptions"] += 1
+    error = await _simulate(ip)
+    if error:
+        return error
+    body = await request.json()
+    if not body.get("Destination"):
+        return JSONResponse({"error": {"message": "Destination is required"}}, status_code=400)
+    subscription_id = uuid.uuid4().hex[:8]
+    path = f"/redfish/v1/EventService/Subscriptions/{subscription_id}"
+    event_subscriptions.setdefault(ip, {})[subscription_id] = {
+        "@odata.id": path, "Id": subscription_id, "Protocol": "Redfish", "EventFormatType": "Event", **body,
+    }
+    return JSONResponse(event_subscriptions[ip][subscription_id], status_code=201, headers={"Location": path})
+
+def _event_payload(ip: str, kind: str):
+    now = datetime.now(timezone.utc).isoformat()
+    if kind == "metric_report":
+        live = random.Random()
+        return "MetricReport", {
+            "@odata.type": "#MetricReport.v1_4_2.MetricReport", "Id": "ThermalSensor", "Timestamp": now,
+            "MetricValues": [{"MetricId": "TemperatureReading", "MetricValue": str(live.randrange(18, 30)), "Timestamp": now,
+                              "MetricProperty": f"/redfish/v1/{CHASSIS}/Thermal#/Temperatures/0/ReadingCelsius"}],
+        }
+    failed = kind == "psu_failure"
+    return "Event", {
+        "@odata.type": "#Event.v1_7_0.Event", "Id": uuid.uuid4().hex[:8], "Name": "Event Array",
+        "Events": [{
+            "EventType": "Alert", "EventId": "2312", "EventTimestamp": now,
+            "MessageId": "IDRAC.2.8.PSU0003" if failed else "IDRAC.2.8.PSU0000",
+            "Message": "The power supply 1 has lost input." if failed else "The power supply 1 is present.",
+            "MessageSeverity": "Critical" if failed else "OK",
+            "OriginOfCondition": _link(f"{CHASSIS}/Power/PowerSupplies/PSU.Slot.1"),
+        }],
+    }
+
+@app.post("/_events/{ip}")
+async def emit_event(ip: str, kind: str = "psu_failure"):
+    """Stand-in for an iDRAC alert: changes the host's state and pushes the event to its subscribers."""
+    if kind not in ("psu_failure", "psu_restored", "metric_report"):
+        return JSONResponse({"error": "kind must be psu_failure, psu_restored or metric_report"}, status_code=400)
+    if kind == "psu_failure":
+        failed_psus.setdefault(ip, set()).add(1)
+    elif kind == "psu_restored":
+        failed_psus.get(ip, set()).discard(1)
+    event_format, payload = _event_payload(ip, kind)
+    delivered = []
+    async with httpx.AsyncClient(verify=False, timeout=10) as client:
+        for subscription in event_subscriptions.get(ip, {}).values():
+            if subscription.get("EventFormatType", "Event") != event_format:
+                continue
+            try:
+                response = await client.post(subscription["Destination"], json={**payload, "Context": subscription.get("Context")})
+                delivered.append({"destination": subscription["Destination"], "status": response.status_code})
+            except httpx.HTTPError as e:
+                delivered.append({"destination": subscription["Destination"], "error": str(e)})
+    stats["events_sent"] += len(delivered)
+    return {"kind": kind, "delivered": delivered}
+
+EXPAND_PATTERN = re.compile(r"\.\(\$levels=(\d+)\)")
+
+@app.get("/hosts/{ip}/redfish/v1{path:path}")
+async def get_resource(ip: str, path: str, request: Request):
+    stats["requests"] += 1
+    error = await _simulate(ip)
+    if error:
+        return error
+    body = build_resource(ip, path.strip("/"))
+    if body is None:
+        stats["not_found"] += 1
+        return JSONResponse({"error": {"message": "Resource not found"}}, status_code=404)
+
+    expand = request.query_params.get("$expand")
+    if expand and settings.expand:
+        stats["expanded"] += 1
+        match = EXPAND_PATTERN.fullmatch(expand)
+        levels = min(int(match.group(1)), settings.max_levels) if match else 1
+        select = set(filter(None, request.query_params.get("$select", "").split(",")))
+        body = _expand(ip, body, levels, select)
+
+    content = json.dumps(body).encode()
+    headers = {}
+    if settings.etags:
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        headers["ETag"] = etag
+        if request.headers.get("if-none-match") == etag:
+            stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+    stats["bytes_sent"] += len(content)
+    return Response(content, media_type="application/json", headers=headers)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.mock_redfish", description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--hosts", type=int, default=Settings.hosts, help="Number of simulated iDRACs")
+    parser.add_argument("--latency-ms", type=float, default=Settings.latency_ms, help="Mean response latency")
+    parser.add_argument("--jitter-ms", type=float, default=Settings.jitter_ms, help="Latency varies uniformly by up to this much")
+    parser.add_argument("--failure-rate", type=float, default=Settings.failure_rate, help="Fraction of requests answered with 503")
+    parser.add_argument("--unreachable-rate", type=float, default=Settings.unreachable_rate, help="Fraction of hosts that never answer")
+    for name in ("processors", "dimms", "nics", "controllers", "drives", "firmware"):
+        parser.add_argument(f"--{name}", type=int, default=getattr(Settings, name), help=f"Members per host (default {getattr(Settings, name)})")
+    parser.add_argument("--no-etags", dest="etags", action="store_false", help="Don't send ETags or honour If-None-Match")
+    parser.add_argument("--no-expand", dest="expand", action="store_false", help="Don't advertise or honour $expand/$select")
+    args = parser.parse_args(argv)
+    for name, value in vars(args).items():
+        if hasattr(Settings, name):
+            setattr(settings, name, value)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Collection pipeline benchmark against the simulated iDRAC fleet in bench/mock_redfish.py.
+
+    python -m bench.run --hosts 10,100,1000,5000
+    python -m bench.run --hosts 1000 --pipeline --output results.json
+    python -m bench.run --hosts 1000 --baseline results.json   # exits 1 on a regression
+
+Starts the simulator (unless --mock-url is given), then measures each fleet size in a fresh
+process. It runs two poll cycles over every host: a cold one (logins, capability probes,
+empty ETag cache) and a warm one. For each cycle it reports per-host get_full_details
+latency, the fleet-wide cycle time and the requests the simulator served. It also reports
+the process's peak memory. --pipeline times monitor.poll_host instead, including the
+SQLite writes, against a throwaway database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+async def run_cycle(hosts, workers, pipeline):
+    """Polls every host once with `workers` in parallel. Returns per-host seconds, failures and wall time."""
+    from app.config import IDRAC_USERNAME, IDRAC_PASSWORD
+    from app.services import monitor
+    from app.services.idrac_client import IdracClient
+
+    queue = asyncio.Queue()
+    for ip in hosts:
+        queue.put_nowait(ip)
+    latencies, failures = [], 0
+
+    async def worker():
+        nonlocal failures
+        while not queue.empty():
+            ip = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                if pipeline:
+                    await monitor.poll_host(ip)
+                else:
+                    details = await IdracClient(ip, IDRAC_USERNAME, IDRAC_PASSWORD, ip=ip).get_full_details()
+                    if details.get("status") == "error":
+                        raise RuntimeError(details.get("message"))
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(workers, len(hosts)))))
+    return latencies, failures, time.perf_counter() - started
+
+async def measure(args):
+    """Runs in the child process: benchmarks one fleet size and prints a JSON result."""
+    from app import database
+    from app.config import POLL_WORKERS
+    from app.services.idrac_client import close_pools, close_sessions
+
+    async with httpx.AsyncClient(base_url=args.mock_url) as mock:
+        hosts = (await mock.get("/_hosts")).json()["hosts"][:args.size]
+        if len(hosts) < args.size:
+            raise SystemExit(f"The simulator only has {len(hosts)} hosts; start it with --hosts {args.size}")
+        if args.pipeline:
+            database.init_db()
+            database.import_servers(
+                [{"DataCenterID": "bench", "Cabinet": f"c{n // 40}", "Position": str(n % 40), "Hostname": ip, "iDRAC_IP": ip}
+                 for n, ip in enumerate(hosts)],
+                "update",
+            )
+
+        result = {"hosts": args.size, "workers": args.workers or POLL_WORKERS, "pipeline": args.pipeline}
+        for cycle in ("cold", "warm"):
+            await mock.post("/_stats/reset")
+            latencies, failures, wall = await run_cycle(hosts, args.workers or POLL_WORKERS, args.pipeline)
+            served = (await mock.get("/_stats")).json()
+            result[cycle] = {
+                "cycle_seconds": round(wall, 3),
+                "hosts_per_second": round(len(hosts) / wall, 1),
+                "host_p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+                "host_p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+                "host_p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+                "host_max_ms": round(max(latencies) * 1000, 1),
+                "failed_hosts": failures,
+                "requests": served.get("requests", 0) + served.get("session_logins", 0),
+                "requests_per_host": round((served.get("requests", 0) + served.get("session_logins", 0)) / len(hosts), 1),
+                "not_modified": served.get("not_modified", 0),
+                "bytes_per_host": round(served.get("bytes_sent", 0) / len(hosts)),
+            }
+        await close_sessions()
+        await close_pools()
+    # ru_maxrss is in KiB on Linux
+    result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(json.dumps(result))
+
+def run_size(args, size):
+    """Benchmarks one fleet size in a fresh interpreter so peak memory and caches are its own."""
+    env = {
+        **os.environ,
+        "REDFISH_BASE_URL_TEMPLATE": f"{args.mock_url}/hosts/{{ip}}",
+        "POLLER_ENABLED": "false",
+        "DATABASE_FILE": os.path.join(args.workdir, f"bench-{size}.db"),
+    }
+    command = [sys.executable, "-m", "bench.run", "--child", "--size", str(size), "--mock-url", args.mock_url]
+    if args.pipeline:
+        command.append("--pipeline")
+    if args.workers:
+        command += ["--workers", str(args.workers)]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def start_mock(args, hosts):
+    command = [sys.executable, "-m", "bench.mock_redfish", "--port", str(args.mock_port), "--hosts", str(hosts), *args.mock_args]
+    process = subprocess.Popen(command)
+    for _ in range(100):
+        try:
+            httpx.get(f"{args.mock_url}/_hosts", timeout=1).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit("The simulator did not start")
+
+def compare(results, baseline_file, tolerance):
+    """Prints the change against a previous --output file. Returns False if any cycle got slower than tolerance."""
+    with open(baseline_file) as f:
+        baseline = {(entry["hosts"], entry["pipeline"]): entry for entry in json.load(f)}
+    ok = True
+    for result in results:
+        previous = baseline.get((result["hosts"], result["pipeline"]))
+        if not previous:
+            continue
+        for cycle in ("cold", "warm"):
+            before, after = previous[cycle]["cycle_seconds"], result[cycle]["cycle_seconds"]
+            change = (after - before) / before if before else 0
+            regressed = change > tolerance
+            ok = ok and not regressed
+            print(f"{result['hosts']:>6} hosts {cycle}: {before:.2f}s -> {after:.2f}s ({change:+.0%}){'  REGRESSION' if regressed else ''}")
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description="Benchmark the iDRAC collection pipeline")
+    parser.add_argument("--hosts", default="10,100,1000", help="Comma-separated fleet sizes to measure")
+    parser.add_argument("--workers", type=int, help="Hosts polled in parallel (default: POLL_WORKERS)")
+    parser.add_argument("--pipeline", action="store_true", help="Time monitor.poll_host (crawl + SQLite writes) instead of the bare client")
+    parser.add_argument("--mock-url", help="Use an already running simulator instead of starting one")
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--mock-args", default="", help='Extra simulator options, e.g. "--latency-ms 80 --failure-rate 0.01"')
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Compare with a previous --output file and exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Slowdown allowed against --baseline (default 0.15)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        asyncio.run(measure(args))
+        return 0
+
+    sizes = [int(size) for size in args.hosts.split(",")]
+    args.mock_args = args.mock_args.split()
+    mock = None
+    if not args.mock_url:
+        args.mock_url = f"http://127.0.0.1:{args.mock_port}"
+        mock = start_mock(args, max(sizes))
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as args.workdir:
+            for size in sizes:
+                result = run_size(args, size)
+                results.append(result)
+                for cycle in ("cold", "warm"):
+                    stats = result[cycle]
+                    print(f"{size:>6} hosts {cycle}: cycle {stats['cycle_seconds']:.2f}s ({stats['hosts_per_second']} hosts/s), "
+                          f"per host p50 {stats['host_p50_ms']}ms p95 {stats['host_p95_ms']}ms max {stats['host_max_ms']}ms, "
+                          f"{stats['requests_per_host']} req/host, {stats['not_modified']} not modified, "
+                          f"{stats['failed_hosts']} failed")
+                print(f"{size:>6} hosts peak RSS {result['peak_rss_mb']} MB")
+    finally:
+        if mock:
+            mock.terminate()
+            mock.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline and not compare(results, args.baseline, args.tolerance):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+import pytest
+from app import database
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh, migrated database for one test; yields this thread's connection."""
+    monkeypatch.setattr(database, "DATABASE_FILE", str(tmp_path / "servers.db"))
+    database.close_connections()
+    database.init_db()
+    yield database.get_connection()
+    database.close_connections()
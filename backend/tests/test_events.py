@@ -0,0 +1,38 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routes import events
+
+ALERT = {"Context": "h1", "Events": [{"MessageId": "IDRAC.2.8.PSU0003"}]}
+
+@pytest.fixture
+def client(db, monkeypatch):
+    db.execute("INSERT INTO servers (DataCenterID, Cabinet, Position, Hostname, iDRAC_IP) VALUES ('d', 'c', '1', 'h1', '10.0.0.1')")
+    requested = []
+    monkeypatch.setattr(events.refresher, "request", lambda hostname, sections: requested.append((hostname, sections)))
+    app = FastAPI()
+    app.include_router(events.router)
+    client = TestClient(app)
+    client.requested = requested
+    return client
+
+def test_receiver_is_off_unless_events_are_enabled(client, monkeypatch):
+    monkeypatch.setattr(events, "EVENTS_ENABLED", False)
+    monkeypatch.setattr(events, "EVENT_TOKEN", "secret")
+    assert client.post("/events/redfish?token=secret", json=ALERT).status_code == 404
+    assert client.requested == []
+
+@pytest.mark.parametrize("configured, sent", [("", ""), ("secret", ""), ("secret", "wrong")])
+def test_receiver_requires_the_token(client, monkeypatch, configured, sent):
+    monkeypatch.setattr(events, "EVENTS_ENABLED", True)
+    monkeypatch.setattr(events, "EVENT_TOKEN", configured)
+    assert client.post(f"/events/redfish?token={sent}", json=ALERT).status_code == 403
+    assert client.requested == []
+
+def test_alert_refreshes_the_affected_sections(client, monkeypatch):
+    monkeypatch.setattr(events, "EVENTS_ENABLED", True)
+    monkeypatch.setattr(events, "EVENT_TOKEN", "secret")
+    assert client.post("/events/redfish?token=secret", json=ALERT).status_code == 204
+    assert client.requested == [("h1", {"system", "thermals_and_power"})]
+    unknown = {**ALERT, "Context": "nobody"}
+    assert client.post("/events/redfish?token=secret", json=unknown).status_code == 404
@@ -0,0 +1,119 @@
+import copy
+import pytest
+from app.services import history
+
+CASES = {
+    "nested values": (
+        {"system": {"health": "OK", "bios": {"version": "2.1"}}},
+        {"system": {"health": "Critical", "bios": {"version": "2.2"}}},
+    ),
+    "keys added and removed": (
+        {"system": {"health": "OK", "asset_tag": "A1"}},
+        {"system": {"health": "OK", "owner": "ops"}, "warranty": {"ends": "2027-01-01"}},
+    ),
+    "list items changed in place": (
+        {"hardware": {"dimms": [{"slot": "A1", "size": 32}, {"slot": "A2", "size": 32}]}},
+        {"hardware": {"dimms": [{"slot": "A1", "size": 32}, {"slot": "A2", "size": 64}]}},
+    ),
+    "list item inserted in the middle": (
+        {"storage": {"drives": ["d0", "d1", "d3"]}},
+        {"storage": {"drives": ["d0", "d1", "d2", "d3"]}},
+    ),
+    "list items removed": (
+        {"storage": {"drives": ["d0", "d1", "d2", "d3"]}},
+        {"storage": {"drives": ["d0", "d3"]}},
+    ),
+    "list emptied and refilled": (
+        {"firmware": []},
+        {"firmware": [{"name": "BIOS", "version": "2.2"}]},
+    ),
+    "type changes": (
+        {"system": {"memory": 512, "cpus": ["a"], "tags": {"x": 1}, "flag": 1, "ratio": 1}},
+        {"system": {"memory": "512 GiB", "cpus": {"count": 1}, "tags": ["x"], "flag": True, "ratio": 1.0}},
+    ),
+    "whole state replaced": (
+        {"system": {"health": "OK"}},
+        ["not", "a", "dict"],
+    ),
+}
+
+@pytest.mark.parametrize("old, new", CASES.values(), ids=CASES.keys())
+def test_patch_applies_diff(old, new):
+    ops = history.diff(old, new)
+    result = history.patch(copy.deepcopy(old), copy.deepcopy(ops))
+    assert result == new
+    assert [type(value) for value in _leaves(result)] == [type(value) for value in _leaves(new)]
+
+def test_equal_states_have_an_empty_diff():
+    state = {"system": {"health": "OK"}, "storage": {"drives": [1, 2]}}
+    assert history.diff(state, copy.deepcopy(state)) == []
+
+def _leaves(value):
+    if isinstance(value, dict):
+        return [leaf for key in sorted(value) for leaf in _leaves(value[key])]
+    if isinstance(value, list):
+        return [leaf for item in value for leaf in _leaves(item)]
+    return [value]
+
+def _snapshot(version: int):
+    # A firmware list big enough that each diff is much smaller than a base
+    return {
+        "system": {"health": "OK" if version % 3 else "Warning", "bios_version": f"2.{version}"},
+        "firmware": [{"name": f"component-{n}", "version": f"1.{n}"} for n in range(40)],
+        "thermals_and_power": {"reading": version},  # not versioned
+    }
+
+def _record(conn, count: int):
+    previous = {}
+    for version in range(count):
+        snapshot = _snapshot(version)
+        history.append(conn, "h1", 1000.0 + version * 10, previous, snapshot)
+        previous = snapshot
+
+def _kinds(conn):
+    return [kind for kind, in conn.execute("SELECT kind FROM snapshot_history WHERE host = 'h1' ORDER BY ts")]
+
+def test_state_at_across_rebases(db, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_REBASE_EVERY", 3)
+    _record(db, 10)
+    kinds = _kinds(db)
+    assert kinds.count(history.BASE) > 1 and history.DIFF in kinds
+
+    for version in range(10):
+        recorded_at, state = history.state_at(db, "h1", 1000.0 + version * 10)
+        assert recorded_at == 1000.0 + version * 10
+        assert state == history.versioned_state(_snapshot(version))
+    # Between two polls the earlier one is current; before the first there is nothing
+    assert history.state_at(db, "h1", 1045.0)[1] == history.versioned_state(_snapshot(4))
+    assert history.state_at(db, "h1", 999.0) == (None, None)
+    assert history.state_at(db, "other", 1045.0) == (None, None)
+
+def test_unchanged_state_is_not_recorded_again(db):
+    history.append(db, "h1", 1000.0, {}, _snapshot(1))
+    changed_sensors = {**_snapshot(1), "thermals_and_power": {"reading": 99}}
+    history.append(db, "h1", 1010.0, _snapshot(1), changed_sensors)
+    assert len(_kinds(db)) == 1
+
+def test_changes_lists_diffs_and_rebases(db, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_REBASE_EVERY", 3)
+    _record(db, 6)
+    log = history.changes(db, "h1", 1000.0, 1050.0)
+    assert [entry["timestamp"] for entry in log] == [1010.0 + n * 10 for n in range(5)]
+    bios = [change for change in log[0]["changes"] if change["path"] == "system.bios_version"]
+    assert bios == [{"path": "system.bios_version", "old": "2.0", "new": "2.1"}]
+    assert history.changes(db, "h1", 1000.0, 1050.0, sections=("firmware",)) == []
+
+def test_prune_keeps_the_base_later_diffs_need(db, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_REBASE_EVERY", 3)
+    _record(db, 10)
+    bases = [ts for ts, in db.execute("SELECT ts FROM snapshot_history WHERE kind = ? ORDER BY ts", (history.BASE,))]
+    cutoff = bases[1] + 15  # after the second base, before the third
+    assert cutoff < bases[2]
+
+    history.prune(db, cutoff)
+    remaining = [(ts, kind) for ts, kind in db.execute("SELECT ts, kind FROM snapshot_history ORDER BY ts")]
+    assert remaining[0] == (bases[1], history.BASE)
+    for version in range(10):
+        timestamp = 1000.0 + version * 10
+        if timestamp >= bases[1]:
+            assert history.state_at(db, "h1", timestamp)[1] == history.versioned_state(_snapshot(version))
@@ -0,0 +1,30 @@
+import asyncio
+from app.services import importer
+from app.services.cache import details_cache
+
+CSV = "DataCenterID,Cabinet,Position,Hostname,Label\nd,c1,1,idrac-01,web01\n"
+
+def test_reimport_refreshes_dns_and_drops_cached_sections(db, monkeypatch):
+    answers = {"idrac-01": None}
+    lookups = []
+
+    async def query(hostname):
+        lookups.append(hostname)
+        return answers[hostname], 300
+
+    monkeypatch.setattr(importer.resolver, "_query", query)
+
+    # The first import fails to resolve, and the failure is cached
+    report = asyncio.run(importer.import_servers(importer.parse_csv(CSV)))
+    assert report["rows"][0]["status"] == "error"
+
+    # Once the record is fixed, importing again looks it up anew instead of reusing the failure
+    answers["idrac-01"] = "10.0.0.1"
+    report = asyncio.run(importer.import_servers(importer.parse_csv(CSV)))
+    assert report["rows"][0]["status"] == "inserted"
+    assert lookups == ["idrac-01", "idrac-01"]
+
+    details_cache.set(("10.0.0.1", "system"), {"data": {"health": "OK"}, "collected_at": None})
+    report = asyncio.run(importer.import_servers(importer.parse_csv(CSV.replace("web01", "web02")), "update"))
+    assert report["rows"][0]["status"] == "updated"
+    assert ("10.0.0.1", "system") not in details_cache
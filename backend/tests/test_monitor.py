@@ -0,0 +1,50 @@
+import asyncio
+from app.services import monitor
+
+async def _wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def test_scheduler_survives_host_dropped_while_queue_is_full(monkeypatch):
+    """A host removed while the scheduler waits on a full queue is skipped, and polling carries on."""
+    hosts = [f"10.0.0.{n}" for n in range(1, 6)]
+    polled = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def fake_poll_host(hostname, sections=None):
+            polled.append(hostname)
+            await release.wait()
+
+        async def fake_resolve_many(hostnames):
+            return {}
+
+        monkeypatch.setattr(monitor, "poll_host", fake_poll_host)
+        monkeypatch.setattr(monitor.database, "get_all_servers", lambda: [{"hostname": h, "ip": h} for h in hosts])
+        monkeypatch.setattr(monitor.resolver, "resolve_many", fake_resolve_many)
+        monkeypatch.setattr(monitor, "POLL_HOST_REFRESH_INTERVAL", 3600)
+
+        poller = monitor.FleetPoller(intervals={"system": 0.01}, jitter=0, workers=1)
+        await poller.start()
+        try:
+            # One host is being polled, one fills the queue and the scheduler is blocked on a third
+            await _wait_for(lambda: poller.stats()["busy_workers"] == 1 and poller.stats()["queued"] == 1)
+            await asyncio.sleep(0.05)
+
+            kept = polled[0]
+            hosts[:] = [kept]
+            await poller.refresh_hosts()
+            assert poller.stats()["hosts"] == 1
+            release.set()
+            count = len(polled)
+            # The scheduler is still running: the kept host keeps being polled, the dropped ones never again
+            await _wait_for(lambda: len(polled) >= count + 3)
+            assert set(polled[1:]) == {kept}
+        finally:
+            await poller.stop()
+        assert poller.stats()["workers"] == 0
+
+    asyncio.run(scenario())
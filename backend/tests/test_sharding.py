@@ -0,0 +1,105 @@
+import asyncio
+from app.services import sharding
+
+class FakePoller:
+    def __init__(self):
+        self.only_hosts = None
+        self.refreshes = 0
+
+    async def refresh_hosts(self):
+        self.refreshes += 1
+
+def test_worker_stops_polling_when_it_cannot_renew_its_leases(monkeypatch):
+    clock = [1000.0]
+    failing = [False]
+
+    def claim_hosts(worker_id, hosts, now, lease_expires):
+        if failing[0]:
+            raise OSError("database is unavailable")
+        return set(hosts)
+
+    monkeypatch.setattr(sharding.time, "time", lambda: clock[0])
+    monkeypatch.setattr(sharding.database, "worker_heartbeat", lambda *args: ["w1"])
+    monkeypatch.setattr(sharding.database, "get_all_servers", lambda: [{"hostname": "h1"}, {"hostname": "h2"}])
+    monkeypatch.setattr(sharding.database, "claim_hosts", claim_hosts)
+
+    poller = FakePoller()
+    member = sharding.ShardMember(poller, "w1", interval=5, timeout=20)
+
+    async def scenario():
+        await member.heartbeat()
+        assert poller.only_hosts == {"h1", "h2"}
+
+        failing[0] = True
+        # Leases claimed at t=1000 run until t=1020; keep polling while a heartbeat is still left
+        clock[0] = 1010.0
+        await member.heartbeat()
+        assert poller.only_hosts == {"h1", "h2"}
+
+        clock[0] = 1016.0
+        await member.heartbeat()
+        assert poller.only_hosts == set()
+        assert member.assigned == set()
+
+        # Polling resumes once the leases can be claimed again
+        failing[0] = False
+        clock[0] = 1030.0
+        await member.heartbeat()
+        assert poller.only_hosts == {"h1", "h2"}
+
+    asyncio.run(scenario())
+
+HOSTS = [f"idrac-{n:04d}.example.com" for n in range(3000)]
+
+def _owners(workers):
+    ring = sharding.HashRing(workers)
+    return {host: ring.owner(host) for host in HOSTS}
+
+def test_ring_spreads_hosts_evenly():
+    owners = _owners(["w1", "w2", "w3"])
+    counts = [list(owners.values()).count(worker) for worker in ("w1", "w2", "w3")]
+    assert all(700 <= count <= 1300 for count in counts), counts
+    assert sharding.HashRing([]).owner("h1") is None
+
+def test_ring_only_moves_hosts_to_or_from_the_changed_worker():
+    before = _owners(["w1", "w2", "w3"])
+    joined = _owners(["w1", "w2", "w3", "w4"])
+    moved = {host for host in HOSTS if before[host] != joined[host]}
+    assert moved and all(joined[host] == "w4" for host in moved)
+    assert 400 <= len(moved) <= 1100
+
+    left = _owners(["w1", "w3"])
+    moved = {host for host in HOSTS if before[host] != left[host]}
+    assert moved == {host for host in HOSTS if before[host] == "w2"}
+    # The ring is the same whatever order the workers are listed in
+    assert _owners(["w3", "w1", "w2"]) == before
+
+def test_lease_is_not_taken_before_it_expires(db):
+    assert sharding.database.claim_hosts("w1", ["h1", "h2"], 1000, 1020) == {"h1", "h2"}
+    assert sharding.database.claim_hosts("w2", ["h2", "h3"], 1010, 1030) == {"h3"}
+    # Once w1 stops renewing, w2 takes h2 after the lease runs out and not before
+    assert sharding.database.claim_hosts("w2", ["h2", "h3"], 1020, 1040) == {"h3"}
+    assert sharding.database.claim_hosts("w2", ["h2", "h3"], 1021, 1041) == {"h2", "h3"}
+
+def test_renewal_extends_the_lease(db):
+    sharding.database.claim_hosts("w1", ["h1"], 1000, 1020)
+    assert sharding.database.claim_hosts("w1", ["h1"], 1015, 1035) == {"h1"}
+    assert sharding.database.claim_hosts("w2", ["h1"], 1025, 1045) == set()
+    assert db.execute("SELECT worker_id, lease_expires FROM poll_assignments").fetchall() == [("w1", 1035)]
+
+def test_unwanted_and_released_hosts_are_freed_at_once(db):
+    sharding.database.claim_hosts("w1", ["h1", "h2", "h3"], 1000, 1020)
+    # h3 now belongs elsewhere on the ring: w1 lets go of it at its next claim
+    assert sharding.database.claim_hosts("w1", ["h1", "h2"], 1005, 1025) == {"h1", "h2"}
+    assert sharding.database.claim_hosts("w2", ["h3"], 1006, 1026) == {"h3"}
+
+    sharding.database.worker_heartbeat("w1", "node", 1, 1006, 20)
+    sharding.database.release_worker("w1")
+    assert sharding.database.claim_hosts("w2", ["h1", "h2", "h3"], 1007, 1027) == {"h1", "h2", "h3"}
+    workers, _ = sharding.database.get_poll_workers(1007)
+    assert [worker["worker_id"] for worker in workers] == []
+
+def test_heartbeat_lists_live_workers_and_forgets_silent_ones(db):
+    assert sharding.database.worker_heartbeat("w1", "node", 1, 1000, 20) == ["w1"]
+    assert sharding.database.worker_heartbeat("w2", "node", 2, 1010, 20) == ["w1", "w2"]
+    assert sharding.database.worker_heartbeat("w2", "node", 2, 1025, 20) == ["w2"]
@@ -0,0 +1,85 @@
+import pytest
+from app.services import timeseries as ts
+from app.services.timeseries import TimeSeriesStore, CHUNK_SPANS, RAW
+
+# Start of a raw chunk window, so tests control exactly when chunks are sealed
+BASE = 1_700_000_000 - 1_700_000_000 % CHUNK_SPANS[RAW]
+
+def _raw_chunks(db):
+    return db.execute(
+        "SELECT chunk_start, count, rolled_up FROM metric_chunks WHERE resolution = 0 ORDER BY chunk_start"
+    ).fetchall()
+
+def test_raw_query_reads_open_and_flushed_samples(db):
+    store = TimeSeriesStore()
+    for offset, value in ((0, 20.0), (10, 22.0), (30, 30.0)):
+        store.record("h1", {"temperature:Inlet": value}, BASE + offset)
+    # Unflushed samples are served from memory
+    assert store.query("h1", "temperature:Inlet", BASE, BASE + 60, 10)["points"] == [
+        [BASE, 20.0, 20.0, 20.0], [BASE + 10, 22.0, 22.0, 22.0], [BASE + 30, 30.0, 30.0, 30.0],
+    ]
+    store.flush()
+    assert _raw_chunks(db) == [(BASE, 3, 0)]
+    result = TimeSeriesStore().query("h1", "temperature:Inlet", BASE, BASE + 60, 20)
+    assert result == {"resolution": RAW, "points": [[BASE, 21.0, 20.0, 22.0], [BASE + 20, 30.0, 30.0, 30.0]]}
+    assert store.metrics("h1") == ["temperature:Inlet"]
+
+def test_sealed_chunk_is_rolled_up(db):
+    store = TimeSeriesStore()
+    # Two samples a minute for a whole window, alternating 10 and 30
+    for offset in range(0, CHUNK_SPANS[RAW], 30):
+        store.record("h1", {"fan_rpm:Fan1": 10.0 if offset % 60 else 30.0}, BASE + offset)
+    # The first sample of the next window seals the chunk
+    store.record("h1", {"fan_rpm:Fan1": 50.0}, BASE + CHUNK_SPANS[RAW])
+    store.flush()
+    assert _raw_chunks(db) == [(BASE, CHUNK_SPANS[RAW] // 30, 1), (BASE + CHUNK_SPANS[RAW], 1, 0)]
+
+    for step, resolution in ((60, 60), (300, 300), (3600, 3600), (7200, 3600)):
+        result = TimeSeriesStore().query("h1", "fan_rpm:Fan1", BASE, BASE + CHUNK_SPANS[RAW] - 1, step)
+        assert result["resolution"] == resolution
+        assert len(result["points"]) == CHUNK_SPANS[RAW] // step
+        assert all(point[1:] == [20.0, 10.0, 30.0] for point in result["points"])
+
+    # The open chunk after the rollup is filled in from raw samples
+    after = TimeSeriesStore().query("h1", "fan_rpm:Fan1", BASE, BASE + CHUNK_SPANS[RAW], 3600)
+    assert after["points"][-1] == [BASE + CHUNK_SPANS[RAW], 50.0, 50.0, 50.0]
+
+def test_chunk_split_by_a_restart(db):
+    before = TimeSeriesStore()
+    for offset in (0, 20, 40):
+        before.record("h1", {"psu_input_watts:PSU1": 100.0}, BASE + offset)
+    # What FleetPoller.stop() does: seal everything, so it is rolled up now
+    before.release({"h1"})
+    before.flush()
+
+    after = TimeSeriesStore()
+    # Same minute as the last rolled-up point, then the next minute
+    for offset in (50, 70):
+        after.record("h1", {"psu_input_watts:PSU1": 200.0}, BASE + offset)
+    after.flush()
+    assert _raw_chunks(db) == [(BASE, 3, 1), (BASE + 50, 2, 0)]
+
+    for step in (60, 3600):
+        first = after.query("h1", "psu_input_watts:PSU1", BASE, BASE + 120, step)["points"][0]
+        samples = [100.0] * 3 + [200.0] * (2 if step == 3600 else 1)
+        assert first == [BASE, pytest.approx(sum(samples) / len(samples)), 100.0, 200.0]
+
+    # Once the second chunk is rolled up too, its samples are merged into the same buckets, not counted twice
+    after.record("h1", {"psu_input_watts:PSU1": 200.0}, BASE + CHUNK_SPANS[RAW])
+    after.flush()
+    minute = after.query("h1", "psu_input_watts:PSU1", BASE, BASE + 120, 60)["points"]
+    assert minute == [[BASE, 125.0, 100.0, 200.0], [BASE + 60, 200.0, 200.0, 200.0]]
+
+def test_prune_applies_each_resolutions_retention(db, monkeypatch):
+    monkeypatch.setattr(ts, "TIMESERIES_RETENTION_DAYS", {RAW: 2, 60: 14, 300: 90, 3600: 400})
+    now = BASE + 1000 * 86400
+    rows = []
+    for resolution, days in ts.TIMESERIES_RETENTION_DAYS.items():
+        # A chunk still holds data inside the window until it has ended; chunk_start is kept at least one span
+        cutoff = int(now - days * 86400) - CHUNK_SPANS[resolution]
+        rows += [("h1", "m", resolution, cutoff - 1, 0, b"", 0), ("h1", "m", resolution, cutoff, 0, b"", 0)]
+    db.executemany(ts.INSERT_CHUNK, rows)
+
+    TimeSeriesStore().prune(now)
+    kept = db.execute("SELECT resolution, chunk_start FROM metric_chunks ORDER BY resolution").fetchall()
+    assert kept == [(resolution, chunk_start) for _, _, resolution, chunk_start, *_ in rows[1::2]]
@@ -2,10 +2,12 @@ import React from 'react';
 import { FaLaptop, FaExclamationTriangle, FaCheckCircle, FaTimesCircle } from 'react-icons/fa';
 
 const ServerCard = ({ server, onClick }) => {
-  const { ip, data, error } = server;
-  const healthStatus = data?.data?.system?.health?.toLowerCase() || 'unknown';
-  const powerState = data?.data?.system?.power_state?.toLowerCase() || 'off';
-  const model = data?.data?.system?.model || 'Unknown Model';
+  const { ip, summary, error } = server;
+  const healthStatus = summary?.health?.toLowerCase() || 'unknown';
+  const powerState = summary?.power_state?.toLowerCase() || 'off';
+  const model = summary?.model || 'Unknown Model';
+  // Set by the backend's per-iDRAC circuit breaker as soon as the BMC stops answering
+  const unreachable = summary?.reachability && !summary.reachability.reachable;
 
   const statusColor = healthStatus === 'ok' 
     ? 'bg-green-500' 
@@ -39,6 +41,11 @@ const ServerCard = ({ server, onClick }) => {
           <span className={`px-2 py-1 rounded-full text-white text-xs ${powerState === 'on' ? 'bg-green-600' : 'bg-red-600'}`}>
             {powerState.toUpperCase()}
           </span>
+          {unreachable && (
+            <span className="px-2 py-1 ml-2 rounded-full text-white text-xs bg-gray-600" title={summary.reachability.last_error || ''}>
+              UNREACHABLE
+            </span>
+          )}
           {error && <span className="text-red-500 ml-2">Error</span>}
         </div>
       </div>
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { BrowserRouter as Router, Routes, Route, Link, useLocation } from 'react-router-dom';
 import ReactDOM from 'react-dom/client';
 
@@ -39,91 +39,185 @@ const ChevronRightIcon = ({ size, className }) => (
   </svg>
 );
 
+const API_URL = 'http://127.0.0.1:8000/servers';
+const PAGE_SIZE = 200;
+const SEARCH_PAGE_SIZE = 20;
+
+// One level of the server tree: datacenters, a datacenter's cabinets or a cabinet's servers
+const fetchTree = async (params) => {
+  const response = await fetch(`${API_URL}/tree?${new URLSearchParams(params)}`);
+  if (!response.ok) {
+    throw new Error('Network response was not ok');
+  }
+  return response.json();
+};
+
+// Counts of Critical and Warning servers under a datacenter or cabinet, shown while it is collapsed
+const HealthRollup = ({ node }) => (
+  <span className="ml-auto pl-2 inline-flex items-center space-x-1 text-xs">
+    {node.health.Critical > 0 && (
+      <span className="px-1.5 rounded-full bg-red-500 text-white" title="Critical">{node.health.Critical}</span>
+    )}
+    {node.health.Warning > 0 && (
+      <span className="px-1.5 rounded-full bg-yellow-500 text-white" title="Warning">{node.health.Warning}</span>
+    )}
+    <span className="text-gray-500" title="Servers">{node.count}</span>
+  </span>
+);
+
+const healthDot = (health) =>
+  health === 'OK' ? 'bg-green-500'
+    : health === 'Warning' ? 'bg-yellow-500'
+    : health === 'Critical' ? 'bg-red-500'
+    : 'bg-gray-400';
+
 // Sidebar Component
 const Sidebar = () => {
   const [isOpen, setIsOpen] = useState(true);
-  const [groupedServers, setGroupedServers] = useState({});
   const [isServersOpen, setIsServersOpen] = useState(true);
   const [openGroups, setOpenGroups] = useState({});
   const [isLoading, setIsLoading] = useState(true);
+  // Tree levels are fetched from /servers/tree as they are expanded: datacenters up front,
+  // a datacenter's cabinets and a cabinet's servers on first expansion
+  const [datacenters, setDatacenters] = useState({ total: 0, nodes: [] });
+  const [cabinets, setCabinets] = useState({});
+  const [cabinetServers, setCabinetServers] = useState({});
+  const [query, setQuery] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
   const location = useLocation();
 
   const toggleSidebar = () => {
     setIsOpen(!isOpen);
   };
 
-  const toggleGroup = (groupId) => {
+  const loadDatacenters = useCallback(async (offset = 0) => {
+    try {
+      const data = await fetchTree({ limit: PAGE_SIZE, offset });
+      setDatacenters(prev => ({ total: data.total, nodes: offset ? [...prev.nodes, ...data.nodes] : data.nodes }));
+    } catch (error) {
+      console.error("Failed to fetch datacenters:", error);
+    } finally {
+      setIsLoading(false);
+    }
+  }, []);
+
+  const loadCabinets = async (dcId, offset = 0) => {
+    try {
+      const data = await fetchTree({ datacenter: dcId, limit: PAGE_SIZE, offset });
+      setCabinets(prev => ({
+        ...prev,
+        [dcId]: { total: data.total, nodes: offset ? [...prev[dcId].nodes, ...data.nodes] : data.nodes },
+      }));
+    } catch (error) {
+      console.error(`Failed to fetch cabinets of ${dcId}:`, error);
+    }
+  };
+
+  const loadCabinetServers = async (dcId, cabId) => {
+    try {
+      const data = await fetchTree({ datacenter: dcId, cabinet: cabId, limit: 5000 });
+      // Group the cabinet's servers by position, keeping the backend's bottom-up order
+      const positions = {};
+      data.nodes.forEach(server => {
+        const pos = server.Position || 'Unknown Position';
+        (positions[pos] = positions[pos] || []).push(server);
+      });
+      setCabinetServers(prev => ({ ...prev, [`${dcId}-${cabId}`]: positions }));
+    } catch (error) {
+      console.error(`Failed to fetch servers of ${dcId}/${cabId}:`, error);
+    }
+  };
+
+  const toggleGroup = (groupId, load) => {
+    const opening = !openGroups[groupId];
     setOpenGroups(prev => ({
       ...prev,
-      [groupId]: !prev[groupId]
+      [groupId]: opening
     }));
+    if (opening && load) {
+      load();
+    }
   };
 
   useEffect(() => {
-    const fetchServers = async () => {
-      setIsLoading(true);
+    loadDatacenters();
+  }, [loadDatacenters]);
+
+  // Search as the user types, once they pause
+  useEffect(() => {
+    if (!query.trim()) {
+      setSearchResults(null);
+      return;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
       try {
-        const response = await fetch('http://127.0.0.1:8000/servers/sidebar');
+        const params = new URLSearchParams({ q: query, limit: SEARCH_PAGE_SIZE });
+        const response = await fetch(`${API_URL}/search?${params}`, { signal: controller.signal });
         if (!response.ok) {
           throw new Error('Network response was not ok');
         }
-        
         const data = await response.json();
-        
-        if (data && Array.isArray(data.servers)) {
-          // Group servers into a nested structure: DC -> Cab -> Pos -> [server1, server2, ...]
-          const groups = data.servers.reduce((acc, server) => {
-            const dc = server.DataCenterID || 'Unknown DC';
-            const cab = server.Cabinet || 'Unknown Cabinet';
-            const pos = server.Position || 'Unknown Position';
-
-            if (!acc[dc]) {
-              acc[dc] = {};
-            }
-            if (!acc[dc][cab]) {
-              acc[dc][cab] = {};
-            }
-            if (!acc[dc][cab][pos]) {
-              acc[dc][cab][pos] = []; // Initialize as an array to hold multiple servers
-            }
-            acc[dc][cab][pos].push(server);
-            return acc;
-          }, {});
-
-          setGroupedServers(groups);
-
-          // Open all groups by default on first load
-          const initialOpenState = {};
-          Object.keys(groups).forEach(dc => {
-            initialOpenState[dc] = true;
-            Object.keys(groups[dc]).forEach(cab => {
-              initialOpenState[`${dc}-${cab}`] = true;
-            });
-          });
-          setOpenGroups(initialOpenState);
-        } else {
-          console.error("API response did not contain a valid 'servers' array:", data);
-          setGroupedServers({});
-        }
+        setSearchResults({ total: data.total, servers: data.servers });
       } catch (error) {
-        console.error("Failed to fetch servers:", error);
-      } finally {
-        setIsLoading(false);
+        if (error.name !== 'AbortError') {
+          console.error("Search failed:", error);
+        }
       }
+    }, 250);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
     };
+  }, [query]);
 
-    fetchServers();
-  }, []);
+  const loadMoreResults = async () => {
+    try {
+      const params = new URLSearchParams({ q: query, limit: SEARCH_PAGE_SIZE, offset: searchResults.servers.length });
+      const response = await fetch(`${API_URL}/search?${params}`);
+      const data = await response.json();
+      setSearchResults(prev => ({ total: data.total, servers: [...prev.servers, ...data.servers] }));
+    } catch (error) {
+      console.error("Search failed:", error);
+    }
+  };
 
   const navItems = [
     { name: 'Dashboard', icon: <ChartLineIcon size={18} />, path: '/' },
   ];
 
+  const fadeClass = isOpen ? 'opacity-100' : 'opacity-0 w-0';
+
+  const serverLink = (server, label) => (
+    <Link
+      to={`/servers/${server.ip}`}
+      className={`flex items-center p-2 text-sm rounded-md transition-colors duration-200 ${
+        location.pathname === `/servers/${server.ip}`
+          ? 'bg-blue-600 text-white shadow-md'
+          : 'hover:bg-blue-100'
+      }`}
+    >
+      <span className={`transition-opacity duration-300 ${fadeClass} whitespace-nowrap overflow-hidden inline-flex items-center`}>
+        <span className={`inline-block w-2 h-2 rounded-full mr-2 ${healthDot(server.health)}`} title={server.health || 'Unknown'} />
+        <span className="font-bold text-gray-800">{server.hostname || 'N/A'}</span>
+        {label && <span className="ml-2 text-xs text-gray-500">{label}</span>}
+      </span>
+    </Link>
+  );
+
+  const loadMoreButton = (onClick, remaining) => (
+    <li>
+      <button onClick={onClick} className={`w-full text-left p-2 text-xs text-blue-600 hover:underline ${fadeClass}`}>
+        Show more ({remaining} remaining)
+      </button>
+    </li>
+  );
+
   return (
     <div
       className={`relative h-screen bg-white text-gray-800 transition-all duration-300 shadow-lg ${
         isOpen ? 'w-64' : 'w-20'
-      } border-r border-blue-100`}
+      } border-r border-blue-100 overflow-y-auto`}
     >
       {/* Header and Toggle Button */}
       <div className="flex items-center justify-between p-4 border-b border-blue-100">
@@ -188,7 +282,33 @@ const Sidebar = () => {
                 Servers
               </span>
             </button>
-            {isServersOpen && (
+            {isServersOpen && isOpen && (
+              <div className="mx-4 mt-2">
+                <input
+                  type="search"
+                  value={query}
+                  onChange={(e) => setQuery(e.target.value)}
+                  placeholder="Search hostname, serial, tag, owner..."
+                  className="w-full p-2 text-sm border border-blue-200 rounded-md focus:outline-none focus:border-blue-500"
+                />
+              </div>
+            )}
+            {isServersOpen && searchResults && (
+              <ul className="ml-8 mt-2 space-y-1">
+                {searchResults.servers.length > 0 ? (
+                  searchResults.servers.map(server => (
+                    <li key={server.hostname}>
+                      {serverLink(server, `${server.DataCenterID}/${server.Cabinet}/${server.Position}`)}
+                    </li>
+                  ))
+                ) : (
+                  <li className={`p-2 text-sm text-gray-500 ${fadeClass}`}>No matching servers.</li>
+                )}
+                {searchResults.servers.length < searchResults.total &&
+                  loadMoreButton(loadMoreResults, searchResults.total - searchResults.servers.length)}
+              </ul>
+            )}
+            {isServersOpen && !searchResults && (
               <ul className="ml-8 mt-2 space-y-1">
                 {isLoading ? (
                   <li className={`flex items-center p-3 text-sm transition-opacity duration-300 ${
@@ -197,91 +317,101 @@ const Sidebar = () => {
                     <SpinnerIcon size={18} className="animate-spin mr-2 text-blue-500" />
                     <span className="text-gray-500">Loading...</span>
                   </li>
-                ) : Object.keys(groupedServers).length > 0 ? (
-                  Object.keys(groupedServers).map((dcId) => (
-                    <li key={dcId}>
-                      {/* DC Group */}
-                      <button
-                        onClick={() => toggleGroup(dcId)}
-                        className="w-full text-left p-2 text-sm rounded-md transition-colors duration-200 hover:bg-sky-300 bg-sky-200"
-                      >
-                        <span className={`inline-flex items-center transition-opacity duration-300 ${
-                          isOpen ? 'opacity-100' : 'opacity-0 w-0'
-                        } whitespace-nowrap overflow-hidden`}>
-                          <ChevronRightIcon size={14} className={`transform transition-transform duration-200 mr-2 ${openGroups[dcId] ? 'rotate-90 text-blue-600' : 'text-blue-400'}`} />
-                          <span className="font-bold text-blue-900">DC: </span>
-                          <span className="ml-1 text-blue-800">{dcId}</span>
-                        </span>
-                      </button>
-                      {openGroups[dcId] && (
-                        <ul className="ml-4 mt-1 space-y-1">
-                          {Object.keys(groupedServers[dcId]).map(cabId => (
-                            <li key={`${dcId}-${cabId}`}>
-                              {/* Cabinet Group */}
-                              <button
-                                onClick={() => toggleGroup(`${dcId}-${cabId}`)}
-                                className="w-full text-left p-2 text-sm rounded-md transition-colors duration-200 hover:bg-emerald-300 bg-emerald-200"
-                              >
-                                <span className={`inline-flex items-center transition-opacity duration-300 ${
-                                  isOpen ? 'opacity-100' : 'opacity-0 w-0'
-                                } whitespace-nowrap overflow-hidden`}>
-                                  <ChevronRightIcon size={14} className={`transform transition-transform duration-200 mr-2 ${openGroups[`${dcId}-${cabId}`] ? 'rotate-90 text-blue-600' : 'text-blue-400'}`} />
-                                  <span className="font-bold text-green-800">Cab: </span>
-                                  <span className="ml-1 text-green-700">{cabId}</span>
-                                </span>
-                              </button>
-                              {openGroups[`${dcId}-${cabId}`] && (
-                                <ul className="ml-4 mt-1 space-y-1">
-                                  {Object.keys(groupedServers[dcId][cabId]).map(posId => (
-                                    <li key={`${dcId}-${cabId}-${posId}`}>
-                                      {/* Position Group */}
+                ) : datacenters.nodes.length > 0 ? (
+                  <>
+                    {datacenters.nodes.map((dc) => (
+                      <li key={dc.id}>
+                        {/* DC Group */}
+                        <button
+                          onClick={() => toggleGroup(dc.id, !cabinets[dc.id] && (() => loadCabinets(dc.id)))}
+                          className="w-full text-left p-2 text-sm rounded-md transition-colors duration-200 hover:bg-sky-300 bg-sky-200"
+                        >
+                          <span className={`flex items-center transition-opacity duration-300 ${
+                            isOpen ? 'opacity-100' : 'opacity-0 w-0'
+                          } whitespace-nowrap overflow-hidden`}>
+                            <ChevronRightIcon size={14} className={`transform transition-transform duration-200 mr-2 ${openGroups[dc.id] ? 'rotate-90 text-blue-600' : 'text-blue-400'}`} />
+                            <span className="font-bold text-blue-900">DC: </span>
+                            <span className="ml-1 text-blue-800">{dc.id}</span>
+                            <HealthRollup node={dc} />
+                          </span>
+                        </button>
+                        {openGroups[dc.id] && (
+                          <ul className="ml-4 mt-1 space-y-1">
+                            {!cabinets[dc.id] ? (
+                              <li className="flex items-center p-2 text-sm">
+                                <SpinnerIcon size={14} className="animate-spin mr-2 text-blue-500" />
+                              </li>
+                            ) : (
+                              <>
+                                {cabinets[dc.id].nodes.map(cab => {
+                                  const cabKey = `${dc.id}-${cab.id}`;
+                                  const positions = cabinetServers[cabKey];
+                                  return (
+                                    <li key={cabKey}>
+                                      {/* Cabinet Group */}
                                       <button
-                                        onClick={() => toggleGroup(`${dcId}-${cabId}-${posId}`)}
-                                        className="w-full text-left p-2 text-sm rounded-md transition-colors duration-200 hover:bg-amber-300 bg-amber-200"
+                                        onClick={() => toggleGroup(cabKey, !positions && (() => loadCabinetServers(dc.id, cab.id)))}
+                                        className="w-full text-left p-2 text-sm rounded-md transition-colors duration-200 hover:bg-emerald-300 bg-emerald-200"
                                       >
-                                        <span className={`inline-flex items-center transition-opacity duration-300 ${
+                                        <span className={`flex items-center transition-opacity duration-300 ${
                                           isOpen ? 'opacity-100' : 'opacity-0 w-0'
                                         } whitespace-nowrap overflow-hidden`}>
-                                          <ChevronRightIcon size={14} className={`transform transition-transform duration-200 mr-2 ${openGroups[`${dcId}-${cabId}-${posId}`] ? 'rotate-90 text-blue-600' : 'text-blue-400'}`} />
-                                          <span className="font-bold text-yellow-800">Pos: </span>
-                                          <span className="ml-1 text-yellow-700">{posId}</span>
+                                          <ChevronRightIcon size={14} className={`transform transition-transform duration-200 mr-2 ${openGroups[cabKey] ? 'rotate-90 text-blue-600' : 'text-blue-400'}`} />
+                                          <span className="font-bold text-green-800">Cab: </span>
+                                          <span className="ml-1 text-green-700">{cab.id}</span>
+                                          <HealthRollup node={cab} />
                                         </span>
                                       </button>
-                                      {openGroups[`${dcId}-${cabId}-${posId}`] && (
+                                      {openGroups[cabKey] && (
                                         <ul className="ml-4 mt-1 space-y-1">
-                                          {groupedServers[dcId][cabId][posId].map(server => (
-                                            <li key={server.iDRAC_IP}>
-                                              {/* Final Hostname Link */}
-                                              <Link
-                                                to={`/servers/${server.iDRAC_IP}`}
-                                                className={`block p-2 text-sm rounded-md transition-colors duration-200 ${
-                                                  location.pathname === `/servers/${server.iDRAC_IP}`
-                                                    ? 'bg-blue-600 text-white shadow-md'
-                                                    : 'hover:bg-blue-100'
-                                                }`}
+                                          {!positions ? (
+                                            <li className="flex items-center p-2 text-sm">
+                                              <SpinnerIcon size={14} className="animate-spin mr-2 text-blue-500" />
+                                            </li>
+                                          ) : Object.keys(positions).map(posId => (
+                                            <li key={`${cabKey}-${posId}`}>
+                                              {/* Position Group */}
+                                              <button
+                                                onClick={() => toggleGroup(`${cabKey}-${posId}`)}
+                                                className="w-full text-left p-2 text-sm rounded-md transition-colors duration-200 hover:bg-amber-300 bg-amber-200"
                                               >
-                                                <span
-                                                  className={`transition-opacity duration-300 ${
-                                                    isOpen ? 'opacity-100' : 'opacity-0 w-0'
-                                                  } whitespace-nowrap overflow-hidden`}
-                                                >
-                                                  <span className="font-bold text-gray-800">{server.Hostname || 'N/A'}</span>
+                                                <span className={`inline-flex items-center transition-opacity duration-300 ${
+                                                  isOpen ? 'opacity-100' : 'opacity-0 w-0'
+                                                } whitespace-nowrap overflow-hidden`}>
+                                                  <ChevronRightIcon size={14} className={`transform transition-transform duration-200 mr-2 ${openGroups[`${cabKey}-${posId}`] ? 'rotate-90 text-blue-600' : 'text-blue-400'}`} />
+                                                  <span className="font-bold text-yellow-800">Pos: </span>
+                                                  <span className="ml-1 text-yellow-700">{posId}</span>
                                                 </span>
-                                              </Link>
+                                              </button>
+                                              {openGroups[`${cabKey}-${posId}`] && (
+                                                <ul className="ml-4 mt-1 space-y-1">
+                                                  {positions[posId].map(server => (
+                                                    <li key={server.hostname}>
+                                                      {/* Final Hostname Link */}
+                                                      {serverLink(server)}
+                                                    </li>
+                                                  ))}
+                                                </ul>
+                                              )}
                                             </li>
                                           ))}
                                         </ul>
                                       )}
                                     </li>
-                                  ))}
-                                </ul>
-                              )}
-                            </li>
-                          ))}
-                        </ul>
-                      )}
-                    </li>
-                  ))
+                                  );
+                                })}
+                                {cabinets[dc.id].nodes.length < cabinets[dc.id].total &&
+                                  loadMoreButton(() => loadCabinets(dc.id, cabinets[dc.id].nodes.length),
+                                                 cabinets[dc.id].total - cabinets[dc.id].nodes.length)}
+                              </>
+                            )}
+                          </ul>
+                        )}
+                      </li>
+                    ))}
+                    {datacenters.nodes.length < datacenters.total &&
+                      loadMoreButton(() => loadDatacenters(datacenters.nodes.length), datacenters.total - datacenters.nodes.length)}
+                  </>
                 ) : (
                   <li className={`p-2 text-sm text-gray-500 transition-opacity duration-300 ${
                     isOpen ? 'opacity-100' : 'opacity-0 w-0'
@@ -3,6 +3,7 @@ import { BarChart, Bar, PieChart, Pie, Cell, Tooltip, Legend, ResponsiveContaine
 import { FaArrowUp, FaArrowDown, FaExclamationTriangle, FaServer, FaSpinner } from 'react-icons/fa';
 
 const API_URL = 'http://127.0.0.1:8000/servers';
+const PAGE_SIZE = 1000;
 
 const DashboardPage = () => {
   const [servers, setServers] = useState([]);
@@ -12,51 +13,39 @@ const DashboardPage = () => {
   const [isLoadingDetails, setIsLoadingDetails] = useState(true);
 
   useEffect(() => {
-    const fetchInitialServerList = async () => {
+    const fetchServerSummaries = async () => {
       try {
         setLoading(true);
-        const response = await fetch(API_URL);
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        const data = await response.json();
-        setTotalServerCount(data.servers.length);
-        
-        // After getting the list, start fetching details for each server
-        fetchServerDetails(data.servers);
+        setIsLoadingDetails(true);
+        // One compact record per server from /summary, paged, instead of one details request per server
+        const summaries = [];
+        let total = 0;
+        do {
+          const response = await fetch(`${API_URL}/summary?limit=${PAGE_SIZE}&offset=${summaries.length}`);
+          if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+          }
+          const page = await response.json();
+          total = page.total;
+          summaries.push(...page.servers);
+          if (page.servers.length === 0) break;
+        } while (summaries.length < total);
+
+        setTotalServerCount(total);
+        setServers(summaries.map((summary) => {
+          const powerState = summary.power_state?.toLowerCase() || 'off';
+          // A server that was never polled successfully has no snapshot yet
+          return { ip: summary.ip, data: summary.last_polled ? summary : null, status: powerState === 'on' ? 'up' : 'down' };
+        }));
       } catch (e) {
+        setError(e.message);
+      } finally {
         setLoading(false);
         setIsLoadingDetails(false);
-        setError(e.message);
       }
     };
 
-    const fetchServerDetails = async (serverList) => {
-      setIsLoadingDetails(true);
-      // Corrected the mapping to use the 'ip' property from each server object
-      const serverDetailsPromises = serverList.map(async (server) => {
-        try {
-          const detailsResponse = await fetch(`${API_URL}/${server.ip}`);
-          if (!detailsResponse.ok) {
-            console.error(`Failed to fetch details for ${server.ip}:`, detailsResponse.statusText);
-            return { ip: server.ip, data: null, status: 'down' };
-          }
-          const details = await detailsResponse.json();
-          const powerState = details.data?.system?.power_state?.toLowerCase() || 'off';
-          return { ip: server.ip, data: details, status: powerState === 'on' ? 'up' : 'down' };
-        } catch (e) {
-          console.error(`Network error for ${server.ip}:`, e);
-          return { ip: server.ip, data: null, status: 'down' };
-        }
-      });
-
-      const allServerDetails = await Promise.all(serverDetailsPromises);
-      setServers(allServerDetails);
-      setLoading(false);
-      setIsLoadingDetails(false);
-    };
-
-    fetchInitialServerList();
+    fetchServerSummaries();
   }, []);
 
   // Show a loading state for the whole page
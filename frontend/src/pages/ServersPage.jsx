@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import ServerCard from '../components/ServerCard';
 
 const API_URL = 'http://127.0.0.1:8000/servers';
+const PAGE_SIZE = 1000;
 
 const ServersPage = () => {
   const [servers, setServers] = useState([]);
@@ -12,24 +13,20 @@ const ServersPage = () => {
   useEffect(() => {
     const fetchServers = async () => {
       try {
-        const response = await fetch(API_URL);
-        if (!response.ok) {
-          throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        const data = await response.json();
-        
-        const serverDetailsPromises = data.servers.map(async (ip) => {
-          const detailsResponse = await fetch(`${API_URL}/${ip}`);
-          if (!detailsResponse.ok) {
-            console.error(`Failed to fetch details for ${ip}:`, detailsResponse.statusText);
-            return { ip, data: null, error: detailsResponse.statusText };
+        // Compact per-server status from /summary, paged, instead of one details request per server
+        const summaries = [];
+        let total = 0;
+        do {
+          const response = await fetch(`${API_URL}/summary?limit=${PAGE_SIZE}&offset=${summaries.length}`);
+          if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
           }
-          const details = await detailsResponse.json();
-          return { ip, data: details, error: null };
-        });
-
-        const allServerDetails = await Promise.all(serverDetailsPromises);
-        setServers(allServerDetails);
+          const page = await response.json();
+          total = page.total;
+          summaries.push(...page.servers);
+          if (page.servers.length === 0) break;
+        } while (summaries.length < total);
+        setServers(summaries.map((summary) => ({ ip: summary.ip, summary, error: null })));
       } catch (e) {
         setError(e.message);
       } finally {